@@ -0,0 +1,236 @@
+# CS340 Project Two | Async CRUD Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Asyncio counterpart of the CRUD Python Module for the AAC (Austin Animal Center) database.
+
+try: # Native asyncio driver shipped with PyMongo 4.9+
+    from pymongo import AsyncMongoClient
+except ImportError:
+    AsyncMongoClient = None
+
+from CRUD_Python_Module import DERIVED_SOURCE_FIELDS, derived_fields, derived_fields_pipeline
+from CRUD_Python_Module import MODIFIED_FIELD, VIEW_COLLECTIONS, changing, modified_now, with_modified # Rescue views
+from CRUD_Python_Module import ROLLUP_COLLECTION, ROLLUP_SOURCE_FIELDS, rollup_facet_pipeline, rollup_groups, rollup_updates # Outcome rollups
+from CRUD_Python_Module import ID_BATCH_SIZE, batches # Bounded $in filters
+
+async def id_batches(cursor, size=ID_BATCH_SIZE):
+    """ Yields lists of up to size _id values of an async cursor """
+    batch = []
+    async for document in cursor:
+        batch.append(document['_id'])
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class AsyncAnimalShelter:
+    """ Asynchronous CRUD operations for the Animal collection in MongoDB """
+    """ Same surface as AnimalShelter, every method is a coroutine (read_iter is an async generator) """
+
+    def __init__(self, username='aacuser', password='NoSQLNoParty'):
+        """ Initializes the connection to MongoDB (connects lazily on the first operation) """
+
+        USER = username    # MongoDB username
+        PASS = password    # MongoDB password
+        HOST = 'localhost' # hostname of the MongoDB server
+        PORT = 27017       # port number of the MongoDB server
+        DB   = 'aac'       # database name
+        COL  = 'animals'   # collection name
+
+        try:
+            if AsyncMongoClient is None:
+                raise Exception("AsyncAnimalShelter requires PyMongo 4.9 or newer")
+            self.client     = AsyncMongoClient(f'mongodb://{USER}:{PASS}@{HOST}:{PORT}')
+            self.database   = self.client[DB]
+            self.collection = self.database[COL]
+            print("Async connection to MongoDB configured successfully")
+        except Exception as e:
+            print(f"Error connecting to MongoDB: {e}")
+
+    async def create(self, data):
+        """ Inserts a document into the MongoDB collection """
+        """ Input: data - dictionary with key/value pairs to insert """
+        """ Returns: True if successful, False otherwise """
+
+        try: # Validate input data
+            if data is not None and isinstance(data, dict):
+                # Add the derived fields (rescue tags, location) used by the indexed queries
+                data.update(derived_fields(data))
+                data[MODIFIED_FIELD] = modified_now() # Picked up by the next view refresh
+                # Insert the document into the animals collection
+                result = await self.collection.insert_one(data)
+                # Check if insertion was successful by verifying inserted_id exists
+                if result.inserted_id:
+                    await self.update_rollups([result.inserted_id], 1, [data]) # Counted in the outcome trends
+                    print(f"Document inserted successfully with ID: {result.inserted_id}")
+                    return True
+                else:
+                    print("Failed to insert document")
+                    return False
+            else:
+                raise Exception("Data parameter is empty or not a dictionary")
+        except Exception as e:
+            print(f"Error occurred during create operation: {e}")
+            return False
+
+    async def read(self, query, projection=None):
+        """ Query documents from the MongoDB collection """
+        """ Input: query      - dictionary with key/value pairs for filtering """
+        """        projection - list of field names or projection dictionary (None returns all) """
+        """ Returns: list of documents if successful, empty list otherwise """
+
+        try: # Validate input query
+            if query is not None and isinstance(query, dict):
+                if isinstance(projection, (list, tuple)): # Field list -> projection dictionary
+                    projection = dict.fromkeys(projection, 1)
+                # Query the database using find() method and convert cursor to list
+                return await self.collection.find(query, projection).to_list()
+            else:
+                raise Exception("Query parameter is empty or not a dictionary")
+        except Exception as e:
+            print(f"Error occurred during read operation: {e}")
+            return []
+
+    async def read_iter(self, query, projection=None, sort=None, limit=0,
+                        batch_size=None, max_time_ms=None, strict=False):
+        """ Streams documents from the MongoDB collection as the cursor delivers them """
+        """ Input: same as AnimalShelter.read_iter() (without chunking) """
+        """ Yields: one document at a time """
+
+        try: # Validate input query
+            if query is not None and isinstance(query, dict):
+                if isinstance(projection, (list, tuple)):
+                    projection = dict.fromkeys(projection, 1)
+                cursor = self.collection.find(query, projection, limit=limit)
+                if sort:
+                    cursor = cursor.sort(sort)
+                if batch_size:
+                    cursor = cursor.batch_size(batch_size)
+                if max_time_ms:
+                    cursor = cursor.max_time_ms(max_time_ms)
+                async for document in cursor:
+                    yield document
+            else:
+                raise Exception("Query parameter is empty or not a dictionary")
+        except Exception as e:
+            print(f"Error occurred during streaming read operation: {e}")
+            if strict:
+                raise
+
+    async def aggregate(self, pipeline, allow_disk_use=False, max_time_ms=None):
+        """ Runs an aggregation pipeline on the MongoDB collection """
+        """ Input: pipeline       - list of aggregation stages """
+        """        allow_disk_use - let large $group/$sort stages spill to disk """
+        """        max_time_ms    - server-side time limit in milliseconds """
+        """ Returns: list of result documents if successful, empty list otherwise """
+
+        try: # Validate input pipeline
+            if pipeline is not None and isinstance(pipeline, list):
+                options = {"allowDiskUse": allow_disk_use}
+                if max_time_ms:
+                    options["maxTimeMS"] = max_time_ms
+                cursor = await self.collection.aggregate(pipeline, **options)
+                return await cursor.to_list()
+            else:
+                raise Exception("Pipeline parameter is empty or not a list")
+        except Exception as e:
+            print(f"Error occurred during aggregate operation: {e}")
+            return []
+
+    async def update(self, query, new_values):
+        """ Updates document(s) in the MongoDB collection """
+        """ Input: query -> key/value lookup pair to filter documents """
+        """   new_values -> dictionary of fields to update: {'$set': { ... }} """
+        """ Return: Number of documents modified """
+
+        try: # Validate that both query and new_values parameters are dictionaries
+            if isinstance(query, dict) and isinstance(new_values, dict):
+                # Remember the matching documents if a source of the derived fields changes
+                fields = [field.split('.')[0] for operation in new_values.values()
+                          if isinstance(operation, dict) for field in operation]
+                touched = [field for field in fields if field in DERIVED_SOURCE_FIELDS]
+                counted = [field for field in fields if field in ROLLUP_SOURCE_FIELDS]
+                if not (touched or counted):
+                    # Execute update_many to update all documents matching the query
+                    result = await self.collection.update_many(changing(query, new_values), with_modified(new_values))
+                    return result.modified_count
+                # Batch by batch in _id order, remembering the matching documents (same as AnimalShelter)
+                modified = 0
+                matching = self.collection.find(query, {'_id': 1}).sort('_id', 1)
+                async for ids in id_batches(matching):
+                    if counted:            # Outcome trends: old versions out, new versions back in
+                        await self.update_rollups(ids, -1)
+                    try:
+                        result = await self.collection.update_many(changing({'$and': [query, {'_id': {'$in': ids}}]},
+                                                                            new_values),
+                                                                   with_modified(new_values))
+                        modified += result.modified_count
+                        if result.modified_count and touched: # Recompute the derived fields
+                            await self.collection.update_many({'_id': {'$in': ids}}, derived_fields_pipeline())
+                    finally:
+                        if counted:
+                            await self.update_rollups(ids, 1)
+                # Return the number of documents that were successfully modified
+                return modified
+            else: # Raise exception if input validation fails
+                raise Exception("Both query and new_values must be dictionaries")
+        except Exception as e: # Handle any other exceptions
+            print(f"Error occurred during update operation: {e}")
+            return 0
+
+    async def delete(self, query):
+        """ Deletes document(s) from the MongoDB collection """
+        """ Input: query -> key/value lookup pair for find() / delete_many() """
+        """ Return: Number of documents deleted """
+
+        try: # Validate that the query parameter is a dictionary
+            if isinstance(query, dict):
+                # Deleted documents leave no write time behind: remove them from the views too
+                # (batch by batch in _id order, like AnimalShelter.delete())
+                deleted = 0
+                matching = self.collection.find(query, {'_id': 1}).sort('_id', 1)
+                async for ids in id_batches(matching):
+                    await self.update_rollups(ids, -1) # Counted out of the outcome trends
+                    result = None
+                    try:
+                        # Execute delete_many to remove the matching documents of the batch
+                        result = await self.collection.delete_many({'$and': [query, {'_id': {'$in': ids}}]})
+                    finally: # Documents still there (not matching anymore, or a failed delete) are counted back in
+                        if result is None or result.deleted_count < len(ids):
+                            await self.update_rollups(ids, 1)
+                    if result.deleted_count:
+                        for name in VIEW_COLLECTIONS.values():
+                            await self.database[name].delete_many({'_id': {'$in': ids}})
+                    deleted += result.deleted_count
+                # Return the number of documents that were successfully deleted
+                return deleted
+            else: # Raise exception if input validation fails
+                raise Exception("Query must be a dictionary")
+        except Exception as e: # Handle any other exceptions
+            print(f"Error occurred during delete operation: {e}")
+            return 0
+
+    async def update_rollups(self, ids, sign, documents=None):
+        """ Adds (sign=1) or removes (sign=-1) documents from the outcome rollups """
+        """ (same as AnimalShelter.update_rollups()) """
+        try:
+            rollups = self.database[ROLLUP_COLLECTION]
+            groups = rollup_groups(documents) if documents is not None else None
+            if groups is not None:
+                operations = rollup_updates(groups, sign)
+                if operations:
+                    await rollups.bulk_write(operations, ordered=False)
+                return
+            for batch in batches(ids):
+                cursor = await self.collection.aggregate(rollup_facet_pipeline({'_id': {'$in': batch}}))
+                result = await cursor.to_list()
+                operations = rollup_updates(result[0] if result else {}, sign)
+                if operations:
+                    await rollups.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"Error occurred while updating the outcome rollups: {e}")
+
+    async def close(self):
+        """ Closes the connection pool of the async client """
+        await self.client.close()
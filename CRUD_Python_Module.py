@@ -3,30 +3,534 @@
 # Date: 11/24/2025
 # Description: CRUD operations module for the AAC (Austin Animal Center) MongoDB database.
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, GEOSPHERE, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
 from bson.objectid import ObjectId
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from Query_Cache_Module import QueryCache, SingleFlight, make_key # Shared query result cache
+import copy
+import math
+import os
+import re
+
+# Breed patterns of the rescue profiles (case-insensitive, matched anywhere in the breed)
+# Stored on every document as rescue tags so the rescue queries can use an index
+RESCUE_BREED_PATTERNS = {
+    'water': (                                 # Water SAR:
+        "labrador retriever.*(mix|\\s*/|/)"     # - Labrador Retriever Mix
+        "|chesapeake bay retriever"             # - Chesapeake Bay Retriever
+        "|newfoundland"),                       # - Newfoundland
+    'mountain': (                              # Mountain or Wilderness SAR:
+        "german shepherd"                       # - German Shepherd
+        "|alaskan malamute"                     # - Alaskan Malamute
+        "|old english sheepdog"                 # - Old English Sheepdog
+        "|siberian husky"                       # - Siberian Husky
+        "|rottweiler"),                         # - Rottweiler
+    'disaster': (                              # Disaster or Individual Tracking SAR:
+        "doberman pinscher"                     # - Doberman Pinscher
+        "|german shepherd"                      # - German Shepherd
+        "|golden retriever"                     # - Golden Retriever
+        "|bloodhound"                           # - Bloodhound
+        "|rottweiler"),                         # - Rottweiler
+}
+RESCUE_TAGS_FIELD = 'rescue_tags' # Field holding the rescue tags of a document
+LOCATION_FIELD = 'location'       # GeoJSON point built from location_lat/location_long (2dsphere)
+
+# Criteria of the rescue types (Grazioso Salvare requirements)
+# Breeds are matched through the indexed rescue tags precomputed at write time
+# (see RESCUE_BREED_PATTERNS above for the breed list of each profile)
+RESCUE_PROFILES = {
+    ########################################## Water SAR Criteria:
+    'water': {
+        "animal_type": "Dog",                    # - Must be a dog
+        "sex_upon_outcome": "Intact Female",     # - Intact Female 
+        RESCUE_TAGS_FIELD: "water",              # - Labrador Retriever Mix, Chesapeake Bay
+                                                 #   Retriever, Newfoundland
+        "age_upon_outcome_in_weeks": {
+            "$gte": 26,                          # - Age between 26 and 156 weeks
+            "$lte": 156
+        },
+        "outcome_type": {
+        "$nin": ["Return to Owner", "Died", "Euthanasia"] # Optional search enhancement
+        }
+    },
+    ########################################## Mountain or Wilderness SAR Criteria:
+    'mountain': {
+        "animal_type": "Dog",                    # - Must be a dog
+        "sex_upon_outcome": "Intact Male",       # - Intact Male 
+        RESCUE_TAGS_FIELD: "mountain",           # - German Shepherd, Alaskan Malamute, Old English
+                                                 #   Sheepdog, Siberian Husky, Rottweiler
+        "age_upon_outcome_in_weeks": {
+            "$gte": 26,                          # - Age between 26 and 156 weeks
+            "$lte": 156
+        },
+        "outcome_type": {
+        "$nin": ["Return to Owner", "Died", "Euthanasia"] # Optional search enhancement
+        }
+    },
+    ###################################### Disaster or Individual Tracking SAR Criteria:
+    'disaster': {
+        "animal_type": "Dog",                    # - Must be a dog
+        "sex_upon_outcome": "Intact Male",       # - Intact Male 
+        RESCUE_TAGS_FIELD: "disaster",           # - Doberman Pinscher, German Shepherd, Golden
+                                                 #   Retriever, Bloodhound, Rottweiler
+        "age_upon_outcome_in_weeks": {
+            "$gte": 20,                          # - Age between 20 and 300 weeks
+            "$lte": 300
+        },
+        "outcome_type": {
+        "$nin": ["Return to Owner", "Died", "Euthanasia"] # Optional search enhancement
+        }
+    },
+}
+DERIVED_SOURCE_FIELDS = ['breed', 'location_lat', 'location_long'] # Sources of the derived fields
+MODIFIED_FIELD = 'last_modified'  # Write time of a document (watermark of the rescue views)
+
+# Materialized rescue views: one small collection per profile holding copies of its candidates,
+# refreshed incrementally from the documents modified since the last refresh
+VIEW_COLLECTIONS = {profile: f'rescue_{profile}' for profile in RESCUE_PROFILES}
+VIEW_STATE_COLLECTION = 'rescue_view_state' # Watermark and size of every view
+VIEW_WATERMARK_LAG = 5            # Seconds re-read before the watermark (clock skew, slow writes)
+
+# Outcome rollups: pre-aggregated counts per day/month, outcome type and animal type (one
+# document per bucket with a 'count' field and one field per rescue profile), kept up to date
+# by the writes of this class so trend charts never scan the animals collection
+ROLLUP_COLLECTION = 'outcome_rollups'
+ROLLUP_PERIODS = {'day': 10, 'month': 7} # Length of the date prefix ('2016-05-01' / '2016-05')
+ROLLUP_GROUPS = ['outcome_type', 'animal_type'] # Dimensions of the rollup documents
+# Fields whose update can move a document to another bucket or in/out of a rescue profile
+ROLLUP_SOURCE_FIELDS = sorted({'datetime', 'breed'} | {field for profile in RESCUE_PROFILES.values()
+                                                      for field in profile})
+EARTH_RADIUS_KM = 6378.1          # Equatorial radius used by $centerSphere
+ID_BATCH_SIZE = 1000              # _id values per $in filter (commands stay far below 16 MB)
+
+def classify_breed(breed):
+    """ Returns the list of rescue tags whose breed pattern matches the breed """
+    if not isinstance(breed, str):
+        return []
+    return [tag for tag, pattern in RESCUE_BREED_PATTERNS.items()
+            if re.search(pattern, breed, re.IGNORECASE)]
+
+def location_point(lat, lng):
+    """ Returns the GeoJSON point of valid coordinates, None otherwise """
+    valid = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (lat, lng))
+    if not valid or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return {'type': 'Point', 'coordinates': [lng, lat]} # GeoJSON order: longitude first
+
+def derived_fields(document):
+    """ Computes the derived (indexed) fields of a document before it is inserted """
+    fields = {RESCUE_TAGS_FIELD: classify_breed(document.get('breed'))}
+    point = location_point(document.get('location_lat'), document.get('location_long'))
+    if point is not None:
+        fields[LOCATION_FIELD] = point
+    return fields
+
+def derived_fields_pipeline():
+    """ Update pipeline recomputing the derived fields inside MongoDB """
+    """ (same rules as derived_fields(), used by update() and the backfill) """
+    tags = [{"$cond": [{"$regexMatch": {"input": "$breed", "regex": pattern, "options": "i"}},
+                       [tag], []]}
+            for tag, pattern in RESCUE_BREED_PATTERNS.items()]
+    valid_location = {"$and": [
+        {"$isNumber": "$location_lat"}, {"$isNumber": "$location_long"},
+        {"$gte": ["$location_lat", -90]}, {"$lte": ["$location_lat", 90]},
+        {"$gte": ["$location_long", -180]}, {"$lte": ["$location_long", 180]}]}
+    location = {"$cond": [valid_location,
+                          {"type": "Point", "coordinates": ["$location_long", "$location_lat"]},
+                          "$$REMOVE"]}  # Invalid or missing coordinates: no location field
+    return [{"$set": {RESCUE_TAGS_FIELD: {"$concatArrays": tags}, LOCATION_FIELD: location}}]
+
+def modified_now():
+    """ Write time stored in MODIFIED_FIELD (UTC) """
+    return datetime.now(timezone.utc)
+
+def with_modified(new_values):
+    """ Adds the MODIFIED_FIELD write time to an update document ({'$set': ...} etc.) """
+    stamped = dict(new_values)
+    stamped['$set'] = {MODIFIED_FIELD: modified_now(), **stamped.get('$set', {})}
+    return stamped
+
+def changing(query, new_values):
+    """ Restricts an update query to the documents new_values actually changes, so the write time """
+    """ (with_modified()) never turns an update that changes nothing into a modification """
+    """ $set changes documents with a different value, $unset documents having the field; """
+    """ the other operators ($inc, $push, ...) may change every matching document """
+    conditions = []
+    for operator, fields in new_values.items():
+        if operator == '$set':
+            conditions += [{'$expr': {'$ne': [f'${field}', {'$literal': value}]}} for field, value in fields.items()]
+        elif operator == '$unset':
+            conditions += [{field: {'$exists': True}} for field in fields]
+        else:
+            return query
+    return {'$and': [query, {'$or': conditions}]} if conditions else query
+
+def rollup_pipelines(match):
+    """ Aggregation pipelines counting documents per outcome day, outcome type and animal type """
+    """ Input: match - filter of the documents counted ({'_id': {'$in': ids}}, {} for all) """
+    """ Returns: dictionary rollup field -> pipeline ('count' for every document, one per profile) """
+    # Outcome dates are strings in the AAC export ('2016-05-01 14:26:00'): the day is their prefix
+    day = {"$substrCP": ["$datetime", 0, ROLLUP_PERIODS['day']]}
+    dated = {"datetime": {"$type": "string"}} # Documents without a date are not counted
+    group = {"$group": {"_id": {"day": day, **{field: f"${field}" for field in ROLLUP_GROUPS}},
+                        "n": {"$sum": 1}}}
+    return {field: [{"$match": {"$and": [match, dated, criteria]}}, group]
+            for field, criteria in [('count', {})] + list(RESCUE_PROFILES.items())}
+
+def rollup_facet_pipeline(match):
+    """ Single aggregation running every rollup_pipelines() pipeline on the matched documents """
+    """ Returns: pipeline whose only result maps every rollup field to its groups """
+    return [{"$match": match}, {"$facet": rollup_pipelines({})}]
+
+def matches_criteria(document, criteria):
+    """ Evaluates simple query criteria (such as RESCUE_PROFILES) on a document in memory """
+    """ Supports equality (array fields match an element), $in, $nin and $gt/$gte/$lt/$lte """
+    """ between numbers """
+    """ Returns: True or False, None when the criteria use anything else """
+    comparisons = {'$gt': lambda a, b: a > b, '$gte': lambda a, b: a >= b,
+                   '$lt': lambda a, b: a < b, '$lte': lambda a, b: a <= b}
+    is_number = lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+    for field, condition in criteria.items():
+        if field.startswith('$') or '.' in field:
+            return None
+        value = document.get(field)
+        values = value if isinstance(value, list) else [value]
+        if not isinstance(condition, dict):   # Equality
+            if isinstance(condition, (list, bool)) or condition is None:
+                return None
+            if condition not in [item for item in values if not isinstance(item, bool)]:
+                return False
+            continue
+        for operator, operand in condition.items():
+            if operator in comparisons and is_number(operand):
+                if not any(is_number(item) and comparisons[operator](item, operand) for item in values):
+                    return False
+            elif operator in ('$in', '$nin') and all(isinstance(item, str) for item in operand):
+                found = any(item in operand for item in values if isinstance(item, str))
+                if found != (operator == '$in'):
+                    return False
+            else:
+                return None
+    return True
+
+def rollup_groups(documents):
+    """ Groups of rollup_pipelines() computed in memory for documents in hand (e.g. just inserted) """
+    """ Returns: dictionary rollup field -> groups, None when a profile cannot be evaluated """
+    groups = {field: {} for field in ['count'] + list(RESCUE_PROFILES)}
+    for document in documents:
+        if not isinstance(document.get('datetime'), str): # Documents without a date are not counted
+            continue
+        key = {'day': document['datetime'][:ROLLUP_PERIODS['day']],
+               **{field: document[field] for field in ROLLUP_GROUPS if field in document}}
+        fields = ['count']
+        for profile, criteria in RESCUE_PROFILES.items():
+            matched = matches_criteria(document, criteria)
+            if matched is None:
+                return None
+            if matched:
+                fields.append(profile)
+        for field in fields:
+            row = groups[field].setdefault(repr(sorted(key.items())), {'_id': key, 'n': 0})
+            row['n'] += 1
+    return {field: list(rows.values()) for field, rows in groups.items()}
+
+def rollup_updates(groups, sign=1):
+    """ Upserts adding (sign=1) or removing (sign=-1) grouped counts to the day and month rollups """
+    """ Input: groups - dictionary rollup field -> results of its rollup_pipelines() pipeline """
+    """                 (or of rollup_facet_pipeline(), or rollup_groups()) """
+    """ Returns: list of UpdateOne operations, one per rollup document """
+    increments = {}
+    for field, rows in groups.items():
+        for row in rows:
+            key = row['_id']
+            day = key.get('day')
+            if not isinstance(day, str) or len(day) < ROLLUP_PERIODS['day']: # Not a date
+                continue
+            for period, length in ROLLUP_PERIODS.items(): # Every day also counts in its month
+                bucket = day[:length]
+                values = [key.get(group) for group in ROLLUP_GROUPS]
+                _id = '|'.join([period, bucket] + [str(value) for value in values])
+                keys, counts = increments.setdefault(_id, (
+                    {'period': period, 'bucket': bucket, **dict(zip(ROLLUP_GROUPS, values))}, {}))
+                counts[field] = counts.get(field, 0) + sign * row['n']
+    return [UpdateOne({'_id': _id}, {'$setOnInsert': keys, '$inc': counts}, upsert=True)
+            for _id, (keys, counts) in increments.items()]
+
+def geo_within_radius(lat, lng, radius_km):
+    """ Filter on animals located within radius_km of a point ($geoWithin, no sorting) """
+    return {LOCATION_FIELD: {"$geoWithin": {
+        "$centerSphere": [[lng, lat], radius_km / EARTH_RADIUS_KM]}}}
+
+def geo_within_bounds(bounds):
+    """ Filter on animals inside map bounds [[south, west], [north, east]] """
+    """ Returns: {} when the bounds cover (almost) the whole world """
+    (south, west), (north, east) = bounds
+    if east - west >= 180 or north - south >= 170: # Too large for a single geodesic polygon
+        return {}
+    south, north = max(south, -89.9), min(north, 89.9)
+    ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+    return {LOCATION_FIELD: {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}}
+
+def geo_near(lat, lng, max_distance_km=None):
+    """ Filter returning animals nearest first ($nearSphere, optionally within a distance) """
+    near = {"$geometry": {"type": "Point", "coordinates": [lng, lat]}}
+    if max_distance_km is not None:
+        near["$maxDistance"] = max_distance_km * 1000 # meters
+    return {LOCATION_FIELD: {"$nearSphere": near}}
+
+def with_geo_filter(query, geo_filter):
+    """ Combines a query (e.g. a rescue profile) with a geospatial filter """
+    if not geo_filter:
+        return query
+    if LOCATION_FIELD in query:              # Both constrain the location: require both
+        return {"$and": [query, geo_filter]}
+    return {**query, **geo_filter}           # Top level so $nearSphere stays valid
+
+def batches(iterable, size=ID_BATCH_SIZE):
+    """ Yields lists of up to size items of an iterable (e.g. the _id values of a cursor) """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def detached(result):
+    """ Copy of a cached result that the caller may modify (new lists and top-level documents, """
+    """ nested values are still shared with the cache) """
+    if isinstance(result, list):
+        return [dict(item) if isinstance(item, dict) else item for item in result]
+    if isinstance(result, tuple):         # read_page(): (documents, total)
+        return tuple(detached(item) for item in result)
+    return result
+
+# BSON types in the order MongoDB sorts them ($type aliases, null also stands for missing fields)
+# Range operators only compare values of the same type, so keyset pages add one clause per type
+# (timestamps and regular expressions sort after dates but never occur in the AAC data)
+SORT_TYPE_ORDER = ['null', 'number', 'string', 'object', 'array', 'binData', 'objectId', 'bool', 'date']
+
+def sort_type(value):
+    """ Returns the SORT_TYPE_ORDER type of a sort key value, None if keyset pages cannot resume after it """
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):           # Before int: True/False are ints in Python
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, ObjectId):
+        return 'objectId'
+    if isinstance(value, datetime):
+        return 'date'
+    return None                           # Arrays/objects sort by element, pages fall back to skip
+
+# Suitability score of the rescue candidates (each part between 0 and 1, weighted average)
+SCORE_WEIGHTS = {'age': 0.35,      # Closeness to the middle of the profile's age window
+                 'breed': 0.25,    # Purebred > cross (/) > mix of a profile breed
+                 'recency': 0.2,   # Recent outcomes first (animal more likely still reachable)
+                 'location': 0.2}  # Closeness to the rescue team (only when a location is given)
+RECENCY_HALF_LIFE_DAYS = 365       # Recency part halves every year since the outcome
+LOCATION_SCALE_KM = 25             # Location part is 0.5 at this distance
+LOCATION_NEUTRAL = 0.5             # Location part of animals without coordinates (as at LOCATION_SCALE_KM)
+
+def distance_expression(lat, lng):
+    """ Aggregation expression of the great-circle distance in km from (lat, lng) to the """
+    """ location field (haversine, missing when the document has no location) """
+    coordinates = f"${LOCATION_FIELD}.coordinates" # [lng, lat]
+    half_sin = lambda field, origin: {"$sin": {"$divide": [{"$subtract": [field, math.radians(origin)]}, 2]}}
+    haversine = {"$add": [
+        {"$pow": [half_sin("$$lat", lat), 2]},
+        {"$multiply": [math.cos(math.radians(lat)), {"$cos": "$$lat"}, {"$pow": [half_sin("$$lng", lng), 2]}]}]}
+    return {"$cond": [{"$isArray": [coordinates]}, {"$let": {
+        "vars": {"lng": {"$degreesToRadians": {"$arrayElemAt": [coordinates, 0]}},
+                 "lat": {"$degreesToRadians": {"$arrayElemAt": [coordinates, 1]}}},
+        "in": {"$multiply": [2 * EARTH_RADIUS_KM, {"$asin": {"$min": [1, {"$sqrt": haversine}]}}]}}},
+        "$$REMOVE"]}
+
+def rescue_score_pipeline(query, top_k=10, center=None, today=None, projection=None):
+    """ Aggregation pipeline returning the top_k best scored documents matching a rescue query """
+    """ Input: query      - rescue profile criteria (e.g. RESCUE_PROFILES['water']), the """
+    """                     index-supported pre-filter of the pipeline """
+    """        top_k      - number of ranked candidates returned """
+    """        center     - (lat, lng) of the rescue team, adds the location part (distance_km, """
+    """                     LOCATION_NEUTRAL for animals without a location) """
+    """        today      - reference date of the recency part (default: today, UTC) """
+    """        projection - list of fields returned with the score (None returns every field) """
+    """ Returns: list of stages; documents get 'score' (0 to 100) and 'score_parts' """
+    today = today or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    weights = {part: weight for part, weight in SCORE_WEIGHTS.items() if part != 'location' or center}
+
+    # Candidates of the profile through rescue_profile_idx, with or without a location
+    # (a $geoNear first stage would skip that index and every animal without coordinates)
+    stages = [{"$match": query}]
+    if center: # Distance computed per candidate, only the candidates of the profile are measured
+        stages.append({"$set": {"distance_km": distance_expression(*center)}})
+
+    # Age: 1 in the middle of the window, 0 at its edges (1 when the profile has no window)
+    window = query.get('age_upon_outcome_in_weeks', {}) if isinstance(query, dict) else {}
+    if isinstance(window, dict) and '$gte' in window and '$lte' in window:
+        middle, half = (window['$gte'] + window['$lte']) / 2, max((window['$lte'] - window['$gte']) / 2, 1)
+        age = {"$max": [0, {"$subtract": [1, {"$divide": [
+            {"$abs": {"$subtract": [{"$ifNull": ["$age_upon_outcome_in_weeks", middle + half]}, middle]}},
+            half]}]}]}
+    else:
+        age = 1
+    # Breed: purebred 1, cross of two breeds 0.75, mix 0.5
+    breed_text = {"$toLower": {"$ifNull": ["$breed", ""]}}
+    breed = {"$switch": {"branches": [
+        {"case": {"$regexMatch": {"input": breed_text, "regex": "mix"}}, "then": 0.5},
+        {"case": {"$regexMatch": {"input": breed_text, "regex": "/"}}, "then": 0.75}],
+        "default": 1}}
+    # Recency: halves every RECENCY_HALF_LIFE_DAYS since the outcome date (0 when unknown)
+    outcome = {"$dateFromString": {"dateString": "$datetime", "onError": None, "onNull": None}}
+    days = {"$divide": [{"$subtract": [today, outcome]}, 86400000]}
+    recency = {"$cond": [{"$eq": [outcome, None]}, 0,
+                         {"$pow": [0.5, {"$divide": [{"$max": [days, 0]}, RECENCY_HALF_LIFE_DAYS]}]}]}
+    parts = {'age': age, 'breed': breed, 'recency': recency}
+    if center:
+        parts['location'] = {"$ifNull": [ # Missing distance: neutral part
+            {"$divide": [LOCATION_SCALE_KM, {"$add": [LOCATION_SCALE_KM, "$distance_km"]}]}, LOCATION_NEUTRAL]}
+
+    total = sum(weights.values())
+    stages += [
+        {"$set": {"score_parts": {part: {"$round": [expression, 3]} for part, expression in parts.items()}}},
+        {"$set": {"score": {"$round": [{"$multiply": [100 / total, {"$add": [
+            {"$multiply": [weight, f"$score_parts.{part}"]} for part, weight in weights.items()]}]}, 1]}}},
+        {"$sort": {"score": -1, "_id": 1}}, # Top-k sort: only top_k documents are kept in memory
+        {"$limit": top_k},
+    ]
+    if projection is not None:
+        fields = list(projection) + ['score', 'score_parts'] + (['distance_km'] if center else [])
+        stages.append({"$project": dict.fromkeys(fields, 1)})
+    return stages
+
+HLL_PRECISION = 10 # HyperLogLog uses 2^10 registers (about 3% standard error)
+UNKNOWN_OPERATOR_CODES = {168, 15999} # InvalidPipelineOperator (and its code before MongoDB 4.0)
+
+def estimate_cardinality(registers, precision=HLL_PRECISION):
+    """ HyperLogLog estimate of the number of distinct values """
+    """ Input: registers - dictionary register index -> maximum rank observed """
+    """ Returns: estimated distinct count (int) """
+    m = 2 ** precision
+    alpha = 0.7213 / (1 + 1.079 / m)
+    # Registers never hit keep rank 0 and contribute 2^0 = 1 to the harmonic sum
+    harmonic = sum(2.0 ** -rank for rank in registers.values()) + (m - len(registers))
+    estimate = alpha * m * m / harmonic
+    empty = m - len(registers)
+    if estimate <= 2.5 * m and empty > 0: # Small range correction (linear counting)
+        estimate = m * math.log(m / empty)
+    return int(round(estimate))
+
+def query_shape(value):
+    """ Structure of a query with the values replaced by placeholders """
+    """ e.g. {'age': {'$gte': 26}} and {'age': {'$gte': 52}} both give {'age': {'$gte': '?'}} """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value): # $and/$or sub-queries
+            return [query_shape(item) for item in value]
+        return ['?']                                                 # $in/$nin value lists
+    return '?'
+
+def plan_summary(explain):
+    """ Summarizes the output of the explain command (queryPlanner + executionStats) """
+    """ Returns: dictionary with the winning plan stages, indexes used, collection scan / """
+    """          in-memory sort flags and the documents examined/returned """
+    winning = explain.get('queryPlanner', {}).get('winningPlan', {})
+    winning = winning.get('queryPlan', winning) # Slot-based engine wraps the classic plan
+    stages, indexes = [], []
+    pending = [winning]
+    while pending:                              # Walk the plan tree from the root stage
+        stage = pending.pop(0)
+        if not isinstance(stage, dict) or 'stage' not in stage:
+            continue
+        stages.append(stage['stage'])
+        if 'indexName' in stage:
+            indexes.append(stage['indexName'])
+        pending += ([stage['inputStage']] if 'inputStage' in stage else []) + stage.get('inputStages', [])
+    stats = explain.get('executionStats', {})
+    return {'stages': stages,
+            'indexes': indexes,
+            'collscan': 'COLLSCAN' in stages,
+            'in_memory_sort': 'SORT' in stages,           # Sorted in memory, not by an index
+            'docs_examined': stats.get('totalDocsExamined', 0),
+            'keys_examined': stats.get('totalKeysExamined', 0),
+            'returned': stats.get('nReturned', 0),
+            'millis': stats.get('executionTimeMillis', 0)}
 
 class AnimalShelter:
     """ CRUD operations for the Animal collection in MongoDB """
     """ This class provides CRUD functionalities (Create, Read, Update, Delete) """
 
-    def __init__(self, username='aacuser', password='NoSQLNoParty'):
-        """ Initializes the connection to MongoDB """        
+    def __init__(self, username='aacuser', password='NoSQLNoParty', cache_size=128, cache_ttl=300,
+                 max_pool_size=100, min_pool_size=0, cache=None,
+                 uri=None, client=None, database='aac', collection='animals', event_listeners=None,
+                 auto_explain=False):
+        """ Initializes the connection settings to MongoDB """        
+        """ cache_size/cache_ttl -> number of cached query results and their lifetime in seconds """
+        """ max_pool_size/min_pool_size -> connection pool size of each process """
+        """ cache -> shared result cache (e.g. DiskQueryCache for multi-process servers) """
+        """ uri -> connection string replacing the default server and credentials """
+        """ client -> existing client to use instead (e.g. an in-process stand-in for benchmarks) """
+        """ database/collection -> names of the database and collection to use """
+        """ event_listeners -> PyMongo monitoring listeners (e.g. the CommandMetrics instrumentation) """
+        """ auto_explain -> explain every new query shape once and warn about unindexed plans """
+        """ The MongoClient is created on first use in each process, so an AnimalShelter """
+        """ created before a fork (e.g. by a pre-loading WSGI server) is safe in every worker """
         
         USER = username    # MongoDB username
         PASS = password    # MongoDB password
         HOST = 'localhost' # hostname of the MongoDB server
         PORT = 27017       # port number of the MongoDB server
-        DB   = 'aac'       # database name
-        COL  = 'animals'   # collection name
+        DB   = database    # database name
+        COL  = collection  # collection name
         
-        try:
-            self.client     = MongoClient(f'mongodb://{USER}:{PASS}@{HOST}:{PORT}')
-            self.database   = self.client[DB]
-            self.collection = self.database[COL]
-            print("Connection to MongoDB established successfully")
-        except Exception as e:
-            print(f"Error connecting to MongoDB: {e}")
+        self.uri             = uri or f'mongodb://{USER}:{PASS}@{HOST}:{PORT}'
+        self.client_options  = {'maxPoolSize': max_pool_size, 'minPoolSize': min_pool_size,
+                                'event_listeners': event_listeners or []}
+        self.database_name   = DB
+        self.collection_name = COL
+        self.injected_client = client # Used as-is in every process when given
+        self.process_client  = None # MongoClient of the current process
+        self.process_id      = None # Process that created process_client
+        self.page_keys  = {} # Keyset boundaries of pages already served by read_page()
+        self.cache      = cache if cache is not None else QueryCache(cache_size, cache_ttl) # Results of read operations
+        self.flights    = SingleFlight() # Identical concurrent queries run only once
+        self.auto_explain = auto_explain
+        self.plans      = {} # Query shape -> plan summary (auto-explain)
+        self.parent     = None # AnimalShelter whose client a view reader uses
+        self.views      = {}   # Rescue profile -> AnimalShelter reading its materialized view
+
+    @property
+    def client(self):
+        """ MongoClient of the current process (a new one is created after a fork) """
+        if self.injected_client is not None:
+            return self.injected_client
+        if self.parent is not None: # View readers share the connection pool of their parent
+            return self.parent.client
+        if self.process_client is None or self.process_id != os.getpid():
+            try:
+                self.process_client = MongoClient(self.uri, **self.client_options)
+                self.process_id     = os.getpid()
+                self.flights        = SingleFlight() # Locks are not shared with the parent
+                print("Connection to MongoDB established successfully")
+            except Exception as e:
+                print(f"Error connecting to MongoDB: {e}")
+                raise
+        return self.process_client
+
+    @property
+    def database(self):
+        """ The database (default 'aac') of the current process client """
+        return self.client[self.database_name]
+
+    @property
+    def collection(self):
+        """ The collection (default 'animals') of the current process client """
+        return self.database[self.collection_name]
 
     def create(self, data):
         """ Inserts a document into the MongoDB collection """
@@ -35,10 +539,15 @@ class AnimalShelter:
 
         try: # Validate input data
             if data is not None and isinstance(data, dict):
+                # Add the derived fields (rescue tags, location) used by the indexed queries
+                data.update(derived_fields(data))
+                data[MODIFIED_FIELD] = modified_now() # Picked up by the next view refresh
                 # Insert the document into the animals collection
                 result = self.collection.insert_one(data)
                 # Check if insertion was successful by verifying inserted_id exists
                 if result.inserted_id:
+                    self.update_rollups([result.inserted_id], 1, [data]) # Counted in the outcome trends
+                    self.invalidate()      # Cached results are no longer valid
                     print(f"Document inserted successfully with ID: {result.inserted_id}")
                     return True
                 else:
@@ -50,24 +559,378 @@ class AnimalShelter:
             print(f"Error occurred during create operation: {e}")
             return False
 
-    def read(self, query):
+    def create_many(self, documents, batch_size=1000):
+        """ Inserts many documents in batches of unordered inserts """
+        """ Input: documents  - iterable of dictionaries (consumed lazily, e.g. a file reader) """
+        """        batch_size - number of documents sent per insert_many() round trip """
+        """ Returns: dictionary with 'inserted' and 'failed' counts and the per-batch 'errors' """
+
+        summary = {'inserted': 0, 'failed': 0, 'errors': []}
+        documents = iter(documents)
+        batch_number = 0
+        while True:
+            batch = list(islice(documents, batch_size)) # Only one batch is held in memory
+            if not batch:
+                break
+            batch_number += 1
+
+            # Validate input data, invalid entries are reported and skipped
+            valid = [data for data in batch if isinstance(data, dict) and data]
+            failed, messages = len(batch) - len(valid), []
+            if failed:
+                messages.append(f"{failed} entries are empty or not dictionaries")
+
+            modified = modified_now()
+            for data in valid: # Add the derived fields used by the indexed queries
+                data.update(derived_fields(data))
+                data[MODIFIED_FIELD] = modified
+            try: # Unordered: one bad document does not stop the rest of the batch
+                inserted = len(self.collection.insert_many(valid, ordered=False).inserted_ids) if valid else 0
+                inserted_documents = valid
+            except BulkWriteError as e: # Some documents of the batch were rejected
+                inserted = e.details.get('nInserted', 0)
+                failed += len(valid) - inserted
+                messages += [error.get('errmsg', '') for error in e.details.get('writeErrors', [])[:5]]
+                rejected = {error.get('index') for error in e.details.get('writeErrors', [])}
+                inserted_documents = [data for i, data in enumerate(valid) if i not in rejected]
+            except Exception as e:      # Whole batch failed (e.g. connection lost), keep loading
+                inserted = 0
+                failed += len(valid)
+                messages.append(str(e))
+                inserted_documents = []
+            self.update_rollups([data['_id'] for data in inserted_documents], 1, inserted_documents) # Outcome trends
+
+            summary['inserted'] += inserted
+            summary['failed'] += failed
+            if failed:
+                summary['errors'].append({'batch': batch_number, 'failed': failed, 'messages': messages})
+                print(f"Batch {batch_number}: {inserted} inserted, {failed} failed ({messages[0]})")
+            else:
+                print(f"Batch {batch_number}: {inserted} documents inserted")
+
+        if summary['inserted']: # Cached results are no longer valid
+            self.invalidate()
+        return summary
+
+    def read(self, query, projection=None):
         """ Query documents from the MongoDB collection """
-        """ Input: query - dictionary with key/value pairs for filtering """
+        """ Input: query      - dictionary with key/value pairs for filtering """
+        """        projection - list of field names or projection dictionary (None returns all) """
         """ Returns: list of documents if successful, empty list otherwise """
 
         try: # Validate input query
             if query is not None and isinstance(query, dict):
-                # Query the database using find() method
-                cursor = self.collection.find(query)
-                # Convert cursor to list and return
-                result = list(cursor)
-                return result
+                if isinstance(projection, (list, tuple)): # Field list -> projection dictionary
+                    projection = dict.fromkeys(projection, 1)
+                # Query the database using find() method and convert cursor to list
+                # (served from the cache when the same query ran recently)
+                self.check_plan(query)
+                return self.cached('read', [query, projection],
+                                   lambda: list(self.collection.find(query, projection)))
             else:
                 raise Exception("Query parameter is empty or not a dictionary")
         except Exception as e:
             print(f"Error occurred during read operation: {e}")
             return []
 
+    def read_iter(self, query, projection=None, sort=None, limit=0,
+                  batch_size=None, max_time_ms=None, chunk_size=None, strict=False):
+        """ Streams documents from the MongoDB collection as the cursor delivers them """
+        """ Input: query       - dictionary with key/value pairs for filtering """
+        """        projection  - list of field names or projection dictionary (None returns all) """
+        """        sort        - list of (field, direction) tuples """
+        """        limit       - maximum number of documents (0 means no limit) """
+        """        batch_size  - number of documents fetched per network round trip """
+        """        max_time_ms - server-side time limit for the query in milliseconds """
+        """        chunk_size  - if set, yield lists of up to chunk_size documents """
+        """        strict      - re-raise errors instead of ending the stream early (e.g. exports, """
+        """                      where a truncated result must not look complete) """
+        """ Yields: one document at a time (or lists of documents when chunk_size is set) """
+
+        try: # Validate input query
+            if query is not None and isinstance(query, dict):
+                if isinstance(projection, (list, tuple)): # Field list -> projection dictionary
+                    projection = dict.fromkeys(projection, 1)
+                # Build the cursor lazily, nothing is fetched until iteration starts
+                self.check_plan(query, sort, limit)
+                cursor = self.collection.find(query, projection, limit=limit)
+                if sort:
+                    cursor = cursor.sort(sort)
+                if batch_size:
+                    cursor = cursor.batch_size(batch_size)
+                if max_time_ms:
+                    cursor = cursor.max_time_ms(max_time_ms)
+
+                if not chunk_size: # Yield documents one by one
+                    yield from cursor
+                    return
+                chunk = []          # Yield fixed-size lists of documents
+                for document in cursor:
+                    chunk.append(document)
+                    if len(chunk) == chunk_size:
+                        yield chunk
+                        chunk = []
+                if chunk:           # Last, partially filled chunk
+                    yield chunk
+            else:
+                raise Exception("Query parameter is empty or not a dictionary")
+        except Exception as e:
+            print(f"Error occurred during streaming read operation: {e}")
+            if strict:
+                raise
+
+    def read_page(self, query, projection=None, sort=None, page=0, page_size=10):
+        """ Query a single page of documents from the MongoDB collection """
+        """ Input: query      - dictionary with key/value pairs for filtering """
+        """        projection - list of field names to return (None returns every field) """
+        """        sort       - list of (field, direction) tuples, e.g. [('name', ASCENDING)] """
+        """        page       - zero-based page number """
+        """        page_size  - number of documents per page """
+        """ Returns: (list of documents, total matching documents), ([], 0) otherwise """
+
+        try: # Validate input query
+            if query is not None and isinstance(query, dict):
+                # Append _id as final sort key so every document has a unique position
+                sort = [(f, d) for f, d in (sort or []) if f != '_id'] + [('_id', ASCENDING)]
+                # Sort keys must be returned too, they are needed to resume the next page
+                if projection is not None:
+                    projection = dict.fromkeys(list(projection) + [f for f, _ in sort], 1)
+
+                self.check_plan(query, sort, page_size)
+
+                def load(): # Runs only when the page is not cached
+                    # Total number of matches for the pager (metadata count when unfiltered)
+                    if query:
+                        total = self.collection.count_documents(query)
+                    else:
+                        total = self.collection.estimated_document_count()
+
+                    # Boundaries (last sort key) of the pages already served for this query/sort
+                    if len(self.page_keys) > 100:   # Keep the boundary store bounded
+                        self.page_keys.clear()
+                    # (keyed by cache generation: writes from any process make them obsolete)
+                    boundaries = self.page_keys.setdefault(
+                        (self.cache.generation, repr(query), repr(sort), page_size), {})
+
+                    # Resume after the closest known boundary instead of skipping from the start
+                    previous = [p for p in boundaries if p < page]
+                    if previous:
+                        start = max(previous)
+                        keyset = self.keyset_filter(sort, boundaries[start])
+                        find_query = {"$and": [query, keyset]} if query else keyset
+                        skip = (page - start - 1) * page_size
+                    else:
+                        find_query = query
+                        skip = page * page_size
+
+                    cursor = self.collection.find(find_query, projection)
+                    result = list(cursor.sort(sort).skip(skip).limit(page_size))
+
+                    # Remember where this page ends (keys of unsupported types resume by skipping)
+                    if len(result) == page_size:
+                        last_key = [result[-1].get(f) for f, _ in sort]
+                        if all(sort_type(value) is not None for value in last_key):
+                            boundaries[page] = last_key
+                    return result, total
+
+                return self.cached('read_page', [query, projection, sort, page, page_size], load)
+            else:
+                raise Exception("Query parameter is empty or not a dictionary")
+        except Exception as e:
+            print(f"Error occurred during paged read operation: {e}")
+            return [], 0
+
+    def cached(self, operation, arguments, loader):
+        """ Returns the cached result of an operation, running loader() on a miss """
+        """ Concurrent misses on the same key wait for a single execution of loader() """
+        """ Input: operation - name of the read operation """
+        """        arguments - query and options identifying the result """
+        """        loader    - function executing the query (errors are not cached) """
+        """ Every caller gets its own copy (see detached()), the cached value is never modified """
+        key = make_key(operation, self.collection.name, arguments)
+        found, result = self.cache.get(key)
+        if found:
+            return detached(result)
+
+        generation = self.cache.generation # Results started before a write are not shared
+        def load_and_store():
+            result = loader()
+            self.cache.set(key, result, generation)
+            return result
+        return detached(self.flights.do((generation, key), load_and_store))
+
+    def invalidate(self):
+        """ Drops cached results and page boundaries after the collection changed """
+        self.page_keys.clear()
+        self.cache.clear()
+
+    @staticmethod
+    def keyset_filter(sort, last_key):
+        """ Builds the filter matching documents that sort after a given key """
+        """ Input: sort     - list of (field, direction) tuples """
+        """        last_key - list of values of the sort fields for the last document """
+        """                   (every sort_type() must be known, see read_page()) """
+        """ Returns: dictionary with an $or of the keyset conditions """
+
+        clauses = []
+        for i, (field, direction) in enumerate(sort):
+            # Equal on every previous sort field (None also matches missing fields, they sort together)
+            prefix = {f: value for (f, _), value in zip(sort[:i], last_key[:i])}
+            value = last_key[i]
+            rank = SORT_TYPE_ORDER.index(sort_type(value))
+            conditions = []
+            if value is not None: # Strictly after on this field among values of the same type
+                conditions.append({"$gt" if direction == ASCENDING else "$lt": value})
+            if direction == ASCENDING:  # Then every type sorting after it
+                conditions += [{"$type": kind} for kind in SORT_TYPE_ORDER[rank + 1:]]
+            elif rank > 0:              # Descending: every type sorting before it, null/missing last
+                conditions += [{"$type": kind} for kind in SORT_TYPE_ORDER[1:rank]] + [None]
+            clauses += [{**prefix, field: condition} for condition in conditions]
+        if not clauses: # Nothing sorts after the key (e.g. last null of a descending sort)
+            return {"_id": {"$in": []}}
+        return {"$or": clauses}
+
+    def aggregate(self, pipeline, allow_disk_use=False, max_time_ms=None, use_cache=True):
+        """ Runs an aggregation pipeline on the MongoDB collection """
+        """ Input: pipeline       - list of aggregation stages """
+        """        allow_disk_use - let large $group/$sort stages spill to disk """
+        """        max_time_ms    - server-side time limit in milliseconds """
+        """        use_cache      - False always runs the pipeline (fresh result) """
+        """ Returns: list of result documents if successful, empty list otherwise """
+
+        try: # Validate input pipeline
+            if pipeline is not None and isinstance(pipeline, list):
+                options = {"allowDiskUse": allow_disk_use}
+                if max_time_ms:
+                    options["maxTimeMS"] = max_time_ms
+                # Execute the pipeline on the server, only its results are transferred
+                if not use_cache:
+                    return list(self.collection.aggregate(pipeline, **options))
+                return self.cached('aggregate', [pipeline],
+                                   lambda: list(self.collection.aggregate(pipeline, **options)))
+            else:
+                raise Exception("Pipeline parameter is empty or not a list")
+        except Exception as e:
+            print(f"Error occurred during aggregate operation: {e}")
+            return []
+
+    def top_candidates(self, query, top_k=10, center=None, projection=None):
+        """ Ranked rescue candidates (see rescue_score_pipeline()), computed inside MongoDB """
+        """ Input: query      - rescue profile criteria """
+        """        top_k      - number of candidates returned """
+        """        center     - (lat, lng) of the rescue team, None ignores the location """
+        """        projection - list of fields returned with the score (None returns every field) """
+        """ Returns: list of documents, best first, each with 'score' and 'score_parts' """
+        """ Recency is measured from the newest outcome of the candidates (historical exports) """
+        newest = self.aggregate([{"$match": query}, {"$group": {"_id": None, "newest": {"$max": "$datetime"}}}])
+        today = None
+        if newest and isinstance(newest[0].get('newest'), str):
+            try:
+                today = datetime.fromisoformat(newest[0]['newest'][:10]).replace(tzinfo=timezone.utc)
+            except ValueError:
+                pass
+        return self.aggregate(rescue_score_pipeline(query, top_k, center, today, projection))
+
+    def read_near(self, query, lat, lng, max_distance_km=None, projection=None, limit=0):
+        """ Query documents nearest to a point, combined with a filtering query """
+        """ Input: query           - dictionary with key/value pairs (e.g. a rescue profile) """
+        """        lat, lng        - coordinates of the reference point """
+        """        max_distance_km - optional search radius in kilometers """
+        """        projection      - list of field names to return (None returns every field) """
+        """        limit           - maximum number of documents (0 means no limit) """
+        """ Returns: list of documents sorted by distance, empty list otherwise """
+
+        try: # Validate input query
+            if query is not None and isinstance(query, dict):
+                near_query = with_geo_filter(query, geo_near(lat, lng, max_distance_km))
+                if isinstance(projection, (list, tuple)):
+                    projection = dict.fromkeys(projection, 1)
+                return self.cached('read_near', [near_query, projection, limit],
+                                   lambda: list(self.collection.find(near_query, projection, limit=limit)))
+            else:
+                raise Exception("Query parameter is empty or not a dictionary")
+        except Exception as e:
+            print(f"Error occurred during geospatial read operation: {e}")
+            return []
+
+    def sample_fields(self, sample_size=1000):
+        """ Lists the field names found in a random sample of documents """
+        """ Input: sample_size - number of documents to sample """
+        """ Returns: list of field names in first-seen order, empty list otherwise """
+
+        pipeline = [
+            {"$sample": {"size": sample_size}},                        # Random documents
+            {"$project": {"fields": {"$objectToArray": "$$ROOT"}}},     # [{k, v}, ...]
+            {"$unwind": {"path": "$fields", "includeArrayIndex": "position"}},
+            {"$group": {"_id": "$fields.k", "position": {"$min": "$position"}}},
+            {"$sort": {"position": 1, "_id": 1}}                        # Document order
+        ]
+        return [row['_id'] for row in self.aggregate(pipeline)]
+
+    def field_cardinality(self, fields, sketch_fields=(), sample_count=5):
+        """ Counts the distinct non-null values of each field inside MongoDB """
+        """ Input: fields        - list of field names to analyze """
+        """        sketch_fields - high-cardinality fields counted approximately (HyperLogLog) """
+        """        sample_count  - number of sample values returned per field """
+        """ Returns: dictionary field -> {'count', 'approximate', 'sample'}, empty dict otherwise """
+
+        registers = 2 ** HLL_PRECISION
+        rank_bits = 63 - HLL_PRECISION     # Bits of the 64-bit hash left after the register index
+        facets = {}
+        for i, field in enumerate(fields): # Facet names are positional (field names may contain '.')
+            present = {"$match": {field: {"$ne": None}}}
+            if field in sketch_fields:
+                # HyperLogLog: hash each value, keep the highest rank per register (bounded memory)
+                hashed = {"$toHashedIndexKey": f"${field}"}
+                facets[f"hll{i}"] = [
+                    present,
+                    {"$project": {"register": {"$abs": {"$mod": [hashed, registers]}},
+                                  "rest": {"$floor": {"$abs": {"$divide": [hashed, registers]}}}}},
+                    {"$group": {"_id": "$register", "rank": {"$max": {"$cond": [
+                        {"$gte": ["$rest", 1]},
+                        {"$subtract": [rank_bits, {"$floor": {"$log": ["$rest", 2]}}]},
+                        rank_bits + 1]}}}}
+                ]
+            else:
+                # Exact count of the distinct values (only the count leaves the facet)
+                facets[f"exact{i}"] = [present, {"$group": {"_id": f"${field}"}}, {"$count": "count"}]
+            # A few sample values from the first matching documents (bounded, whatever the cardinality)
+            facets[f"sample{i}"] = [present, {"$limit": 100},
+                                    {"$group": {"_id": f"${field}"}}, {"$limit": sample_count}]
+
+        pipeline = [{"$project": dict.fromkeys(fields, 1)}, {"$facet": facets}]
+        try: # Not through aggregate(): the reason of a failure decides the fallback
+            result = list(self.collection.aggregate(pipeline, allowDiskUse=True))
+        except OperationFailure as e:
+            if sketch_fields and e.code in UNKNOWN_OPERATOR_CODES: # $toHashedIndexKey needs MongoDB 7.0
+                print("Approximate counting unavailable on this server, falling back to exact counts")
+                return self.field_cardinality(fields, (), sample_count)
+            print(f"Error occurred during cardinality analysis: {e}")
+            return {}
+        except Exception as e:
+            print(f"Error occurred during cardinality analysis: {e}")
+            return {}
+        if not result:
+            return {}
+
+        summary = {}
+        for i, field in enumerate(fields):
+            if field in sketch_fields:
+                ranks = {row['_id']: row['rank'] for row in result[0][f"hll{i}"]}
+                summary[field] = {
+                    'count': estimate_cardinality(ranks) if ranks else 0,
+                    'approximate': True,
+                    'sample': [row['_id'] for row in result[0][f"sample{i}"]]
+                }
+            else:
+                exact = result[0][f"exact{i}"]
+                summary[field] = {
+                    'count': exact[0]['count'] if exact else 0,
+                    'approximate': False,
+                    'sample': [row['_id'] for row in result[0][f"sample{i}"]]
+                }
+        return summary
+
     def update(self, query, new_values):
         """ Updates document(s) in the MongoDB collection """
         """ Input: query -> key/value lookup pair to filter documents """
@@ -76,10 +939,40 @@ class AnimalShelter:
 
         try: # Validate that both query and new_values parameters are dictionaries
             if isinstance(query, dict) and isinstance(new_values, dict):
-                # Execute update_many to update all documents matching the query
-                result = self.collection.update_many(query, new_values)
+                fields = [field.split('.')[0] for operation in new_values.values()
+                          if isinstance(operation, dict) for field in operation]
+                touched = [field for field in fields if field in DERIVED_SOURCE_FIELDS]
+                counted = [field for field in fields if field in ROLLUP_SOURCE_FIELDS]
+                modified = 0
+                try:
+                    if not (touched or counted):
+                        # Execute update_many to update all documents matching the query
+                        # (with the write time, so the rescue views pick up the change)
+                        modified = self.collection.update_many(changing(query, new_values),
+                                                               with_modified(new_values)).modified_count
+                    else:
+                        # A source of the derived fields or of the outcome rollups changes: update the
+                        # matching documents batch by batch, remembering which ones they are (the query
+                        # may no longer match them afterwards). _id order never returns a document twice.
+                        matching = self.collection.find(query, {'_id': 1}).sort('_id', ASCENDING)
+                        for ids in batches(doc['_id'] for doc in matching):
+                            if counted:    # Outcome trends: old versions out, new versions back in
+                                self.update_rollups(ids, -1)
+                            try:
+                                result = self.collection.update_many(changing({'$and': [query, {'_id': {'$in': ids}}]},
+                                                                              new_values),
+                                                                     with_modified(new_values))
+                                modified += result.modified_count
+                                if result.modified_count and touched: # Recompute the derived fields
+                                    self.collection.update_many({'_id': {'$in': ids}}, derived_fields_pipeline())
+                            finally:
+                                if counted:
+                                    self.update_rollups(ids, 1)
+                finally:
+                    if modified:           # Cached results are no longer valid
+                        self.invalidate()
                 # Return the number of documents that were successfully modified
-                return result.modified_count
+                return modified
             else: # Raise exception if input validation fails
                 raise Exception("Both query and new_values must be dictionaries")
         except Exception as e: # Handle any other exceptions
@@ -93,12 +986,263 @@ class AnimalShelter:
 
         try: # Validate that the query parameter is a dictionary
             if isinstance(query, dict):
-                # Execute delete_many to remove all documents matching the query
-                result = self.collection.delete_many(query)
+                # Deleted documents leave no write time behind: they are deleted batch by batch
+                # (in _id order) so each batch can be removed from the views and rollups too
+                deleted = 0
+                try:
+                    matching = self.collection.find(query, {'_id': 1}).sort('_id', ASCENDING)
+                    for ids in batches(doc['_id'] for doc in matching):
+                        self.update_rollups(ids, -1) # Counted out of the outcome trends while they exist
+                        result = None
+                        try:
+                            # Execute delete_many to remove the matching documents of the batch
+                            result = self.collection.delete_many({'$and': [query, {'_id': {'$in': ids}}]})
+                        finally: # Documents still there (not matching anymore, or a failed delete) are counted back in
+                            if result is None or result.deleted_count < len(ids):
+                                self.update_rollups(ids, 1)
+                        if result.deleted_count:
+                            self.delete_from_views(ids)
+                        deleted += result.deleted_count
+                finally:
+                    if deleted:            # Cached results are no longer valid
+                        self.invalidate()
                 # Return the number of documents that were successfully deleted
-                return result.deleted_count
+                return deleted
             else: # Raise exception if input validation fails
                 raise Exception("Query must be a dictionary")
         except Exception as e: # Handle any other exceptions
             print(f"Error occurred during delete operation: {e}")
-            return 0
\ No newline at end of file
+            return 0
+
+    def backfill_derived_fields(self):
+        """ Recomputes the derived fields (rescue tags, location) of every existing document """
+        """ Return: Number of documents modified """
+
+        try: # The whole backfill runs inside MongoDB, no document is transferred
+            result = self.collection.update_many({}, derived_fields_pipeline())
+            if result.modified_count:  # Cached results are no longer valid
+                self.invalidate()
+            print(f"Derived fields updated on {result.modified_count} documents")
+            return result.modified_count
+        except Exception as e:
+            print(f"Error occurred during backfill operation: {e}")
+            return 0
+
+    def view(self, profile):
+        """ Returns an AnimalShelter reading the materialized view of a rescue profile """
+        """ (same client, cache and settings; writes must go through the main collection) """
+        shelter = self.views.get(profile)
+        if shelter is None:
+            shelter = copy.copy(self)
+            shelter.collection_name = VIEW_COLLECTIONS[profile]
+            shelter.parent, shelter.page_keys, shelter.views = self, {}, {}
+            self.views[profile] = shelter
+        return shelter
+
+    def refresh_views(self, full=False, lag_seconds=VIEW_WATERMARK_LAG):
+        """ Brings the materialized rescue views up to date with $merge """
+        """ Input: full        - rebuild every view from the whole collection """
+        """        lag_seconds - documents modified up to this long before the watermark are """
+        """                      merged again (writes committed late, clocks of other servers) """
+        """ Returns: dictionary profile -> {'documents', 'removed', 'full'}, empty dict on error """
+
+        try:
+            state = self.database[VIEW_STATE_COLLECTION]
+            started = modified_now()                 # Next watermark (set before reading)
+            watermarks = {doc['_id']: doc.get('watermark') for doc in state.find()}
+            self.collection.create_index([(MODIFIED_FIELD, ASCENDING)], name='last_modified_idx')
+            summary = {}
+            updated = False                          # Some view received documents or removals
+            for profile, name in VIEW_COLLECTIONS.items():
+                view = self.database[name]
+                watermark = None if full else watermarks.get(name)
+                if watermark is None:                # First build (or rebuild): whole collection
+                    changed = {}
+                else:                                # Only documents written since the last refresh
+                    changed = {MODIFIED_FIELD: {"$gte": watermark - timedelta(seconds=lag_seconds)}}
+                    if not self.collection.count_documents(changed, limit=1):
+                        state.update_one({'_id': name}, {'$set': {'watermark': started}})
+                        summary[profile] = {'documents': None, 'removed': 0, 'full': False}
+                        continue
+
+                if changed: # Candidates among the changed documents replace their previous copies
+                    self.collection.aggregate([
+                        {"$match": {"$and": [changed, RESCUE_PROFILES[profile]]}},
+                        {"$merge": {"into": name, "on": "_id", "whenMatched": "replace",
+                                    "whenNotMatched": "insert"}}])
+                else:       # Rebuild replaces the view at once ($out keeps its indexes)
+                    self.collection.aggregate([{"$match": RESCUE_PROFILES[profile]}, {"$out": name}])
+                # Changed documents that no longer match leave the view
+                removed = 0
+                if changed:
+                    stale = (doc['_id'] for doc in self.collection.find(
+                        {"$and": [changed, {"$nor": [RESCUE_PROFILES[profile]]}]}, {'_id': 1}))
+                    while True:
+                        batch = list(islice(stale, 1000))
+                        if not batch:
+                            break
+                        removed += view.delete_many({'_id': {'$in': batch}}).deleted_count
+                else:
+                    view.create_index([(LOCATION_FIELD, GEOSPHERE)], name='location_2dsphere')
+
+                documents = view.count_documents({})
+                state.update_one({'_id': name}, {'$set': {'watermark': started, 'documents': documents,
+                                                          'refreshed_at': modified_now()}}, upsert=True)
+                summary[profile] = {'documents': documents, 'removed': removed, 'full': not changed}
+                updated = True
+            if updated:                              # Cached view pages are no longer valid
+                self.invalidate()
+            return summary
+        except Exception as e:
+            print(f"Error occurred while refreshing the rescue views: {e}")
+            return {}
+
+    def views_built(self):
+        """ True once refresh_views() has built every materialized view """
+        try:
+            names = list(VIEW_COLLECTIONS.values())
+            built = self.database[VIEW_STATE_COLLECTION].count_documents(
+                {'_id': {'$in': names}, 'documents': {'$exists': True}})
+            return built == len(names)
+        except Exception as e:
+            print(f"Error occurred while checking the rescue views: {e}")
+            return False
+
+    def delete_from_views(self, ids):
+        """ Removes deleted documents from the materialized views (refreshes only see changes) """
+        for batch in batches(ids):
+            for name in VIEW_COLLECTIONS.values():
+                self.database[name].delete_many({'_id': {'$in': batch}})
+
+    def update_rollups(self, ids, sign, documents=None):
+        """ Adds (sign=1) or removes (sign=-1) documents from the outcome rollups """
+        """ Input: ids       - _id of the documents, counted as they are currently stored """
+        """        documents - the same documents when in hand (just inserted): counted in """
+        """                    memory instead of being read back """
+        try: # A failure leaves the rollups behind until the next rebuild_rollups()
+            rollups = self.database[ROLLUP_COLLECTION]
+            groups = rollup_groups(documents) if documents is not None else None
+            if groups is not None:
+                operations = rollup_updates(groups, sign)
+                if operations:
+                    rollups.bulk_write(operations, ordered=False)
+                return
+            for batch in batches(ids): # One aggregation per batch for every rollup field
+                result = list(self.collection.aggregate(rollup_facet_pipeline({'_id': {'$in': batch}})))
+                operations = rollup_updates(result[0] if result else {}, sign)
+                if operations:
+                    rollups.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"Error occurred while updating the outcome rollups: {e}")
+
+    def rebuild_rollups(self):
+        """ Catch-up job: recomputes the outcome rollups from the whole collection """
+        """ (first build, writes made without this class, failed incremental updates) """
+        """ The new rollups are built aside and swapped in at once """
+        """ Returns: number of rollup documents, None on error """
+
+        try:
+            staging = self.database[ROLLUP_COLLECTION + '_rebuild']
+            staging.drop()
+            groups = {field: list(self.collection.aggregate(pipeline, allowDiskUse=True))
+                      for field, pipeline in rollup_pipelines({}).items()}
+            operations = rollup_updates(groups)
+            if not operations:                   # Nothing dated in the collection
+                self.database[ROLLUP_COLLECTION].drop()
+            else:
+                for start in range(0, len(operations), 1000):
+                    staging.bulk_write(operations[start:start + 1000], ordered=False)
+                staging.create_index([('period', ASCENDING), ('bucket', ASCENDING)], name='period_bucket_idx')
+                staging.rename(ROLLUP_COLLECTION, dropTarget=True)
+            self.invalidate()                    # Cached trends are no longer valid
+            print(f"Outcome rollups rebuilt: {len(operations)} buckets")
+            return len(operations)
+        except Exception as e:
+            print(f"Error occurred while rebuilding the outcome rollups: {e}")
+            return None
+
+    def rollup_series(self, period='month', group_by='outcome_type', profile=None):
+        """ Outcome counts over time, read from the rollups only (cost grows with the """
+        """ number of buckets, not with the number of documents) """
+        """ Input: period   - 'day' or 'month' """
+        """        group_by - 'outcome_type' or 'animal_type' """
+        """        profile  - rescue profile counted (None counts every document) """
+        """ Returns: list of {'bucket', 'group', 'count'} sorted by bucket, empty list otherwise """
+
+        try: # Validate the rollup dimensions
+            if period in ROLLUP_PERIODS and group_by in ROLLUP_GROUPS and (profile is None or profile in RESCUE_PROFILES):
+                field = profile or 'count'
+                pipeline = [
+                    {"$match": {"period": period, field: {"$gt": 0}}},    # period_bucket_idx
+                    {"$group": {"_id": {"bucket": "$bucket", "group": f"${group_by}"},
+                                "count": {"$sum": f"${field}"}}},
+                    {"$sort": {"_id.bucket": 1, "_id.group": 1}}
+                ]
+                rows = self.cached('rollup_series', [pipeline],
+                                   lambda: list(self.database[ROLLUP_COLLECTION].aggregate(pipeline)))
+                return [{'bucket': row['_id']['bucket'], 'group': row['_id'].get('group'),
+                         'count': row['count']} for row in rows]
+            else:
+                raise Exception(f"Unknown rollup period, group or profile: {period}, {group_by}, {profile}")
+        except Exception as e:
+            print(f"Error occurred while reading the outcome rollups: {e}")
+            return []
+
+    def explain(self, query, projection=None, sort=None, limit=0):
+        """ Explains how MongoDB runs a find query (executes it to collect statistics) """
+        """ Input: query, projection, sort, limit - same as read_iter() """
+        """ Returns: plan summary (see plan_summary()), empty dictionary otherwise """
+
+        try: # Validate input query
+            if query is not None and isinstance(query, dict):
+                command = {'find': self.collection_name, 'filter': query}
+                if isinstance(projection, (list, tuple)):
+                    projection = dict.fromkeys(projection, 1)
+                if projection:
+                    command['projection'] = projection
+                if sort:
+                    command['sort'] = dict(sort)
+                if limit:
+                    command['limit'] = limit
+                return plan_summary(self.database.command('explain', command, verbosity='executionStats'))
+            else:
+                raise Exception("Query parameter is empty or not a dictionary")
+        except Exception as e:
+            print(f"Error occurred during explain operation: {e}")
+            return {}
+
+    def check_plan(self, query, sort=None, limit=0):
+        """ Auto-explain: explains each new query shape once and warns about collection """
+        """ scans and in-memory sorts (no-op unless auto_explain is enabled) """
+        if not self.auto_explain:
+            return
+        shape = make_key(query_shape(query), list(sort or []))
+        if shape in self.plans:
+            return
+        self.plans[shape] = {}  # Reserved: concurrent queries of this shape are not explained again
+        summary = self.plans[shape] = self.explain(query, sort=sort, limit=limit)
+        if summary.get('collscan') or summary.get('in_memory_sort'):
+            problems = ' and '.join(name for name, found in (('collection scan', summary['collscan']),
+                                                             ('in-memory sort', summary['in_memory_sort'])) if found)
+            ratio = summary['docs_examined'] / max(summary['returned'], 1)
+            print(f"Warning: {problems} for query shape {shape}: {summary['docs_examined']} documents "
+                  f"examined for {summary['returned']} returned ({ratio:.0f}:1)")
+
+    def ensure_indexes(self):
+        """ Creates the indexes used by the rescue queries (no-op if they exist) """
+        """ Return: List of index names """
+
+        # Equality fields first, then the age range (equality - sort - range rule)
+        indexes = [
+            ([('animal_type', ASCENDING), ('sex_upon_outcome', ASCENDING),
+              (RESCUE_TAGS_FIELD, ASCENDING), ('age_upon_outcome_in_weeks', ASCENDING)],
+             'rescue_profile_idx'),
+            ([(LOCATION_FIELD, GEOSPHERE)], 'location_2dsphere'), # $geoWithin / $nearSphere
+        ]
+        names = []
+        for keys, name in indexes:
+            try:
+                names.append(self.collection.create_index(keys, name=name))
+            except Exception as e:
+                print(f"Error occurred while creating index {name}: {e}")
+        return names
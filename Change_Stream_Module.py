@@ -0,0 +1,142 @@
+# CS340 Project Two | Change Stream Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Watches the AAC collection with a MongoDB change stream (replica set required)
+#              and applies inserts, updates and deletes to the caches and the in-memory snapshot.
+
+from collections import deque # recent changes pushed to the dashboard clients
+import threading              # the watcher runs in a background thread
+
+from pymongo.errors import PyMongoError, OperationFailure # connection problems restart the stream
+
+BATCH_SIZE = 500 # Changes applied together (one cache invalidation, one snapshot update)
+CHANGE_STREAM_HISTORY_LOST = 286 # Server error: the resume token left the oplog
+
+def token_position(token):
+    """ Comparable position of a change stream resume token ('' when unknown) """
+    """ The _data string of the token (MongoDB 4.2+) starts with the cluster time and sorts in """
+    """ oplog order; every process watching the collection gets the same token for a change, """
+    """ so clients can keep it while their requests reach different server processes """
+    return token.get('_data', '') if isinstance(token, dict) else ''
+
+class ChangeWatcher:
+    """ Background change stream consumer of the animals collection """
+    """ Every batch of changes invalidates the query cache, updates the snapshot (if any) """
+    """ in place and is logged by resume token, so clients can ask for the changes they have not seen """
+
+    def __init__(self, shelter, snapshot=None, on_change=None, max_log=1000, retry_seconds=5):
+        """ Input: shelter       - AnimalShelter whose collection is watched """
+        """        snapshot      - ShelterSnapshot updated incrementally (optional) """
+        """        on_change     - function called with each batch of change events (optional) """
+        """        max_log       - number of recent changes kept for changes_since() """
+        """        retry_seconds - wait before reopening a failed stream """
+        self.shelter       = shelter
+        self.snapshot      = snapshot
+        self.on_change     = on_change
+        self.retry_seconds = retry_seconds
+        self.changes       = deque(maxlen=max_log) # (position, operation type, _id as string)
+        self.position      = ''                    # token_position() the stream has reached
+        self.dropped       = ''                    # Position of the newest change that left the log
+        self.received      = 0                     # Changes received by this process
+        self.resume_token  = None                  # Where to resume after a disconnection
+        self.lock          = threading.Lock()      # Protects changes/position/received
+        self.stopped       = threading.Event()
+        self.thread        = None
+
+    def start(self):
+        """ Starts watching in a daemon thread (no-op if already running) """
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, name='change-watcher', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """ Stops watching (the thread ends within about a second) """
+        self.stopped.set()
+
+    def run(self):
+        # Reopens the stream after errors, resuming after the last change applied
+        while not self.stopped.is_set():
+            try:
+                with self.shelter.collection.watch(full_document='updateLookup',
+                                                   resume_after=self.resume_token,
+                                                   max_await_time_ms=1000) as stream:
+                    print("Watching the animals collection for changes")
+                    if self.snapshot is not None:
+                        if self.resume_token is None and self.snapshot.frame is not None:
+                            self.snapshot.refresh_async() # Changes before this stream are unknown
+                        self.snapshot.live = True         # Every later write arrives through the stream
+                    while not self.stopped.is_set() and stream.alive:
+                        batch = []
+                        change = stream.try_next() # Waits up to max_await_time_ms
+                        while change is not None:
+                            batch.append(change)
+                            if len(batch) >= BATCH_SIZE:
+                                break
+                            change = stream.try_next()
+                        if batch:
+                            invalidated = self.apply(batch)
+                            # After an invalidate event (collection dropped/renamed) a new stream starts
+                            self.resume_token = None if invalidated else stream.resume_token
+                        elif stream.resume_token is not None: # No change: the stream still moves on
+                            self.resume_token = stream.resume_token
+                            with self.lock:
+                                self.position = max(self.position, token_position(stream.resume_token))
+            except PyMongoError as e:
+                print(f"Error occurred while watching changes: {e}")
+                if isinstance(e, OperationFailure) and e.code == CHANGE_STREAM_HISTORY_LOST:
+                    self.resume_token = None # Too old to resume, start over with a full load
+                self.stopped.wait(self.retry_seconds)
+            finally:
+                if self.snapshot is not None:
+                    self.snapshot.live = False # Back to generation/max_age checks meanwhile
+
+    def apply(self, batch):
+        """ Applies a batch of change events to the caches and the snapshot """
+        """ Returns: True if the stream was invalidated (collection dropped or renamed) """
+        upserts, deleted = {}, set()
+        reload = invalidated = False
+        for change in batch:
+            operation = change['operationType']
+            if operation in ('insert', 'update', 'replace', 'delete'):
+                key = change['documentKey']['_id']
+                document = change.get('fullDocument')
+                if document is not None:   # Current version of the document
+                    upserts[key] = document
+                    deleted.discard(key)
+                else:                      # Deleted (or deleted again before the update lookup)
+                    upserts.pop(key, None)
+                    deleted.add(key)
+            else:                          # drop/rename/invalidate: start over from a full load
+                reload = True
+                invalidated = invalidated or operation == 'invalidate'
+
+        self.shelter.invalidate()          # Cached results may contain the changed documents
+        if self.snapshot is not None:
+            if reload:
+                self.snapshot.refresh_async()
+            else:
+                self.snapshot.apply_changes(list(upserts.values()), deleted, self.shelter.cache.generation)
+
+        with self.lock:
+            for change in batch:
+                position = token_position(change.get('_id'))
+                key = change.get('documentKey', {}).get('_id')
+                if len(self.changes) == self.changes.maxlen:
+                    self.dropped = self.changes[0][0]
+                self.changes.append((position, change['operationType'], str(key) if key is not None else ''))
+                self.position = max(self.position, position)
+            self.received += len(batch)
+        if self.on_change is not None:
+            self.on_change(batch)
+        return invalidated
+
+    def changes_since(self, position):
+        """ Input: position - token_position() of the last change a client has seen ('' for none) """
+        """ Returns: (list of (position, operation, id) newer than position, current position, complete) """
+        """ complete is False when changes after position may already have left the log """
+        with self.lock:
+            newer = [change for change in self.changes if change[0] > position]
+            complete = self.dropped <= position
+            return newer, self.position, complete
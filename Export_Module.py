@@ -0,0 +1,119 @@
+# CS340 Project Two | Export Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Streams query results to CSV or Parquet downloads chunk by chunk, straight from
+#              the MongoDB cursor (memory use depends on the chunk size, not on the result size).
+
+import csv       # CSV rows
+import io        # per-chunk text/byte buffers
+import itertools # first piece read before the response starts
+from datetime import datetime # file name of the downloads
+
+from Frame_Schema_Module import AAC_SCHEMA # numeric fields keep their type in Parquet
+
+try: # Optional: Parquet exports
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+PARQUET_AVAILABLE = pyarrow is not None
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+def csv_stream(chunks, fields):
+    """ Yields a CSV file piece by piece (header first, then one piece per chunk) """
+    """ Input: chunks - iterable of lists of documents (e.g. read_iter(..., chunk_size=N)) """
+    """        fields - columns of the file, in order (missing fields are left empty) """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell(): # Header only (no matching documents)
+        yield buffer.getvalue().encode('utf-8')
+
+class ChunkSink(io.RawIOBase):
+    """ Write-only file collecting the bytes of the Parquet writer until they are sent """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        # Bytes written since the last call
+        data, self.data = bytes(self.data), bytearray()
+        return data
+
+def parquet_schema(fields):
+    """ Arrow schema of an export: float columns of AAC_SCHEMA as doubles, the rest as strings """
+    return pyarrow.schema([(field, pyarrow.float64() if AAC_SCHEMA.get(field, '').startswith('float')
+                            else pyarrow.string()) for field in fields])
+
+def parquet_value(value, numeric):
+    # Values of mixed-type fields are converted to the column type (None when impossible)
+    if value is None:
+        return None
+    if numeric:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return value if isinstance(value, str) else str(value)
+
+def parquet_stream(chunks, fields):
+    """ Yields a Parquet file piece by piece, one row group per chunk (requires pyarrow) """
+    """ Input: chunks, fields - same as csv_stream() """
+    schema = parquet_schema(fields)
+    numeric = [pyarrow.types.is_floating(field.type) for field in schema]
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression='snappy') as writer:
+        for chunk in chunks:
+            columns = [[parquet_value(document.get(field), is_numeric) for document in chunk]
+                       for field, is_numeric in zip(fields, numeric)]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+            yield sink.take()
+    yield sink.take() # Footer (and the schema of an empty result)
+
+def add_export_route(server, source, path='/export/<file_format>'):
+    """ Adds the download endpoint to the Flask server of a Dash app """
+    """ Input: server - Flask server (app.server) """
+    """        source - function(request arguments) returning (chunks, fields) of the export, """
+    """                 chunks raising on a failed read (e.g. read_iter(..., strict=True)) """
+    from flask import Response, abort, request # Flask ships with Dash
+
+    @server.route(path)
+    def export_results(file_format):
+        if file_format not in EXPORT_FORMATS:
+            abort(404)
+        if file_format == 'parquet' and not PARQUET_AVAILABLE:
+            abort(501, "Parquet exports require pyarrow (pip install pyarrow)")
+        chunks, fields = source(request.args)
+        if not fields:
+            abort(400, "No columns selected for the export")
+        stream = parquet_stream if file_format == 'parquet' else csv_stream
+        pieces = stream(chunks, fields)
+        try: # Query errors are reported before the download starts (a 500, not an empty file)
+            first = next(pieces)
+        except Exception as e:
+            print(f"Error occurred during export: {e}")
+            abort(500, "Export failed")
+        # Later read errors abort the transfer: the client sees a failed, not a truncated, download
+        filename = f"aac-export-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{file_format}"
+        return Response(itertools.chain([first], pieces), mimetype=EXPORT_FORMATS[file_format],
+                        headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+    return server
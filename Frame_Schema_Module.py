@@ -0,0 +1,97 @@
+# CS340 Project Two | Frame Schema Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Typed, memory-compact DataFrames of AAC (Austin Animal Center) documents.
+#              Used by the in-memory snapshot (Snapshot_Module) and the Parquet exports (Export_Module);
+#              the dashboard charts build their frames from aggregated rows, not from documents.
+
+import pandas as pd                             # typed DataFrames
+from pandas.api.types import union_categoricals # merge categories of streamed chunks
+
+try: # Optional: Arrow-backed string and numeric columns
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Declared dtype of every field of the AAC outcomes export
+# category -> few distinct values repeated on many rows (stored once, rows hold small codes)
+# datetime -> ISO dates stored as strings in MongoDB
+AAC_SCHEMA = {
+    "animal_id":                 "string",
+    "animal_type":               "category",
+    "breed":                     "category",
+    "color":                     "category",
+    "name":                      "category",
+    "age_upon_outcome":          "category",
+    "sex_upon_outcome":          "category",
+    "outcome_type":              "category",
+    "outcome_subtype":           "category",
+    "date_of_birth":             "datetime",
+    "datetime":                  "datetime",
+    "monthyear":                 "datetime",
+    "location_lat":              "float64",
+    "location_long":             "float64",
+    "age_upon_outcome_in_weeks": "float32",
+}
+
+def column_dtype(kind, arrow=False):
+    """ Pandas dtype of a schema kind (Arrow-backed if requested and pyarrow is installed) """
+    if arrow and pyarrow is not None and kind in ("string", "float64", "float32"):
+        return pd.ArrowDtype({"string": pyarrow.string(), "float64": pyarrow.float64(),
+                              "float32": pyarrow.float32()}[kind])
+    return kind
+
+def apply_schema(frame, schema=AAC_SCHEMA, arrow=False):
+    """ Converts the columns of a DataFrame to their declared dtypes """
+    """ Input: frame  - DataFrame built from MongoDB documents (undeclared columns are kept as-is) """
+    """        schema - field name -> category, string, datetime or numeric dtype name """
+    """        arrow  - use Arrow-backed string/numeric columns (requires pyarrow) """
+    """ Returns: the same DataFrame with converted columns """
+    for field, kind in schema.items():
+        if field not in frame.columns:
+            continue
+        try:
+            if kind == "datetime":   # Unparsable values become NaT
+                frame[field] = pd.to_datetime(frame[field], errors="coerce", format="ISO8601")
+            elif kind == "category":
+                frame[field] = frame[field].astype("category")
+            elif kind == "string":
+                frame[field] = frame[field].astype(column_dtype(kind, arrow))
+            else:                    # Numeric: text and missing values become NaN
+                frame[field] = pd.to_numeric(frame[field], errors="coerce").astype(column_dtype(kind, arrow))
+        except Exception as e:       # Keep the original column rather than failing the callback
+            print(f"Error converting column {field} to {kind}: {e}")
+    return frame
+
+def typed_frame(documents, schema=AAC_SCHEMA, arrow=False):
+    """ Builds a typed DataFrame from a list of documents """
+    return apply_schema(pd.DataFrame.from_records(documents), schema, arrow)
+
+def concat_frames(frames):
+    """ Concatenates typed DataFrames, keeping categorical columns categorical """
+    """ (pd.concat falls back to object columns when the chunks have different categories) """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    merged = {}
+    for field in frames[0].columns:
+        if all(field in f.columns and isinstance(f[field].dtype, pd.CategoricalDtype) for f in frames):
+            try:     # Union of the chunk categories, codes are remapped without decoding the values
+                merged[field] = union_categoricals([f[field] for f in frames], ignore_order=True)
+            except TypeError: # Categories of different types (e.g. an all-missing chunk)
+                merged[field] = None
+    frame = pd.concat(frames, ignore_index=True)
+    for field, values in merged.items():
+        frame[field] = frame[field].astype("category") if values is None else pd.Categorical(values)
+    for field in frame.columns: # Categorical columns missing from some of the chunks
+        if not isinstance(frame[field].dtype, pd.CategoricalDtype) and any(
+                field in f.columns and isinstance(f[field].dtype, pd.CategoricalDtype) for f in frames):
+            frame[field] = frame[field].astype("category")
+    return frame
+
+def frame_from_chunks(chunks, schema=AAC_SCHEMA, arrow=False):
+    """ Builds a typed DataFrame from streamed chunks of documents """
+    """ (only one chunk of dictionaries is held in memory at a time) """
+    return concat_frames(typed_frame(chunk, schema, arrow) for chunk in chunks)
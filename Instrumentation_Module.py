@@ -0,0 +1,234 @@
+# CS340 Project Two | Instrumentation Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: MongoDB command and Dash callback metrics of the dashboard, exported in the
+#              Prometheus text format and listed in the optional diagnostics panel.
+
+from collections import defaultdict, deque # metric series and recent slow operations
+from contextlib import contextmanager      # timed stages
+from datetime import datetime              # timestamps of slow operations
+import functools                           # keep callback names and signatures
+import threading                           # metrics updated from every server thread
+import time                                # durations
+
+import bson                                # size of the MongoDB replies
+from pymongo import monitoring             # command events of the MongoDB driver
+
+# Histogram buckets in seconds (MongoDB commands and callbacks)
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+SLOW_OPERATION_MS = 250 # Operations at least this slow are listed in the diagnostics panel
+
+class Histogram:
+    """ Cumulative latency histogram of one metric series """
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS) # Observations per bucket (not cumulative)
+        self.count  = 0
+        self.total  = 0.0
+
+    def observe(self, seconds):
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total += seconds
+
+class Metrics:
+    """ Counters, histograms and recent slow operations shared by the whole process """
+
+    def __init__(self, slow_ms=SLOW_OPERATION_MS, recent=50):
+        self.lock       = threading.Lock()
+        self.histograms = defaultdict(Histogram) # (metric name, labels) -> Histogram
+        self.counters   = defaultdict(float)     # (metric name, labels) -> value
+        self.gauges     = {}                     # metric name -> (help text, function returning value)
+        self.help       = {}                     # metric name -> help text
+        self.slow_ms    = slow_ms
+        self.slow       = deque(maxlen=recent)   # Most recent slow operations
+        self.local      = threading.local()      # MongoDB time of the current callback/stage
+
+    # --- Recording --- #
+    def observe(self, name, help_text, seconds, **labels):
+        """ Adds a duration to a histogram series """
+        with self.lock:
+            self.help[name] = help_text
+            self.histograms[(name, tuple(sorted(labels.items())))].observe(seconds)
+
+    def increment(self, name, help_text, value=1, **labels):
+        """ Adds a value to a counter series """
+        with self.lock:
+            self.help[name] = help_text
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def gauge(self, name, help_text, function):
+        """ Registers a value read when the metrics are exported (e.g. cache statistics) """
+        self.gauges[name] = (help_text, function)
+
+    def record_slow(self, kind, name, milliseconds, detail=''):
+        """ Remembers an operation slower than slow_ms for the diagnostics panel """
+        if milliseconds >= self.slow_ms:
+            self.slow.appendleft({'Time': datetime.now().strftime('%H:%M:%S'), 'Kind': kind,
+                                  'Operation': name, 'Milliseconds': round(milliseconds, 1),
+                                  'Detail': detail})
+
+    def mongodb_seconds(self):
+        """ MongoDB time spent so far by the current thread """
+        return getattr(self.local, 'mongodb', 0.0)
+
+    def add_mongodb_seconds(self, seconds):
+        self.local.mongodb = self.mongodb_seconds() + seconds
+
+    @contextmanager
+    def stage(self, name):
+        """ Times a block of a callback (e.g. DataFrame conversion), excluding its MongoDB time """
+        start, mongodb = time.perf_counter(), self.mongodb_seconds()
+        try:
+            yield
+        finally:
+            own = time.perf_counter() - start - (self.mongodb_seconds() - mongodb)
+            self.observe('aac_stage_duration_seconds', "Duration of callback stages without MongoDB time",
+                         max(own, 0.0), stage=name)
+
+    # --- Export --- #
+    def prometheus_text(self):
+        """ All metrics in the Prometheus text exposition format """
+        def labels_text(labels, extra=()):
+            pairs = [(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                     for key, value in list(labels) + list(extra)]
+            return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}' if pairs else ''
+
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        for name in sorted({key[0] for key, _ in histograms}):
+            lines += [f"# HELP {name} {self.help[name]}", f"# TYPE {name} histogram"]
+            for (series, labels), histogram in histograms:
+                if series != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{labels_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{labels_text(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{labels_text(labels)} {histogram.total:.6f}")
+                lines.append(f"{name}_count{labels_text(labels)} {histogram.count}")
+        for name in sorted({key[0] for key, _ in counters}):
+            lines += [f"# HELP {name} {self.help[name]}", f"# TYPE {name} counter"]
+            lines += [f"{name}{labels_text(labels)} {value:g}" for (series, labels), value in counters
+                      if series == name]
+        for name, (help_text, function) in sorted(self.gauges.items()):
+            try:
+                value = function()
+            except Exception as e: # A failing gauge must not break the endpoint
+                print(f"Error reading metric {name}: {e}")
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value:g}"]
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics() # Metrics of this process
+
+class CommandMetrics(monitoring.CommandListener):
+    """ PyMongo command listener recording latency, documents returned and reply size """
+    """ Pass it to MongoClient(event_listeners=[...]) (AnimalShelter: event_listeners=[...]) """
+
+    def __init__(self, registry=metrics, measure_bytes=False):
+        """ measure_bytes -> re-encode replies to count their BSON size (costs CPU on every batch, """
+        """                  meant for benchmarks rather than the running dashboard) """
+        self.registry = registry
+        self.measure_bytes = measure_bytes
+        self.collections = {} # request id -> collection of the running command
+
+    def started(self, event):
+        # The command document names its collection (find/aggregate/insert/... : <collection>,
+        # getMore: <cursor id> with a separate collection field)
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            target = event.command.get('collection', '')
+        self.collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ''
+
+    def succeeded(self, event):
+        collection = self.collections.pop((event.connection_id, event.request_id), '')
+        seconds = event.duration_micros / 1e6
+        reply = event.reply
+        cursor = reply.get('cursor') if isinstance(reply, dict) else None
+        if isinstance(cursor, dict): # find/aggregate/getMore batches
+            documents = len(cursor.get('firstBatch', cursor.get('nextBatch', [])))
+        else:
+            documents = reply.get('n', 0) if isinstance(reply, dict) else 0
+        size = len(bson.encode(reply)) if self.measure_bytes and isinstance(reply, dict) else 0
+
+        labels = {'command': event.command_name, 'collection': collection}
+        self.registry.observe('aac_mongodb_command_duration_seconds', "Duration of MongoDB commands",
+                              seconds, **labels)
+        self.registry.increment('aac_mongodb_documents_returned_total',
+                                "Documents returned (or written) by MongoDB commands", documents, **labels)
+        if self.measure_bytes:
+            self.registry.increment('aac_mongodb_reply_bytes_total', "BSON size of MongoDB replies", size, **labels)
+        self.registry.add_mongodb_seconds(seconds)
+        self.registry.record_slow('MongoDB', f"{event.command_name} {collection}".strip(), seconds * 1000,
+                                  f"{documents} documents" + (f", {size} bytes" if self.measure_bytes else ""))
+
+    def failed(self, event):
+        collection = self.collections.pop((event.connection_id, event.request_id), '')
+        self.registry.increment('aac_mongodb_command_failures_total', "Failed MongoDB commands",
+                                command=event.command_name, collection=collection)
+        self.registry.add_mongodb_seconds(event.duration_micros / 1e6)
+
+def timed_callback(function, registry=metrics):
+    """ Wraps a Dash callback to record its duration and the part spent in MongoDB """
+    """ (background callbacks record in the process running them, see request timings instead) """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start, mongodb = time.perf_counter(), registry.mongodb_seconds()
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            registry.increment('aac_dash_callback_errors_total', "Dash callbacks raising an error",
+                               callback=function.__name__)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            mongodb_share = registry.mongodb_seconds() - mongodb
+            registry.local.callback = getattr(registry.local, 'callback', 0.0) + seconds
+            registry.observe('aac_dash_callback_duration_seconds', "Duration of Dash callbacks",
+                             seconds, callback=function.__name__)
+            registry.increment('aac_dash_callback_mongodb_seconds_total',
+                               "Time Dash callbacks spent waiting for MongoDB",
+                               mongodb_share, callback=function.__name__)
+            registry.record_slow('Callback', function.__name__, seconds * 1000,
+                                 f"{mongodb_share * 1000:.0f} ms in MongoDB")
+    return wrapper
+
+def instrument_server(server, registry=metrics, path='/metrics'):
+    """ Adds the metrics endpoint and request timings to the Flask server of a Dash app """
+    """ Request time minus callback time is Dash/JSON serialization and framework overhead """
+    from flask import Response, g, request # Flask ships with Dash
+
+    @server.before_request
+    def start_timer():
+        g.instrumentation_start = time.perf_counter()
+        registry.local.callback = 0.0
+
+    @server.after_request
+    def record_request(response):
+        start = g.get('instrumentation_start')
+        if start is not None and request.path.endswith('/_dash-update-component'):
+            seconds = time.perf_counter() - start
+            output = (request.get_json(silent=True) or {}).get('output', '')
+            output = output.strip('.').replace('...', '+') if output.startswith('..') else output
+            registry.observe('aac_dash_request_duration_seconds',
+                             "Duration of Dash callback requests (including serialization)",
+                             seconds, output=output)
+            registry.observe('aac_dash_request_overhead_seconds',
+                             "Request time outside the callback (serialization, framework)",
+                             max(seconds - getattr(registry.local, 'callback', 0.0), 0.0), output=output)
+            registry.increment('aac_dash_response_bytes_total', "Size of Dash callback responses",
+                               response.calculate_content_length() or 0, output=output)
+        return response
+
+    @server.route(path)
+    def export_metrics():
+        return Response(registry.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+    return server
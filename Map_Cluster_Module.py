@@ -0,0 +1,105 @@
+# CS340 Project Two | Map Cluster Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Server-side marker clustering for the dashboard map (grid clustering per zoom level
+#              in a MongoDB $group stage over the region around the visible area).
+
+from html import escape # escape animal data inside popup HTML
+import numpy as np      # vectorized coordinate projection
+
+TILE_SIZE      = 256    # Web map tile size in pixels
+CLUSTER_RADIUS = 60     # Size in screen pixels of the grid cell merged into one cluster
+MAX_CLUSTER_ZOOM = 16   # From this zoom level every animal gets its own marker
+REGION_CELLS   = 16     # Clustered regions are aligned on blocks of this many grid cells
+MAX_LATITUDE   = 85.05112878 # Mercator latitude limit
+
+def project(lat, lng, zoom):
+    """ Projects coordinates to Web Mercator pixel coordinates at a zoom level """
+    """ Input: lat, lng - arrays of coordinates in degrees """
+    """ Returns: (x, y) arrays of pixel coordinates """
+    scale = TILE_SIZE * 2 ** zoom
+    x = (lng + 180.0) / 360.0 * scale
+    sin = np.sin(np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))) # Mercator latitude limit
+    y = (0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)) * scale
+    return x, y
+
+def unproject(x, y, zoom):
+    """ Inverse of project(): Web Mercator pixel coordinates to (lat, lng) in degrees """
+    scale = TILE_SIZE * 2 ** zoom
+    lng = x / scale * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / scale))))
+    return float(lat), float(lng)
+
+def point_popup(name, breed, age, sex):
+    """ HTML popup of a single animal (same content as the original marker popup) """
+    return (f"<h4>Animal Name: {escape(str(name))}</h4>"
+            f"<p>Breed: {escape(str(breed))}</p>"
+            f"<p>Age: {escape(str(age))}</p>"
+            f"<p>Sex: {escape(str(sex))}</p>")
+
+# --- Clustering in MongoDB --- #
+def cluster_region(bounds, zoom, radius=CLUSTER_RADIUS):
+    """ Region clustered for a visible map area: the area plus half of it on every side, """
+    """ aligned on blocks of REGION_CELLS grid cells so nearby views share the same region """
+    """ Input: bounds - visible area [[south, west], [north, east]] """
+    """ Returns: region bounds [[south, west], [north, east]] """
+    (south, west), (north, east) = bounds
+    (left, right), (top, bottom) = zip(*(project(lat, lng, zoom) for lat, lng in ((north, west), (south, east))))
+    margin_x, margin_y = (right - left) / 2, (bottom - top) / 2
+    block, scale = radius * REGION_CELLS, TILE_SIZE * 2 ** zoom
+    left, top = np.floor((left - margin_x) / block) * block, max(np.floor((top - margin_y) / block) * block, 0)
+    right, bottom = np.ceil((right + margin_x) / block) * block, min(np.ceil((bottom + margin_y) / block) * block, scale)
+    (north, west), (south, east) = unproject(left, top, zoom), unproject(right, bottom, zoom)
+    return [[south, west], [north, east]]
+
+def region_contains(region, bounds):
+    """ True if the visible area (bounds) lies inside an already clustered region """
+    if not region or not bounds:
+        return False
+    (south, west), (north, east) = bounds
+    (region_south, region_west), (region_north, region_east) = region
+    return region_south <= south and north <= region_north and region_west <= west and east <= region_east
+
+def cluster_pipeline(query, zoom, radius=CLUSTER_RADIUS):
+    """ Aggregation pipeline grouping the animals of a query by the screen-pixel grid cell they fall in """
+    """ Input: query - filter of the animals to show (usually restricted to a cluster_region) """
+    """        zoom  - current map zoom level """
+    """ Returns: pipeline whose documents are read by clusters_from_groups() """
+    located = {"location_lat": {"$type": "number"}, "location_long": {"$type": "number"}}
+    fields = {"lat": "$location_lat", "lng": "$location_long", "name": 1, "breed": 1,
+              "age_upon_outcome": 1, "sex_upon_outcome": 1, "_id": 0}
+    pipeline = [{"$match": {"$and": [query, located]} if query else located}]
+    if zoom is None or zoom >= MAX_CLUSTER_ZOOM: # Close enough: every animal in its own cell
+        return pipeline + [{"$project": fields}]
+
+    cells = TILE_SIZE * 2 ** zoom / radius       # Grid cells across the world at this zoom
+    latitude = {"$max": [{"$min": ["$location_lat", MAX_LATITUDE]}, -MAX_LATITUDE]}
+    x = {"$floor": {"$multiply": [{"$divide": [{"$add": ["$lng", 180.0]}, 360.0]}, cells]}}
+    y = {"$floor": {"$multiply": [{"$subtract": [0.5, {"$divide": [ # Same formula as project()
+            {"$ln": {"$divide": [{"$add": [1, "$sin"]}, {"$subtract": [1, "$sin"]}]}}, 4 * np.pi]}]}, cells]}}
+    return pipeline + [
+        {"$project": {**fields, "sin": {"$sin": {"$degreesToRadians": latitude}}}},
+        {"$group": {"_id": {"x": x, "y": y}, "count": {"$sum": 1},
+                    "lat": {"$avg": "$lat"}, "lng": {"$avg": "$lng"}, # Centroid of the cell
+                    "name": {"$first": "$name"}, "breed": {"$first": "$breed"}, # The animal when alone
+                    "age_upon_outcome": {"$first": "$age_upon_outcome"},
+                    "sex_upon_outcome": {"$first": "$sex_upon_outcome"}}},
+    ]
+
+def clusters_from_groups(groups):
+    """ GeoJSON FeatureCollection of the cells returned by cluster_pipeline() """
+    """ (clusters carry point_count, animals alone in their cell a tooltip and popup) """
+    features = []
+    for group in sorted(groups, key=lambda group: group.get("count", 1) == 1): # Clusters first
+        count = group.get("count", 1)
+        point = {"type": "Point", "coordinates": [float(group["lng"]), float(group["lat"])]}
+        if count > 1:   # Cluster: one marker at the centroid of the animals in the cell
+            properties = {"cluster": True, "point_count": int(count),
+                          "tooltip": f"{count} animals (zoom in to see them)"}
+        else:           # Single animal: regular marker with tooltip and popup
+            properties = {"cluster": False, "tooltip": str(group.get("name")),
+                          "popup": point_popup(group.get("name"), group.get("breed"),
+                                               group.get("age_upon_outcome", "Unknown"),
+                                               group.get("sex_upon_outcome", "Unknown"))}
+        features.append({"type": "Feature", "geometry": point, "properties": properties})
+    return {"type": "FeatureCollection", "features": features}
@@ -9,13 +9,32 @@ from dash import dcc, html               # core Dash components + HTML wrappers
 from dash import dash_table              # table components
 from dash.dependencies import Input, Output, State # callback functionality
 from dash import callback_context        # determine which input triggers callback
-from functools import lru_cache          # caching for performance optimization
-import base64                            # image encoding
+from dash import callback, get_asset_url # app-independent callbacks + static assets
+import dash                              # no_update for partial callback outputs
+from datetime import datetime            # freshness timestamp of the summary
+from pymongo import ASCENDING, DESCENDING # sort directions for server-side sorting
+import time                              # schema cache expiration
+import os                                # optional features enabled by environment variables
+import copy                              # rescue queries are copied before use
+import re                                # escape user input in regex filters
+from difflib import SequenceMatcher      # rows of the page changed by live updates
 import dash_leaflet as dl                # interactive maps
+from Map_Cluster_Module import cluster_region, region_contains # region clustered around the visible area
+from Map_Cluster_Module import cluster_pipeline, clusters_from_groups # marker clustering in MongoDB ($group)
 import pandas as pd                      # manipulate DataFrames from MongoDB
 import plotly.express as px              # create plots
 
 from CRUD_Python_Module import AnimalShelter # Import class from CRUD Python module
+from CRUD_Python_Module import RESCUE_TAGS_FIELD, LOCATION_FIELD # Indexed derived fields
+from CRUD_Python_Module import MODIFIED_FIELD    # Write time (watermark of the rescue views)
+from CRUD_Python_Module import RESCUE_PROFILES   # Criteria of the rescue types
+from CRUD_Python_Module import geo_within_bounds, with_geo_filter # Geospatial filters
+from Snapshot_Module import ShelterSnapshot # In-memory rescue profile queries
+from Instrumentation_Module import metrics, CommandMetrics, timed_callback, instrument_server # Metrics
+from Change_Stream_Module import ChangeWatcher # Live updates from a MongoDB change stream
+from Export_Module import add_export_route, PARQUET_AVAILABLE # Streaming CSV/Parquet downloads
+import json                              # sort order of the export links
+from urllib.parse import urlencode       # filter state of the export links
 
 #############################
 # Data Manipulation / Model #
@@ -23,115 +42,248 @@ from CRUD_Python_Module import AnimalShelter # Import class from CRUD Python mod
 
 username = "aacuser"
 password = "NoSQLNoParty"
-shelter = AnimalShelter(username, password) # credentials and connection setup
+shelter = None # Created on first use, importing this module does not connect to MongoDB
+# Extra AnimalShelter settings (pool size, shared cache) given to create_app()
+shelter_options = {'event_listeners': [CommandMetrics()], # MongoDB command metrics
+                   'auto_explain': os.environ.get('SHELTER_AUTO_EXPLAIN', '0') == '1'} # Warn about unindexed queries
+
+# Helper function returning the shared AnimalShelter (connects on first use)
+def get_shelter():
+    global shelter
+    if shelter is None:
+        shelter = AnimalShelter(username, password, **shelter_options) # credentials and connection setup
+    return shelter
+
+# Optional in-memory snapshot answering the rescue buttons without MongoDB round trips
+# (SHELTER_SNAPSHOT=1; every server process holds its own copy of the collection)
+USE_SNAPSHOT = os.environ.get('SHELTER_SNAPSHOT', '0') == '1'
+SNAPSHOT_MAX_AGE = 300 # Seconds before the snapshot is reloaded from MongoDB
+snapshot = None
+
+# Helper function returning the snapshot, None when disabled (loads in the background on first use)
+def get_snapshot():
+    global snapshot
+    if USE_SNAPSHOT and snapshot is None:
+        snapshot = ShelterSnapshot(get_shelter(), max_age=SNAPSHOT_MAX_AGE)
+    return snapshot
+
+# Optional live updates (SHELTER_LIVE_UPDATES=1, MongoDB replica set required): a change stream
+# applies every write to the caches and the snapshot, open pages receive the changed rows only
+LIVE_UPDATES = os.environ.get('SHELTER_LIVE_UPDATES', '0') == '1'
+LIVE_INTERVAL = 2000 # Milliseconds between checks for new changes in the browser
+watcher = None
+
+# Helper function returning the running change watcher, None when disabled
+# (started on first use in every server process, threads do not survive a fork)
+def get_watcher():
+    global watcher
+    if not LIVE_UPDATES:
+        return None
+    if watcher is None:
+        watcher = ChangeWatcher(get_shelter(), get_snapshot(), on_change=summary_outdated)
+    return watcher.start()
 
 # Helper function to get rescue type queries
 # (DRY principle, we need the same queries in buttons and charts)
+# The criteria are defined once in the CRUD module (RESCUE_PROFILES), shared with the CLI reports
+BUTTON_PROFILES = {
+    'btn1': 'water',    # Water SAR
+    'btn2': 'mountain', # Mountain or Wilderness SAR
+    'btn3': 'disaster', # Disaster or Individual Tracking SAR
+}                       # btn4: Reset - empty query returns all records
 def get_rescue_query(button_id):
-    queries = {
-        ########################################## Water SAR Criteria:
-        'btn1': {
-            "animal_type": "Dog",                    # - Must be a dog
-            "age_upon_outcome_in_weeks": {
-                "$gte": 26,                          # - Age between 26 and 156 weeks
-                "$lte": 156
-            },
-            "breed": {                               # - Specific working breeds:
-                "$regex": (
-                "(labrador retriever.*(mix|\\s*/|/)"   # - Labrador Retriever Mix
-                "|chesapeake bay retriever"            # - Chesapeake Bay Retriever
-                "|newfoundland)"                       # - Newfoundland
-                ),
-                "$options": "i"
-            },
-            "sex_upon_outcome": "Intact Female",     # - Intact Female 
-            "outcome_type": {
-            "$nin": ["Return to Owner", "Died", "Euthanasia"] # Optional search enhancement
-            }
-        },
-        ########################################## Mountain or Wilderness SAR Criteria:
-        'btn2': {
-            "animal_type": "Dog",                    # - Must be a dog
-            "age_upon_outcome_in_weeks": {
-                "$gte": 26,                          # - Age between 26 and 156 weeks
-                "$lte": 156
-            },
-            "breed": {                               # - Specific working breeds:
-                "$regex": (
-                "(german shepherd"                     # - German Shepherd
-                "|alaskan malamute"                    # - Alaskan Malamute
-                "|old english sheepdog"                # - Old English Sheepdog
-                "|siberian husky"                      # - Siberian Husky
-                "|rottweiler)"                         # - Rottweiler
-                ),
-                "$options": "i"
-            },
-            "sex_upon_outcome": "Intact Male",       # - Intact Male 
-            "outcome_type": {
-            "$nin": ["Return to Owner", "Died", "Euthanasia"] # Optional search enhancement
-            }
-        },
-        ###################################### Disaster or Individual Tracking SAR Criteria:
-        'btn3': {
-            "animal_type": "Dog",                    # - Must be a dog
-            "age_upon_outcome_in_weeks": {
-                "$gte": 20,                          # - Age between 20 and 300 weeks
-                "$lte": 300
-            },
-            "breed": {                               # - Specific working breeds:
-                "$regex": (
-                "(doberman pinscher"                   # - Doberman Pinscher
-                "|german shepherd"                     # - German Shepherd
-                "|golden retriever"                    # - Golden Retriever
-                "|bloodhound"                          # - Bloodhound
-                "|rottweiler)"                         # - Rottweiler
-                ),
-                  "$options": "i"
-            },
-            "sex_upon_outcome": "Intact Male",       # - Intact Male 
-            "outcome_type": {
-            "$nin": ["Return to Owner", "Died", "Euthanasia"] # Optional search enhancement
-            }
-        },
-        'btn4': {}                              # Reset - empty query returns all records
-    }
-    return queries.get(button_id, {}) # Return the query dictionary for the given button ID
-
-# Load initial data from MongoDB with error handling
-try: # load all documents from MongoDB and convert to pandas DataFrame
-    df = pd.DataFrame.from_records(shelter.read({}))
-except Exception as e: # Handle any errors during data loading and print error message
-    print(f"Error loading initial data from MongoDB: {e}") # Error message for debugging
-    df = pd.DataFrame()                                    # Create empty DataFrame as fallback
-
-# Remove MongoDB _id field (ObjectID not compatible with DataTable)
-if '_id' in df.columns:                    # Check if _id column exists in DataFrame
-    df.drop(columns=['_id'], inplace=True) # Remove _id column in-place (modifies original)
-
-# --- Build Summary Table for Dataset Cardinality --- #
-summary_data = [] # Initialize empty list to store summary information for each column
-for col in df.columns:                       # Loop through all column names
-    unique_vals = df[col].dropna().unique()  # Analyze each column's uniqueness
-    unique_count = len(unique_vals)          # Counts distinct values per column
-
-    # Categorize columns based on their cardinality (number of unique values)
+    # Copy, so callers can extend the query without changing the profile
+    return copy.deepcopy(RESCUE_PROFILES.get(BUTTON_PROFILES.get(button_id), {}))
+
+# Optional materialized rescue views (SHELTER_VIEWS=1): the rescue buttons read small
+# per-profile collections refreshed incrementally with $merge instead of the whole collection.
+# A single scheduler outside the web processes refreshes them: "Shelter_CLI.py refresh-views
+# --every N" started by the gunicorn master (gunicorn.conf.py), or "Shelter_CLI.py refresh-views"
+# run by cron; the dashboard processes only read the views
+USE_VIEWS = os.environ.get('SHELTER_VIEWS', '0') == '1'
+views_ready = False # Every view built once (the animals collection answers until then)
+
+# Helper function returning the AnimalShelter to query for a rescue button
+# (its materialized view when enabled and built, the animals collection otherwise;
+#  requests never refresh the views themselves)
+def get_source(button_id):
+    global views_ready
+    profile = BUTTON_PROFILES.get(button_id)
+    if not USE_VIEWS or profile is None:
+        return get_shelter()
+    if not views_ready:
+        views_ready = get_shelter().views_built()
+        if not views_ready:
+            return get_shelter()
+    return get_shelter().view(profile)
+
+PIE_TOP_BREEDS = 15 # Breeds shown individually in the pie chart, the rest is grouped as "Other"
+
+# Helper function to build the breed distribution pipeline for the pie chart
+# MongoDB counts the breeds, only the top-N counts plus one "Other" total are transferred
+def breed_distribution_pipeline(query, top_n=PIE_TOP_BREEDS):
+    return [
+        {"$match": query},                                         # Rescue type filter
+        {"$group": {"_id": "$breed", "count": {"$sum": 1}}},       # Count per breed
+        {"$sort": {"count": -1, "_id": 1}},                        # Most common first
+        {"$facet": {
+            "top": [{"$limit": top_n}],                            # Top-N breeds
+            "other": [{"$skip": top_n},                            # Everything else
+                      {"$group": {"_id": "Other", "count": {"$sum": "$count"}}}]
+        }},
+        {"$project": {"breeds": {"$concatArrays": ["$top", "$other"]}}}, # Single list
+        {"$unwind": "$breeds"},                                    # One document per slice
+        {"$replaceRoot": {"newRoot": "$breeds"}}
+    ]
+
+# Same result as breed_distribution_pipeline() computed from the snapshot, None if MongoDB must answer
+def snapshot_breed_distribution(query, top_n=PIE_TOP_BREEDS):
+    counts = get_snapshot().value_counts(query, 'breed') if get_snapshot() is not None else None
+    if counts is None:
+        return None
+    slices = [{"_id": breed, "count": int(count)}                 # Top-N breeds
+              for breed, count in zip(counts["_id"][:top_n], counts["count"][:top_n])]
+    if len(counts) > top_n:                                        # Everything else
+        slices.append({"_id": "Other", "count": int(counts["count"][top_n:].sum())})
+    return slices
+
+# Operators produced by the DataTable filter row (custom filtering mode)
+# Each group lists the keyword form first, followed by its symbol aliases
+FILTER_OPERATORS = [['ge', '>='], ['le', '<='], ['lt', '<'], ['gt', '>'],
+                    ['ne', '!='], ['eq', '='], ['contains'], ['datestartswith']]
+OPERATOR_KEYWORDS = {alias: group[0] for group in FILTER_OPERATORS for alias in group}
+# "{column} operator value": the operator is the token right after the column, so operator
+# characters or words inside the value are never taken for the operator
+FILTER_PART = re.compile(r'\s*\{(?P<name>[^{}]*)\}\s*(?:(?P<keyword>[a-z]+)\s+|(?P<symbol>>=|<=|!=|<|>|=)\s*)'
+                         r'(?P<value>.*)', re.DOTALL)
+
+# Helper function to translate a single "{column} operator value" filter expression
+def split_filter_part(filter_part):
+    match = FILTER_PART.fullmatch(filter_part)
+    if match is None or (match['keyword'] or match['symbol']) not in OPERATOR_KEYWORDS:
+        return None, None, None # Expression not recognized
+    operator = OPERATOR_KEYWORDS[match['keyword'] or match['symbol']]
+    value = match['value'].strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in ("'", '"', '`'):
+        value = value[1:-1].replace('\\' + value[0], value[0]) # Quoted string
+    elif operator not in ('contains', 'datestartswith'):
+        try:
+            value = float(value) # Numeric comparison when possible
+        except ValueError:
+            pass
+    return match['name'], operator, value
+
+# Helper function checking a column name sent by the browser (filters, sorting, exports):
+# only columns of the collection, never an operator such as $where
+def valid_column(name, columns):
+    return isinstance(name, str) and not name.startswith('$') and name in columns
+
+# Helper function to translate the DataTable filter_query into a MongoDB filter
+# e.g. "{breed} contains Retriever && {age_upon_outcome_in_weeks} < 52"
+# columns -> allowed column names (default: the table columns), other filters are ignored
+def translate_filter_query(filter_query, columns=None):
+    comparisons = {'ge': '$gte', 'le': '$lte', 'lt': '$lt', 'gt': '$gt', 'ne': '$ne'}
+    conditions = []
+    for filter_part in (filter_query or '').split(' && '):
+        col_name, operator, value = split_filter_part(filter_part)
+        if col_name is None:
+            continue
+        if columns is None:
+            columns = get_columns()
+        if not valid_column(col_name, columns): # Unknown column or operator: rejected
+            continue
+        if operator in comparisons:      # Range and inequality operators
+            conditions.append({col_name: {comparisons[operator]: value}})
+        elif operator == 'eq':           # Exact match
+            conditions.append({col_name: value})
+        elif operator == 'contains':     # Substring match (same as native filtering)
+            conditions.append({col_name: {"$regex": re.escape(str(value))}})
+        elif operator == 'datestartswith': # Prefix match, can use an index
+            conditions.append({col_name: {"$regex": "^" + re.escape(str(value))}})
+    return {"$and": conditions} if conditions else {}
+
+# Helper function to combine the rescue type query with the DataTable filter
+def combine_queries(*queries):
+    queries = [q for q in queries if q] # Ignore empty queries
+    if len(queries) == 0:
+        return {}
+    return queries[0] if len(queries) == 1 else {"$and": queries}
+
+# Fields maintained for MongoDB only (ObjectID and arrays are not compatible with DataTable)
+INTERNAL_FIELDS = ['_id', RESCUE_TAGS_FIELD, LOCATION_FIELD, MODIFIED_FIELD]
+
+CHUNK_SIZE = 5000       # Documents read and written at a time while streaming an export
+
+# --- Schema --- #
+# The layout only needs the column list: it comes from a sample of the collection,
+# cached for SCHEMA_TTL seconds, instead of loading the whole collection at startup
+SCHEMA_SAMPLE_SIZE = 1000 # Documents sampled to discover the columns
+SCHEMA_TTL = 3600         # Seconds before the column list is sampled again
+# Columns of the AAC outcomes export, used while MongoDB cannot be sampled
+DEFAULT_COLUMNS = ["age_upon_outcome", "animal_id", "animal_type", "breed", "color",
+                   "date_of_birth", "datetime", "monthyear", "name", "outcome_subtype",
+                   "outcome_type", "sex_upon_outcome", "location_lat", "location_long",
+                   "age_upon_outcome_in_weeks"]
+schema_cache = {"columns": None, "sampled_at": 0}
+
+# Helper function returning the DataTable columns from the cached schema
+def get_columns():
+    if schema_cache["columns"] and time.monotonic() - schema_cache["sampled_at"] < SCHEMA_TTL:
+        return schema_cache["columns"]
+    columns = [f for f in get_shelter().sample_fields(SCHEMA_SAMPLE_SIZE) if f not in INTERNAL_FIELDS]
+    if not columns:                     # Empty collection or MongoDB unavailable
+        return DEFAULT_COLUMNS
+    schema_cache.update(columns=columns, sampled_at=time.monotonic())
+    return columns
+
+# --- Summary Table for Dataset Cardinality --- #
+# Computed on demand inside MongoDB; fields with many distinct values are counted
+# approximately with a HyperLogLog sketch instead of collecting every distinct value
+SKETCH_FIELDS = ["animal_id", "name", "datetime", "date_of_birth", "monthyear",
+                 "location_lat", "location_long"]
+SUMMARY_COLUMNS = ["Field", "Unique Values", "Counting", "Sample Values", "Cardinality Classification"]
+
+# Latest summary and the time it was computed (refreshed by the "Update Summary" button)
+# (kept on disk instead when the summary is computed by a background worker, see BACKGROUND)
+summary_cache = {"data": None, "computed_at": None, "changes": 0} # changes: writes since computed_at
+
+# Helper function counting the writes the summary does not include yet (change watcher)
+def summary_outdated(batch):
+    summary_cache["changes"] = summary_cache.get("changes", 0) + len(batch)
+
+# Helper function to categorize columns based on their cardinality (number of unique values)
+def classify_cardinality(unique_count):
     if unique_count <= 5:
-        category_flag = "Categorical (up to 5 options)"
+        return "Categorical (up to 5 options)"
     elif unique_count <= 20:
-        category_flag = "Semi-Categorical (5 to 20 options)"
+        return "Semi-Categorical (5 to 20 options)"
     elif unique_count <= 50:
-        category_flag = "Moderate-Cardinality (20 to 50 options)"
+        return "Moderate-Cardinality (20 to 50 options)"
     else:
-        category_flag = "High-Cardinality (more than 50 options)"
+        return "High-Cardinality (more than 50 options)"
+
+# Helper function to compute the summary rows from MongoDB
+def calculate_summary():
+    fields = [f for f in get_shelter().sample_fields() if f not in INTERNAL_FIELDS] # Current schema
+    cardinality = get_shelter().field_cardinality(fields, SKETCH_FIELDS)             # Counted by MongoDB
 
-    summary_data.append({ # Append dictionary with column analysis to summary_data list
-        "Field": col,                                          # Column name
-        "Unique Values": unique_count,                         # Number of unique values
-        "Sample Values": ", ".join(map(str, unique_vals[:5])), # Show first 5 unique values
-        "Cardinality Classification": category_flag            # Descriptive label
-    })
+    summary_data = [] # Initialize empty list to store summary information for each column
+    for col in fields:
+        if col not in cardinality:
+            continue
+        stats = cardinality[col]
+        summary_data.append({ # Append dictionary with column analysis to summary_data list
+            "Field": col,                                              # Column name
+            "Unique Values": stats["count"],                           # Number of unique values
+            "Counting": "Approximate" if stats["approximate"] else "Exact",
+            "Sample Values": ", ".join(map(str, stats["sample"])),     # Show up to 5 unique values
+            "Cardinality Classification": classify_cardinality(stats["count"]) # Descriptive label
+        })
 
-summary_df = pd.DataFrame(summary_data) # Convert the lists above into a pandas DataFrame
+    # Keep the result with its freshness timestamp
+    for key, value in {"data": summary_data, "computed_at": datetime.now(), "changes": 0}.items():
+        summary_cache[key] = value
+    return summary_data
 
 # Style rules | Color-coding based on classification
 card_col = "Cardinality Classification" # Column name for classification
@@ -154,12 +306,35 @@ summary_style = [
     }
 ]
 
-#########################
-# Encode image for Dash #
-#########################
+########################
+# Static logo for Dash #
+########################
+# Served by Dash from the assets/ folder (cached by the browser, not embedded in the layout)
 image_filename = 'Grazioso Salvare Logo.png' # Define the filename of the logo image
-# Read the image file, encode it in base64, and decode to ASCII string for HTML embedding
-encoded_image = base64.b64encode(open(image_filename, 'rb').read()).decode('ascii')
+
+################
+# Map defaults #
+################
+MAP_CENTER = [30.75, -97.48] # Austin, TX
+MAP_ZOOM   = 10              # Default zoom level
+# Fields needed to place and describe an animal on the map
+MAP_FIELDS = ["location_lat", "location_long", "name", "breed", "age_upon_outcome", "sex_upon_outcome"]
+
+##################
+# Top candidates #
+##################
+TOP_K = 10 # Ranked candidates shown for the active rescue type
+TOP_FIELDS = ["name", "animal_id", "breed", "age_upon_outcome", "datetime"]
+TOP_COLUMNS = ["Rank", "Score", "Name", "Animal ID", "Breed", "Age", "Outcome Date",
+               "Distance (km)", "Age Fit", "Breed Match", "Recency", "Proximity"]
+
+##################
+# Outcome trends #
+##################
+# Read from the pre-aggregated rollups (python Shelter_CLI.py rebuild-rollups builds them)
+TREND_PERIODS = [{"label": "Monthly", "value": "month"}, {"label": "Daily", "value": "day"}]
+TREND_GROUPS = [{"label": "Outcome type", "value": "outcome_type"},
+                {"label": "Animal type", "value": "animal_type"}]
 
 ##############################
 # Column visibility defaults #
@@ -173,221 +348,462 @@ HIDDEN_COLS_DEFAULT = [
     "location_long", # Longitude, same as above
     "age_upon_outcome_in_weeks" # Used for filtering, but no need to show this too
 ]
-# Set columns visibility
-VISIBLE_BY_DEFAULT = [col for col in df.columns if col not in HIDDEN_COLS_DEFAULT]
+
+# Diagnostics panel listing slow operations (DASHBOARD_DIAGNOSTICS=1), the /metrics endpoint is always on
+DIAGNOSTICS = os.environ.get('DASHBOARD_DIAGNOSTICS', '0') == '1'
+DIAGNOSTICS_INTERVAL = 5000 # Refresh period of the panel in milliseconds
+DIAGNOSTICS_COLUMNS = ["Time", "Kind", "Operation", "Milliseconds", "Detail"]
+
+# Background callbacks run the cardinality summary (a full collection scan) in separate worker
+# processes, so it does not block the web server for every other user (requires dash[diskcache]).
+# Workers are forked processes: the caches of this process (query cache, keyset boundaries,
+# snapshot) do not reach them, so the table, map and charts stay regular callbacks
+try:
+    import diskcache, multiprocess, psutil # Dependencies of the DiskcacheManager
+    from dash import DiskcacheManager
+except ImportError:
+    diskcache = None
+BACKGROUND = diskcache is not None # Run the summary in background when available
+if BACKGROUND: # Summary freshness shared by the worker computing it and the change watcher counting writes
+    summary_cache = diskcache.Cache("./cache/summary")
+    summary_cache.add("computed_at", None) # Keep the values of the other processes
+    summary_cache.add("changes", 0)
 
 ###########################
 # Dashboard Layout / View #
 ###########################
-# Initialize the Dash application with a specific name for internal reference
-app = JupyterDash('CS340Dashboard')
-
 # Define the main layout structure of the dashboard using nested HTML components
-app.layout = html.Div([
-
-    # Inject custom CSS to hide the superfluous "Toggle Columns" button 
-    # (Created automatically by Dash when we hide some columns)
-    html.Link(rel='stylesheet', 
-              href='data:text/css,.dash-table-container%20.show-hide%7Bdisplay:none!important%7D'),
-
-    # Logo and title
-    html.Div([
-        html.A( # Anchor tag to make logo clickable (links to SNHU (client) website)
-            href="https://www.snhu.edu",    # Hyperling
-            target="_blank",                # Open in new tab
-            children=[                      # Children elements inside the anchor tag
-                html.Img(                   # Image element for logo
-                    src='data:image/png;base64,{}'.format(encoded_image), # Base64 encoded image source
-                    style={"width": "80px"} # Inline CSS for image width
-                )
+# (built on every page load from the cached schema, no data is embedded)
+def serve_layout():
+    columns = get_columns()
+    # Set columns visibility
+    visible_by_default = [col for col in columns if col not in HIDDEN_COLS_DEFAULT]
+
+    return html.Div([
+
+        # Inject custom CSS to hide the superfluous "Toggle Columns" button 
+        # (Created automatically by Dash when we hide some columns)
+        html.Link(rel='stylesheet', 
+                  href='data:text/css,.dash-table-container%20.show-hide%7Bdisplay:none!important%7D'),
+
+        # Logo and title
+        html.Div([
+            html.A( # Anchor tag to make logo clickable (links to SNHU (client) website)
+                href="https://www.snhu.edu",    # Hyperling
+                target="_blank",                # Open in new tab
+                children=[                      # Children elements inside the anchor tag
+                    html.Img(                   # Image element for logo
+                        src=get_asset_url(image_filename), # Static asset served from assets/
+                        style={"width": "80px"} # Inline CSS for image width
+                    )
+                ]
+            ),
+            html.H1( # Main heading for dashboard title
+                [
+                    "Grazioso Salvare | ",                                         # Main title text
+                    html.Span("GCZ79", style={"fontSize": "16px"}) # Small superscript
+                ],
+                style={"margin": "0", "padding": "0", "alignSelf": "center"}       # H1 styling
+            )
+        ],
+        style={
+            "display": "flex",          # Flexbox layout
+            "flexDirection": "row",     # Horizontal alignment
+            "justifyContent": "center", # Center horizontally
+            "alignItems": "center",     # Center vertically
+            "gap": "10px"               # Space between logo and title
+        }),
+
+        html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
+
+        # Button row for rescue type filtering
+        html.Div(className='buttonRow',     # Div for button container with CSS class
+                 style={'display': 'flex'}, # Flexbox display
+                 children=[                 # Children elements inside button container
+                     html.Span("Rescue type:", style={'marginRight': '10px'}),
+                     html.Button(id='btn1', n_clicks=0, style={                #-- Water rescue button --
+                                 "border": "3px solid #000000",                # Black border
+                                 "backgroundColor": "#ADD8E6",                 # Light blue background
+                                 "color": "#000000",                           # Black text
+                                 "marginRight": "10px",                        # Right margin
+                                 "padding": "6px 12px",                        # Internal padding
+                                 "borderRadius": "6px"},                       # Rounded corners
+                                 children='Water'),                            # Button text
+                     html.Button(id='btn2', n_clicks=0, style={  #-- Mountain/Wilderness rescue button --
+                                 "border": "3px solid #000000",
+                                 "backgroundColor": "#90EE90",                 # Light green background
+                                 "color": "#000000",
+                                 "marginRight": "10px",
+                                 "padding": "6px 12px",
+                                 "borderRadius": "6px"},
+                                 children='Mountain or Wilderness'),
+                     html.Button(id='btn3', n_clicks=0, style={ #-- Disaster/Individual Tracking button --
+                                 "border": "3px solid #000000",
+                                 "backgroundColor": "#F08080",                 # Light coral background
+                                 "color": "#000000",
+                                 "marginRight": "10px",
+                                 "padding": "6px 12px",
+                                 "borderRadius": "6px"},
+                                 children='Disaster or Individual Tracking'),
+                     html.Button(id='btn4', n_clicks=0, style={                #-- Reset filters button --
+                                 "border": "3px solid #000000",
+                                 "backgroundColor": "#FFFFFF",                 # White background
+                                 "color": "#000000",
+                                 "marginRight": "10px",
+                                 "padding": "6px 12px",
+                                 "borderRadius": "6px"},
+                                 children='Reset Filters'),
+                 ]),
+    
+        html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
+
+        # Main DataTable | Show 10 results per page, hide selected columns
+        html.Div(
+            id="datatable-container",                   # Unique identifier for callbacks to reference
+            children=[                                  # List of components inside this div
+                dcc.Store(id='rescue-filter-store'),    # ID of the active rescue type button
+                dcc.Store(id='live-position-store'),    # Last change applied to this page (live updates)
+                dcc.Interval(id='live-interval', interval=LIVE_INTERVAL,
+                             disabled=not LIVE_UPDATES), # Check for changes only when enabled
+                html.Div(id='live-status',              # Number of live changes received
+                         style={"fontSize": "12px", "color": "#666"}),
+                html.Div([                              # Downloads of the whole filtered result
+                    html.Span("Export: ", style={"marginRight": "6px"}),
+                    html.A("CSV", id='export-csv-link', href='', style={"marginRight": "10px"}),
+                    html.A("Parquet", id='export-parquet-link', href='',
+                           style={} if PARQUET_AVAILABLE else {"display": "none"}), # Requires pyarrow
+                ], style={"fontSize": "12px", "margin": "4px 0"}),
+                dash_table.DataTable(                   # Interactive table component from Dash
+                    id='datatable-id',                  # Unique identifier for callback targeting
+                    columns=[{"name": i, "id": i, "deletable": False, "selectable": True} # Column configuration
+                             for i in columns],
+                    data=[],                            # Filled page by page by the filter_data callback
+                    page_action="custom",               # Paging done by MongoDB (only the visible page is sent)
+                    page_current=0,                     # Start from the first page
+                    filter_action="custom",             # Filtering translated into a MongoDB filter
+                    filter_query="",                    # No column filter initially
+                    sort_action="custom",               # Sorting done by MongoDB
+                    sort_mode="multi",                  # Allow sorting by multiple columns
+                    sort_by=[],                         # No sorting initially
+                    selected_rows=[0],                  # Initially select first row
+                    row_selectable="single",            # For mapping callback to function properly
+                    page_size=10,                       # Number of rows per page
+                    hidden_columns=HIDDEN_COLS_DEFAULT, # Columns to hide initially
+                ),
             ]
         ),
-        html.H1( # Main heading for dashboard title
-            [
-                "Grazioso Salvare | ",                                         # Main title text
-                html.Span("GCZ79", style={"fontSize": "16px"}) # Small superscript
-            ],
-            style={"margin": "0", "padding": "0", "alignSelf": "center"}       # H1 styling
-        )
-    ],
-    style={
-        "display": "flex",          # Flexbox layout
-        "flexDirection": "row",     # Horizontal alignment
-        "justifyContent": "center", # Center horizontally
-        "alignItems": "center",     # Center vertically
-        "gap": "10px"               # Space between logo and title
-    }),
-
-    html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
-
-    # Button row for rescue type filtering
-    html.Div(className='buttonRow',     # Div for button container with CSS class
-             style={'display': 'flex'}, # Flexbox display
-             children=[                 # Children elements inside button container
-                 html.Span("Rescue type:", style={'marginRight': '10px'}),
-                 html.Button(id='btn1', n_clicks=0, style={                #-- Water rescue button --
-                             "border": "3px solid #000000",                # Black border
-                             "backgroundColor": "#ADD8E6",                 # Light blue background
-                             "color": "#000000",                           # Black text
-                             "marginRight": "10px",                        # Right margin
-                             "padding": "6px 12px",                        # Internal padding
-                             "borderRadius": "6px"},                       # Rounded corners
-                             children='Water'),                            # Button text
-                 html.Button(id='btn2', n_clicks=0, style={  #-- Mountain/Wilderness rescue button --
-                             "border": "3px solid #000000",
-                             "backgroundColor": "#90EE90",                 # Light green background
-                             "color": "#000000",
-                             "marginRight": "10px",
-                             "padding": "6px 12px",
-                             "borderRadius": "6px"},
-                             children='Mountain or Wilderness'),
-                 html.Button(id='btn3', n_clicks=0, style={ #-- Disaster/Individual Tracking button --
-                             "border": "3px solid #000000",
-                             "backgroundColor": "#F08080",                 # Light coral background
-                             "color": "#000000",
-                             "marginRight": "10px",
-                             "padding": "6px 12px",
-                             "borderRadius": "6px"},
-                             children='Disaster or Individual Tracking'),
-                 html.Button(id='btn4', n_clicks=0, style={                #-- Reset filters button --
-                             "border": "3px solid #000000",
-                             "backgroundColor": "#FFFFFF",                 # White background
-                             "color": "#000000",
-                             "marginRight": "10px",
-                             "padding": "6px 12px",
-                             "borderRadius": "6px"},
-                             children='Reset Filters'),
-             ]),
-    
-    html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
-
-    # Main DataTable | Show 10 results per page, hide selected columns
-    html.Div(
-        id="datatable-container",                   # Unique identifier for callbacks to reference
-        children=[                                  # List of components inside this div
-            dash_table.DataTable(                   # Interactive table component from Dash
-                id='datatable-id',                  # Unique identifier for callback targeting
-                columns=[{"name": i, "id": i, "deletable": False, "selectable": True} # Column configuration
-                         for i in df.columns],
-                data=df.to_dict('records'),         # Convert DataFrame to list of dictionaries for DataTable
-                filter_action="native",             # Enable built-in column filtering
-                sort_action="native",               # Enable built-in column sorting
-                sort_mode="multi",                  # Allow sorting by multiple columns
-                selected_rows=[0],                  # Initially select first row
-                row_selectable="single",            # For mapping callback to function properly
-                page_size=10,                       # Number of rows per page
-                hidden_columns=HIDDEN_COLS_DEFAULT, # Columns to hide initially
-            ),
-        ]
-    ),
     
-    html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
+        html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
 
-    # Map and Chart container | Collapsible, open by default
-    html.Details([
-        html.Summary("🗺️ Map & Summary Chart"), # Summary/title for collapsible section
+        # Map and Chart container | Collapsible, open by default
+        html.Details([
+            html.Summary("🗺️ Map & Summary Chart"), # Summary/title for collapsible section
         
-        # Flex container for map + pie chart
-        html.Div([ # Container div for map and chart
-            # Map
-            html.Div(
-                id='map-id', # Div for map with unique ID
-                style={"flex": "1", "padding": "5px", "minHeight": "400px"} 
-            ),
+            # Flex container for map + pie chart
+            html.Div([ # Container div for map and chart
+                # Map | Built once, callbacks only update its layers
+                html.Div(
+                    id='map-id', # Div for map with unique ID
+                    style={"flex": "1", "padding": "5px", "minHeight": "400px"},
+                    children=[
+                        dcc.Store(id='map-region-store'),                # Filter, zoom and region of the shown clusters
+                        dl.Map(                                          # Dash Leaflet Map component
+                            id='map-leaflet-id',                         # Zoom/viewport for callbacks
+                            style={'width': '750px', 'height': '500px'}, # Map dimensions
+                            center=MAP_CENTER,                           # Austin, TX
+                            zoom=MAP_ZOOM,                               # Default zoom level
+                            children=[
+                                dl.TileLayer(id="base-layer-id"),        # Base map layer
+                                dl.GeoJSON(id='cluster-layer-id',        # Clustered animals of the filter
+                                           pointToLayer={'variable': 'shelterMap.clusterMarker'}), # Sized cluster circles (assets/map_clusters.js)
+                                dl.LayerGroup(id='selected-marker-id')   # Highlight of the selected row
+                            ]
+                        )
+                    ]
+                ),
     
-            # Pie chart
-            html.Div(
-                dcc.Graph(id='pie-chart-id'), # Plotly graph component for pie chart
-                style={"flex": "1", "padding": "5px", "minHeight": "400px"}
-            )
-        ], style={"display": "flex", "flexDirection": "row", "width": "100%"}) # Flexbox row layout
-    ], open=True), # Collapsible section initially open
+                # Pie chart
+                html.Div(
+                    dcc.Graph(id='pie-chart-id'), # Plotly graph component for pie chart
+                    style={"flex": "1", "padding": "5px", "minHeight": "400px"}
+                )
+            ], style={"display": "flex", "flexDirection": "row", "width": "100%"}) # Flexbox row layout
+        ], open=True), # Collapsible section initially open
     
-    html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
-
-    # Column Visibility: show/hide columns | Collapsible, closed by default
-    ## Helps users focus on relevant data by hiding unnecessary columns
-    html.Details([ # Collapsible section for column visibility controls
-        html.Summary("📦 Column Visibility"), # Section title with icon
-
-        html.Div([ # Container for checklist and instructions
-            dcc.Checklist(
-                id="column-visibility-checklist", # Unique ID for callbacks
-                options=[{"label": col, "value": col} for col in df.columns], # Options from DataFrame columns
-                value=VISIBLE_BY_DEFAULT, # Apply column exclusions: Default checked items
-                labelStyle={'display': 'block'} # CSS for label display
+        html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
+
+        # Top candidates of the active rescue type, ranked by suitability score | Open by default
+        html.Details([
+            html.Summary("🏅 Top Rescue Candidates"), # Section title with icon
+            html.Div(id='top-candidates-caption',      # Profile and reference location of the ranking
+                     style={"fontSize": "12px", "color": "#666", "margin": "6px 0"}),
+            dash_table.DataTable(
+                id='top-candidates-table',            # Best scored candidates, best first
+                columns=[{"name": i, "id": i} for i in TOP_COLUMNS],
+                style_cell={'textAlign': 'left'},
+                style_header={'fontWeight': 'bold'},
             ),
-            html.Div(  # Help text for users
-                "Check a box to show a column; uncheck to hide it.", # Instruction text
-                style={"fontSize": "12px", "marginTop": "6px", "color": "#666"} # Styled help text
-            )
-        ], style={"margin": "10px"}) # Container margin
-    ], open=False), # Collapsible section initially closed
+        ], open=True),
 
-    html.Hr(style={"border": "none", "height": "3px", "backgroundColor": "#c9134b"}), # Break line
+        html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
 
-    # Dataset Summary | Collapsible, closed by default
-    html.Details([ # Collapsible section for dataset summary
-        html.Summary("📝 Dataset Cardinality Summary"), # Section title with icon
+        # Outcomes over time of the active rescue type (rollups only) | Open by default
+        html.Details([
+            html.Summary("📈 Outcome Trends"), # Section title with icon
+            html.Div([ # Period and grouping of the trend lines
+                dcc.RadioItems(id='trend-period', options=TREND_PERIODS, value="month", inline=True),
+                dcc.RadioItems(id='trend-group', options=TREND_GROUPS, value="outcome_type", inline=True),
+            ], style={"display": "flex", "gap": "30px", "margin": "6px 0"}),
+            dcc.Graph(id='trend-chart-id'), # Plotly line chart of the outcome counts
+        ], open=True),
 
-        html.Button( # Button to trigger summary generation/update
-            "Update Summary",           # Button text
-            id="update-summary-btn",    # Unique button ID
-            n_clicks=0,                 # Click counter initialization
-            style={"margin": "10px 0"}  # Button styling with vertical margin
-        ),
+        html.Hr(style={"border": "none", "height": "2px", "backgroundColor": "#c9134b"}), # Break line
+
+        # Column Visibility: show/hide columns | Collapsible, closed by default
+        ## Helps users focus on relevant data by hiding unnecessary columns
+        html.Details([ # Collapsible section for column visibility controls
+            html.Summary("📦 Column Visibility"), # Section title with icon
+
+            html.Div([ # Container for checklist and instructions
+                dcc.Checklist(
+                    id="column-visibility-checklist", # Unique ID for callbacks
+                    options=[{"label": col, "value": col} for col in columns], # Options from schema columns
+                    value=visible_by_default, # Apply column exclusions: Default checked items
+                    labelStyle={'display': 'block'} # CSS for label display
+                ),
+                html.Div(  # Help text for users
+                    "Check a box to show a column; uncheck to hide it.", # Instruction text
+                    style={"fontSize": "12px", "marginTop": "6px", "color": "#666"} # Styled help text
+                )
+            ], style={"margin": "10px"}) # Container margin
+        ], open=False), # Collapsible section initially closed
 
-        html.Div(id="summary-table-container"), # Container div where summary table will be inserted
-    ], open=False), # Collapsible section initially closed
+        html.Hr(style={"border": "none", "height": "3px", "backgroundColor": "#c9134b"}), # Break line
 
-    html.Hr(style={"border": "none", "height": "3px", "backgroundColor": "#c9134b"}), # Break line
-])
+        # Dataset Summary | Collapsible, closed by default
+        html.Details([ # Collapsible section for dataset summary
+            html.Summary("📝 Dataset Cardinality Summary"), # Section title with icon
+
+            html.Button( # Button to trigger summary generation/update
+                "Update Summary",           # Button text
+                id="update-summary-btn",    # Unique button ID
+                n_clicks=0,                 # Click counter initialization
+                style={"margin": "10px 0"}  # Button styling with vertical margin
+            ),
+
+            html.Div(id="summary-table-container"), # Container div where summary table will be inserted
+        ], open=False), # Collapsible section initially closed
+
+        html.Hr(style={"border": "none", "height": "3px", "backgroundColor": "#c9134b"}), # Break line
+
+        # Diagnostics: recent slow MongoDB commands and callbacks | Hidden unless enabled
+        html.Details([
+            html.Summary("🩺 Diagnostics"), # Section title with icon
+            dash_table.DataTable(
+                id='diagnostics-table',     # Slow operations of this server process
+                columns=[{"name": i, "id": i} for i in DIAGNOSTICS_COLUMNS],
+                page_size=10,
+                style_cell={'textAlign': 'left', 'fontSize': '12px'}
+            ),
+            html.Div(f"Operations slower than {metrics.slow_ms} ms; all metrics at /metrics",
+                     style={"fontSize": "12px", "marginTop": "6px", "color": "#666"}),
+            dcc.Interval(id='diagnostics-interval', interval=DIAGNOSTICS_INTERVAL,
+                         disabled=not DIAGNOSTICS) # Refresh only when the panel is enabled
+        ], open=False, style={} if DIAGNOSTICS else {"display": "none"}),
+    ])
 
 ###############################################
 # Interaction Between Components / Controller #
 ###############################################
 
 # --- Buttons ---
-# Callback to filter DataTable data based on button clicks
-@app.callback(                      # Decorator to define a Dash callback
-    Output('datatable-id', 'data'), # Output: Update the data property of DataTable
-    [Input('btn1', 'n_clicks'),     # Input triggers: Button click counters
+# Callback to remember the active rescue type and go back to the first page
+@callback(
+    [Output('rescue-filter-store', 'data'),     # Output: ID of the clicked button
+     Output('datatable-id', 'page_current')],   # Output: Reset pager to the first page
+    [Input('btn1', 'n_clicks'),                 # Input triggers: Button click counters
      Input('btn2', 'n_clicks'),
      Input('btn3', 'n_clicks'),
-     Input('btn4', 'n_clicks')]
+     Input('btn4', 'n_clicks')],
+    prevent_initial_call=True                   # Nothing to remember before the first click
 )
-def filter_data(btn1, btn2, btn3, btn4): # Callback function definition
-    # Filter database based on rescue type button clicks
-    # Uses centralized query function and error handling
+@timed_callback
+def set_rescue_filter(btn1, btn2, btn3, btn4):
     ctx = callback_context # Get callback context to identify trigger source
+    # Extract the ID of the clicked button from callback context
+    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    return button_id, 0
 
-    if not ctx.triggered: # determine which button triggered the callback
-        query = {}        # if no button was clicked, show full dataset
-    else: 
-        # otherwise, extract the ID of the clicked button from callback context
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        # Use centralized query function (DRY principle)
-        query = get_rescue_query(button_id)
-    
-    try: # fetch data from MongoDB based on the query and convert it into a pandas DataFrame
-        df2 = pd.DataFrame.from_records(shelter.read(query))
-    except Exception as e:
-        print(f"Error querying database: {e}") # Print error to console
-        return []                              # Return empty list if query fails
+# Callback to fetch the visible DataTable page from MongoDB
+@callback(
+    [Output('datatable-id', 'data'),           # Output: Rows of the current page
+     Output('datatable-id', 'page_count')],    # Output: Total number of pages
+    [Input('rescue-filter-store', 'data'),     # Input: Active rescue type button
+     Input('datatable-id', 'page_current'),    # Input: Current page number
+     Input('datatable-id', 'page_size'),       # Input: Rows per page
+     Input('datatable-id', 'sort_by'),         # Input: Column sorting
+     Input('datatable-id', 'filter_query'),    # Input: Column filters
+     Input('column-visibility-checklist', 'value')] # Input: Visible columns (projection)
+)
+@timed_callback
+def filter_data(button_id, page_current, page_size, sort_by, filter_query, visible_columns): # Callback function definition
+    # Filter database based on rescue type button and DataTable filters
+    return fetch_page(button_id, page_current, page_size, sort_by, filter_query, visible_columns)
+
+# Helper function returning the fields read for the table: visible columns plus the fields
+# of the map marker and popup of the selected row (None reads every field)
+def page_projection(visible_columns):
+    if visible_columns is None:
+        return None
+    return list(dict.fromkeys(list(visible_columns) + MAP_FIELDS))
+
+# Helper function returning the MongoDB (query, sort) of the table state (pages and exports)
+def table_query(button_id, filter_query, sort_by):
+    query = combine_queries(
+        get_rescue_query(button_id),           # Rescue type query (DRY principle)
+        translate_filter_query(filter_query)   # Column filters typed by the user
+    )
+    # Translate DataTable sorting into MongoDB sort specification (known columns only)
+    columns = get_columns() if sort_by else []
+    sort = [(col['column_id'], ASCENDING if col.get('direction') == 'asc' else DESCENDING)
+            for col in (sort_by or []) if isinstance(col, dict) and valid_column(col.get('column_id'), columns)]
+    return query, sort
+
+# Helper function returning (rows, page count) of a DataTable page
+# Uses centralized query function and error handling
+# Hidden columns are not read from MongoDB (or the snapshot) and not sent to the browser
+def fetch_page(button_id, page_current, page_size, sort_by, filter_query, visible_columns):
+    projection = page_projection(visible_columns)
+    query, sort = table_query(button_id, filter_query, sort_by)
+
+    # Unsorted pages come from the snapshot when it is enabled and up to date
+    page = None
+    if get_snapshot() is not None and not sort:
+        page = get_snapshot().read_page(query, page=page_current or 0, page_size=page_size,
+                                        projection=projection)
+    # Otherwise fetch only the visible page from MongoDB
+    if page is None:
+        page = get_source(button_id).read_page(query, projection=projection, sort=sort,
+                                       page=page_current or 0, page_size=page_size)
+    rows, total = page
+
+    # remove MongoDB internal fields as they are not compatible with Dash DataTable
+    # (copies are made, the documents may be shared through the query cache)
+    # The ObjectID becomes the DataTable row id (not a column)
+    rows = [dict({k: v for k, v in row.items() if k not in INTERNAL_FIELDS}, id=str(row.get('_id', '')))
+            for row in rows]
 
-    # remove MongoDB internal _id field as it is not compatible with Dash DataTable
-    if "_id" in df2.columns:                    # Check if _id exists in new DataFrame
-        df2.drop(columns=["_id"], inplace=True) # Remove _id column
+    # Number of pages for the pager (at least one so the pager stays visible)
+    page_count = max(1, -(-total // page_size))
+    return rows, page_count
 
-    # convert DataFrame back to a list of dictionaries for DataTable
-    return df2.to_dict('records')
+# --- Export ---
+# Helper function streaming the export of a table state (arguments of the export links)
+# Chunks come straight from the cursor, the full result is never held in memory
+def export_source(args):
+    try:
+        sort_by = json.loads(args.get('sort', '[]'))
+    except ValueError:
+        sort_by = []
+    query, sort = table_query(args.get('button') or None, args.get('filter', ''), sort_by)
+    if 'column' in args: # Visible columns ('' alone when every column is unchecked)
+        columns = get_columns()
+        fields = [field for field in args.getlist('column') if valid_column(field, columns)]
+    else:                # All columns by default
+        fields = get_columns()
+    if not fields:       # Nothing to export (rejected by the export route)
+        return iter(()), fields
+    projection = dict.fromkeys(fields, 1) | {'_id': 0}
+    chunks = get_source(args.get('button') or None).read_iter(query, projection=projection, sort=sort or None,
+                                                              batch_size=CHUNK_SIZE, chunk_size=CHUNK_SIZE,
+                                                              strict=True) # Failed read: no truncated file
+    return chunks, fields
+
+# Callback to point the export links to the current filter, sorting and visible columns
+@callback(
+    [Output('export-csv-link', 'href'),              # Output: CSV download URL
+     Output('export-parquet-link', 'href')],         # Output: Parquet download URL
+    [Input('rescue-filter-store', 'data'),           # Input: Active rescue type button
+     Input('datatable-id', 'filter_query'),          # Input: Column filters
+     Input('datatable-id', 'sort_by'),               # Input: Column sorting
+     Input('column-visibility-checklist', 'value')]  # Input: Exported columns
+)
+@timed_callback
+def update_export_links(button_id, filter_query, sort_by, visible_columns): # Callback function
+    arguments = urlencode({'button': button_id or '', 'filter': filter_query or '',
+                           'sort': json.dumps(sort_by or []),
+                           'column': [''] if visible_columns == [] else visible_columns or []}, # '': none
+                          doseq=True)
+    return (dash.get_relative_path(f'/export/csv?{arguments}'),
+            dash.get_relative_path(f'/export/parquet?{arguments}'))
+
+# --- Live updates ---
+# Callback sending the rows of the visible page changed since the last check
+# (a Patch of the changed positions instead of the whole page)
+@callback(
+    [Output('datatable-id', 'data', allow_duplicate=True),       # Output: Changed rows only
+     Output('datatable-id', 'page_count', allow_duplicate=True), # Output: Pages after inserts/deletes
+     Output('live-position-store', 'data'),                      # Output: Last change applied
+     Output('live-status', 'children')],                         # Output: Live update status
+    [Input('live-interval', 'n_intervals')],                     # Input: Check timer
+    [State('rescue-filter-store', 'data'),                       # State: Current filter, page and rows
+     State('datatable-id', 'page_current'),
+     State('datatable-id', 'page_size'),
+     State('datatable-id', 'sort_by'),
+     State('datatable-id', 'filter_query'),
+     State('column-visibility-checklist', 'value'),
+     State('datatable-id', 'data'),
+     State('live-position-store', 'data')],
+    prevent_initial_call=True
+)
+@timed_callback
+def push_live_changes(n_intervals, button_id, page_current, page_size, sort_by, filter_query,
+                      visible_columns, current_rows, seen): # Callback function
+    live = get_watcher()
+    if live is None:
+        return dash.no_update, dash.no_update, dash.no_update, ""
+    # The page remembers the resume token position of the last change it got (the same in every
+    # server process, so successive checks may reach different workers) and how many it got
+    if seen is None:                    # Page loaded after the current position, nothing to send
+        seen, changes = {'position': live.position, 'received': 0}, []
+    else:
+        changes, position, _ = live.changes_since(seen['position'])
+        seen = {'position': max(seen['position'], position), 'received': seen['received'] + len(changes)}
+    status = f"Live: {seen['received']} changes received" + (
+        f", summary outdated by {summary_cache.get('changes', 0)}" if summary_cache.get("computed_at") else "")
+    if not changes:
+        return dash.no_update, dash.no_update, seen, status
+
+    # Same page again: caches were invalidated (and the snapshot updated) by the watcher
+    rows, page_count = fetch_page(button_id, page_current, page_size, sort_by, filter_query, visible_columns)
+    current_rows = current_rows or []
+    patch = dash.Patch()
+    changed = 0
+    # Rows are matched by id, so a row removed above only costs one delete, not a shifted page
+    # (last differences first: the positions of the earlier ones stay valid in the browser)
+    matcher = SequenceMatcher(None, [row.get('id') for row in current_rows],
+                              [row['id'] for row in rows], autojunk=False)
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag == 'equal':                               # Same rows, maybe updated fields
+            for offset, row in enumerate(rows[j1:j2]):
+                if current_rows[i1 + offset] != row:
+                    patch[i1 + offset] = row
+                    changed += 1
+            continue
+        for index in range(i2 - 1, i1 - 1, -1):          # Rows that left the page
+            del patch[index]
+        for offset, row in enumerate(rows[j1:j2]):       # Rows that entered the page
+            patch.insert(i1 + offset, row)
+        changed += (i2 - i1) + (j2 - j1)
+    return (patch if changed else dash.no_update), page_count, seen, status
 
 # --- Highlight columns ---
 # Callback to highlight selected columns in DataTable
-@app.callback(
+@callback(
     Output('datatable-id', 'style_data_conditional'), # Output: Update conditional styling
     [Input('datatable-id', 'selected_columns')]       # Input: Selected columns from DataTable
 )
+@timed_callback
 def update_styles(selected_columns):
     if not selected_columns: # Check for empty selection 
         return [] # Return empty style list
@@ -399,13 +815,14 @@ def update_styles(selected_columns):
 
 #--- Change Table background color based on filters --
 # Callback to match background color to rescue types buttons color
-@app.callback(
+@callback(
     Output("datatable-container", "style"), # Output: Update the style CSS of the container
     Input("btn1", "n_clicks"),              # Button 1 click count (Water rescue)
     Input("btn2", "n_clicks"),              # Button 2 click count (Mountain/Wilderness rescue)
     Input("btn3", "n_clicks"),              # Button 3 click count (Disaster/Individual Tracking rescue)
     Input("btn4", "n_clicks"),              # Button 4 click count (Reset)
 )
+@timed_callback
 def update_table_background(btn1, btn2, btn3, btn4):
     ctx = callback_context # Get callback context to determine which input triggered the callback
 
@@ -434,38 +851,51 @@ def update_table_background(btn1, btn2, btn3, btn4):
     return style             # Return the complete style dictionary to update the container           
 
 # --- Map ---
-# Callback to update map based on filtered data and selection
-@app.callback(
-    Output('map-id', "children"), # Output: Update children of map container div
-    [Input('datatable-id', "derived_viewport_data"), # Input: Currently visible/filtered data
+# Callback to update the clustered animals of the current filter
+# (animals of the region around the visible map area, grouped by grid cell in MongoDB;
+#  pans inside the region already shown, e.g. centering on the selected row, are ignored)
+@callback(
+    [Output('cluster-layer-id', 'data'),          # Output: GeoJSON of clusters and animals
+     Output('map-region-store', 'data')],         # Output: Filter, zoom and region shown
+    [Input('rescue-filter-store', 'data'),        # Input: Active rescue type button
+     Input('datatable-id', 'filter_query'),       # Input: Column filters
+     Input('map-leaflet-id', 'zoom'),             # Input: Current zoom level
+     Input('map-leaflet-id', 'bounds')],          # Input: Visible map area
+    [State('map-region-store', 'data')]           # State: Region already clustered
+)
+@timed_callback
+def update_map(button_id, filter_query, zoom, bounds, shown): # Callback function
+    zoom = zoom if zoom is not None else MAP_ZOOM
+    key = [button_id, filter_query, zoom]
+    if shown and shown.get('key') == key and region_contains(shown.get('region'), bounds):
+        return dash.no_update, dash.no_update     # Visible area already clustered
+
+    query = combine_queries(get_rescue_query(button_id), translate_filter_query(filter_query))
+    region = cluster_region(bounds, zoom) if bounds else None
+    if region:                                    # Restrict to the region (2dsphere index)
+        query = with_geo_filter(query, geo_within_bounds(region))
+
+    # Show all filtered results as clusters/markers
+    # Helps coordinate multiple appointments in close proximity
+    # (only one document per grid cell is transferred, results cached per filter/zoom/region)
+    with metrics.stage('map_clustering'):
+        groups = get_source(button_id).aggregate(cluster_pipeline(query, zoom))
+        return clusters_from_groups(groups), {'key': key, 'region': region}
+
+# Callback to highlight the selected row on the map (the map itself is not rebuilt)
+@callback(
+    [Output('selected-marker-id', 'children'),              # Output: Selected marker layer
+     Output('map-leaflet-id', 'viewport')],                 # Output: Center on selected marker
+    [Input('datatable-id', "derived_viewport_data"),        # Input: Currently visible data
      Input('datatable-id', "derived_virtual_selected_rows")] # Input: Currently selected row indices
 )
-def update_map(viewData, index): # Callback function with two inputs
-    # viewData = the filtered table data
+@timed_callback
+def update_selected_marker(viewData, index): # Callback function with two inputs
+    # viewData = the visible table page
     # index = list of selected row indices
-    
-    if viewData is None or len(viewData) == 0:               # Check for no data or empty data
-        return [                                             # Return default map when no data
-            dl.Map(                                          # If true: Dash Leaflet Map component
-                style={'width': '750px', 'height': '500px'}, # returns a map centered in
-                center=[30.75, -97.48],                      # Austin, TX
-                zoom=10,                                     # Default zoom level
-                children=[dl.TileLayer(id="base-layer-id")]  # Base map layer
-            )
-        ]
-
-    # Convert the dictionary data into a pandas DataFrame for easier manipulation
-    dff = pd.DataFrame.from_dict(viewData)
-
-    if dff.shape[1] < 15: # Check if the database has fewer than 15 columns
-        return [
-            dl.Map(                                          # If true
-                style={'width': '750px', 'height': '500px'}, # returns same map centered in
-                center=[30.75, -97.48],                      # Austin, TX
-                zoom=10,
-                children=[dl.TileLayer(id="base-layer-id")]
-            )
-        ]
+
+    if not viewData:                        # Check for no data or empty data
+        return [], {"center": MAP_CENTER, "transition": "panTo"}
 
     # Determine which row to display on the map with highlighted marker
     if index is None or len(index) == 0:    # If no rows are selected
@@ -473,133 +903,209 @@ def update_map(viewData, index): # Callback function with two inputs
     else:                                   # otherwise
         selected_row = index[0]             # use the first selected row
 
-    if selected_row >= len(dff):   # If row index exceeds the DataFrame length                 
-        selected_row = 0           # default to 0
+    if selected_row >= len(viewData):       # If row index exceeds the page length
+        selected_row = 0                    # default to 0
 
-    # Show all filtered results as markers, with selected one highlighted
-    # Helps coordinate multiple appointments in close proximity
-    markers = []                    # Initialize empty list for map markers
-    for idx, row in dff.iterrows(): # Loop through all rows in filtered DataFrame
-        # Check if this row is the selected one
-        is_selected = (idx == selected_row)
-        
-        # Create marker with different styling for selected vs unselected
-        marker = dl.Marker(
-            position=[row["location_lat"], row["location_long"]],   # Marker coordinates
-            children=[                             # Marker children (tooltip and popup)
-                dl.Tooltip(row["name"]),                      # Tooltip with animal name
-                dl.Popup([                             # Popup with detailed information
-                    html.H4("Animal Name: " + str(row["name"])),    # Animal name header
-                    html.P("Breed: " + str(row["breed"])),           # Breed information
-                    html.P("Age: " + str(row.get("age_upon_outcome", "Unknown"))), # Age
-                    html.P("Sex: " + str(row.get("sex_upon_outcome", "Unknown")))  # Sex
-                ])
-            ],
-            # Visual distinction for selected marker
-            icon=dict( # Red for selected, blue for others
-                iconUrl='https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-red.png' if is_selected 
-                        else 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-blue.png',
-                iconSize=[25, 41],     # Icon dimensions
-                iconAnchor=[12, 41]    # Icon anchor point
-            ) if is_selected else None # Only custom icon for selected, default for others 
-        )
-        markers.append(marker)         # Add marker to list
-
-    return [    # Return map with all markers
-        dl.Map( # Map component
-            style={'width': '750px', 'height': '500px'}, # Map dimensions
-            # Center on selected marker
-            center=[dff.iloc[selected_row]["location_lat"], dff.iloc[selected_row]["location_long"]],
-            zoom=10,                              # Zoom level
-            children=[                            # Map children layers
-                dl.TileLayer(id="base-layer-id"), # Base map layer
-                *markers                          # Unpack all markers into the children list
-            ]
+    row = viewData[selected_row]
+    if row.get("location_lat") is None or row.get("location_long") is None: # Row without location
+        return [], dash.no_update
+    position = [row["location_lat"], row["location_long"]] # Marker coordinates
+
+    marker = dl.Marker(
+        position=position,
+        children=[                             # Marker children (tooltip and popup)
+            dl.Tooltip(str(row.get("name"))),   # Tooltip with animal name
+            dl.Popup([                         # Popup with detailed information
+                html.H4("Animal Name: " + str(row.get("name"))),                # Animal name header
+                html.P("Breed: " + str(row.get("breed"))),                      # Breed information
+                html.P("Age: " + str(row.get("age_upon_outcome", "Unknown"))), # Age
+                html.P("Sex: " + str(row.get("sex_upon_outcome", "Unknown")))  # Sex
+            ])
+        ],
+        # Visual distinction for selected marker (red)
+        icon=dict(
+            iconUrl='https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-red.png',
+            iconSize=[25, 41],     # Icon dimensions
+            iconAnchor=[12, 41]    # Icon anchor point
         )
-    ]
+    )
+    # Center on selected marker, keeping the zoom chosen by the user
+    return [marker], {"center": position, "transition": "panTo"}
 
-# --- Pie Chart ---
-# Callback to update pie chart based on rescue type filter
-@app.callback(
-    Output('pie-chart-id', 'figure'), # Output: Update figure property of pie chart
-    [Input('btn1', 'n_clicks'),       # Input: Button clicks
-     Input('btn2', 'n_clicks'),
-     Input('btn3', 'n_clicks'),
-     Input('btn4', 'n_clicks')]
+# --- Top candidates ---
+# Callback to rank the candidates of the active rescue type (scored inside MongoDB)
+@callback(
+    [Output('top-candidates-table', 'data'),    # Output: Ranked candidates
+     Output('top-candidates-caption', 'children')], # Output: What the ranking is based on
+    [Input('rescue-filter-store', 'data')],     # Input: Active rescue type button
+    [State('map-leaflet-id', 'bounds')]         # State: Visible map area (team location)
 )
-def update_pie_chart(btn1, btn2, btn3, btn4): # Callback function
-    ctx = callback_context                    # Get callback context
+@timed_callback
+def update_top_candidates(button_id, bounds): # Callback function
+    profile = BUTTON_PROFILES.get(button_id)
+    if profile is None:                         # Reset or no button: nothing to rank
+        return [], "Choose a rescue type to rank its candidates."
+    # Distance is measured from the center of the visible map area
+    if bounds:
+        (south, west), (north, east) = bounds
+        center = [(south + north) / 2, (west + east) / 2]
+    else:
+        center = MAP_CENTER
+    candidates = get_source(button_id).top_candidates(get_rescue_query(button_id), top_k=TOP_K,
+                                                      center=center, projection=TOP_FIELDS)
+    rows = []
+    for rank, candidate in enumerate(candidates, start=1):
+        parts = candidate.get('score_parts', {})
+        rows.append({"Rank": rank, "Score": candidate.get('score'),
+                     "Name": candidate.get('name'), "Animal ID": candidate.get('animal_id'),
+                     "Breed": candidate.get('breed'), "Age": candidate.get('age_upon_outcome'),
+                     "Outcome Date": str(candidate.get('datetime', ''))[:10],
+                     "Distance (km)": round(candidate['distance_km'], 1) if 'distance_km' in candidate else None,
+                     "Age Fit": parts.get('age'), "Breed Match": parts.get('breed'),
+                     "Recency": parts.get('recency'), "Proximity": parts.get('location')})
+    caption = (f"Top {len(rows)} {profile} rescue candidates, scored by age fit, breed match, "
+               f"outcome recency and distance to the map center ({center[0]:.3f}, {center[1]:.3f}).")
+    return rows, caption
 
-    if not ctx.triggered:                     # Check if callback was triggered
-        return px.pie(values=[1], names=["-"], title="Dataset too large to display as a pie chart")  # Default
+# --- Outcome Trends ---
+# Callback to draw the outcome counts over time from the rollups (never scans the animals)
+@callback(
+    Output('trend-chart-id', 'figure'),      # Output: Update figure property of the trend chart
+    [Input('rescue-filter-store', 'data'),   # Input: Active rescue type button
+     Input('trend-period', 'value'),         # Input: Monthly or daily buckets
+     Input('trend-group', 'value')]          # Input: One line per outcome type or animal type
+)
+@timed_callback
+def update_trend_chart(button_id, period, group_by): # Callback function
+    profile = BUTTON_PROFILES.get(button_id) # None: every animal
+    series = get_shelter().rollup_series(period, group_by, profile)
+    if not series:                           # Rollups not built yet (or nothing matches)
+        return px.line(title="No outcome rollups yet (run: python Shelter_CLI.py rebuild-rollups)")
 
-    button_id = ctx.triggered[0]['prop_id'].split('.')[0] # Get triggered button ID
+    frame = pd.DataFrame(series)
+    frame['bucket'] = pd.to_datetime(frame['bucket'])   # '2016-05' and '2016-05-01' both parse
+    frame['group'] = frame['group'].fillna("Unknown").astype(str)
+    group_label = next(option['label'] for option in TREND_GROUPS if option['value'] == group_by)
+    return px.line(frame, x='bucket', y='count', color='group',
+                   labels={'bucket': "Month" if period == "month" else "Day",
+                           'count': "Outcomes", 'group': group_label},
+                   title=f"{'Monthly' if period == 'month' else 'Daily'} Outcomes"
+                         f"{f' of {profile} rescue candidates' if profile else ''}")
 
-    # Use centralized query function
+# --- Pie Chart ---
+# Callback to update pie chart based on rescue type filter
+@callback(
+    Output('pie-chart-id', 'figure'),        # Output: Update figure property of pie chart
+    [Input('rescue-filter-store', 'data')]   # Input: Active rescue type button
+)
+@timed_callback
+def update_pie_chart(button_id): # Callback function
+    # Use centralized query function (no button or Reset covers the full dataset)
     query = get_rescue_query(button_id)
-    
-    # If Reset button or no valid query, show default message
-    if not query: # Check if query is all records
-        return px.pie(values=[1], names=["-"], title="Dataset too large to display as a pie chart")
 
-    # Fetch filtered data from MongoDB with error handling
+    # Count breeds in the snapshot (when enabled and up to date) or inside MongoDB with error handling
     try:
-        dff = pd.DataFrame.from_records(shelter.read(query))                   # Query database
+        breed_counts = snapshot_breed_distribution(query)
+        if breed_counts is None:
+            breed_counts = get_source(button_id).aggregate(breed_distribution_pipeline(query), allow_disk_use=True)
     except Exception as e:
         print(f"Error fetching data for pie chart: {e}")                       # Print error
         return px.pie(values=[1], names=["Error"], title="Error loading data") # Error chart
-    
-    if '_id' in dff.columns:                             # Clean DataFrame
-        dff.drop(columns=['_id'], inplace=True)          # Remove _id
 
-    if dff.empty:                                        # Check if DataFrame is empty
+    if not breed_counts:                                 # Check if anything matched
         return px.pie(values=[1], names=["No data"], title="No data matches the selected filter")
 
     # Pie chart of 'breed' counts
-    return px.pie(dff, names='breed', title="Breed Distribution") # Create pie chart
+    return px.pie(values=[row['count'] for row in breed_counts],
+                  names=[str(row['_id']) for row in breed_counts],
+                  title="Breed Distribution") # Create pie chart
 
 # --- Dataset Cardinality Summary ---
-# Cache summary calculation for performance optimization
-@lru_cache(maxsize=1)    # Decorator to cache function results (max 1 cached result)
-def calculate_summary(): # Function definition
-
-    return summary_df.to_dict("records") # Return summary data in DataTable format
-
-# Callback to update summary table
-@app.callback(
+# Callback to update summary table (recomputed in MongoDB on every click)
+@callback(
     Output("summary-table-container", "children"), # Output: Update children of summary container
-    [Input("update-summary-btn", "n_clicks")]      # Input: Update button clicks
+    [Input("update-summary-btn", "n_clicks")],     # Input: Update button clicks
+    background=BACKGROUND,                         # Run the summary outside the web server worker
+    running=[(Output("update-summary-btn", "disabled"), True, False)] # Disable button meanwhile
 )
+@timed_callback
 def update_summary_table(n_clicks): # Callback function
     if n_clicks == 0:               # Check if button hasn't been clicked
         return html.Div("Click 'Update Summary' to generate table.") # Initial message
 
-    return dash_table.DataTable(                                    # Generate table on request
-        id='summary-table',                                         # Table ID
-        columns=[{"name": i, "id": i} for i in summary_df.columns], # Column definitions
-        data=calculate_summary(),                                   # Use cached function
-        style_cell={'textAlign': 'left', 'maxWidth': '300px', 'whiteSpace': 'normal'}, # Cell styling
-        style_header={'fontWeight': 'bold'},                        # Header styling
-        page_size=20,                                               # Rows per page
-        style_data_conditional=summary_style                        # Apply color-coded styles
-    )
+    summary_data = calculate_summary() # Fresh summary from MongoDB
+    computed_at = summary_cache["computed_at"].strftime("%Y-%m-%d %H:%M:%S")
+
+    return html.Div([
+        html.Div(f"Computed at {computed_at}",                      # Freshness timestamp
+                 style={"fontSize": "12px", "color": "#666", "marginBottom": "6px"}),
+        dash_table.DataTable(                                       # Generate table on request
+            id='summary-table',                                     # Table ID
+            columns=[{"name": i, "id": i} for i in SUMMARY_COLUMNS], # Column definitions
+            data=summary_data,                                      # Summary rows
+            style_cell={'textAlign': 'left', 'maxWidth': '300px', 'whiteSpace': 'normal'}, # Cell styling
+            style_header={'fontWeight': 'bold'},                    # Header styling
+            page_size=20,                                           # Rows per page
+            style_data_conditional=summary_style                    # Apply color-coded styles
+        )
+    ])
+
+# --- Diagnostics ---
+# Callback to refresh the list of recent slow operations (not timed itself)
+@callback(
+    Output('diagnostics-table', 'data'),           # Output: Rows of the diagnostics table
+    [Input('diagnostics-interval', 'n_intervals')] # Input: Refresh timer
+)
+def update_diagnostics(n_intervals): # Callback function
+    return list(metrics.slow) # Most recent first
 
 # --- Column visibility callback ---
 # Updates the DataTable's hidden columns based on checklist selection
-@app.callback(
-    Output("datatable-id", "hidden_columns"),     # Output: Update hidden_columns property
-    Input("column-visibility-checklist", "value") # Input: Checklist selected values
+# (the rows themselves only carry the visible columns, see page_projection())
+@callback(
+    Output("datatable-id", "hidden_columns"),       # Output: Update hidden_columns property
+    Input("column-visibility-checklist", "value"),  # Input: Checklist selected values
+    State("column-visibility-checklist", "options") # State: All available columns
 )
-def toggle_hidden_columns(visible_columns):       # Callback function
+@timed_callback
+def toggle_hidden_columns(visible_columns, options): # Callback function
     # Toggle column visibility based on user selection
     if visible_columns is None: # If no columns are selected
         visible_columns = []    # Set to empty list
     # Hide all columns not explicitly selected as visible
-    hidden = [col for col in df.columns if col not in visible_columns] # Calculate hidden columns
+    hidden = [opt["value"] for opt in options if opt["value"] not in visible_columns] # Calculate hidden columns
     return hidden # Return list of columns to hide
 
+###############
+# App factory #
+###############
+# Builds the Dash application; nothing is read from MongoDB until the first page load/callback
+# shelter_settings -> AnimalShelter options, e.g. max_pool_size or a DiskQueryCache shared by workers
+def create_app(**shelter_settings):
+    shelter_options.update(shelter_settings)
+    background_manager = None
+    if BACKGROUND: # Shared job store of the background callbacks
+        background_manager = DiskcacheManager(diskcache.Cache("./cache"))
+
+    # Initialize the Dash application with a specific name for internal reference
+    app = JupyterDash('CS340Dashboard', background_callback_manager=background_manager)
+    app.layout = serve_layout # Function: layout built per page load from the cached schema
+
+    # Streaming downloads of the filtered table at /export/csv and /export/parquet
+    add_export_route(app.server, export_source)
+
+    # Prometheus metrics at /metrics and timings of every callback request
+    instrument_server(app.server)
+    metrics.gauge('aac_query_cache_hits', "Query cache hits of this process", lambda: get_shelter().cache.hits)
+    metrics.gauge('aac_query_cache_misses', "Query cache misses of this process", lambda: get_shelter().cache.misses)
+    metrics.gauge('aac_single_flight_shared', "Queries served by another caller's identical query",
+                  lambda: get_shelter().flights.shared)
+    return app
+
 ####################
 # Run the Dash App #
 ####################
-# Start the Dash server in JupyterLab mode on port 8055
-app.run_server(mode='jupyterlab', port=8055) # Launch the dashboard application
\ No newline at end of file
+if __name__ == '__main__':
+    app = create_app()
+    # Start the Dash server in JupyterLab mode on port 8055
+    app.run_server(mode='jupyterlab', port=8055) # Launch the dashboard application
\ No newline at end of file
@@ -0,0 +1,153 @@
+# CS340 Project Two | Query Cache Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: In-memory result cache shared by the AnimalShelter read operations.
+
+from collections import OrderedDict # LRU ordering of cache entries
+from bson import json_util          # serialize MongoDB queries (ObjectId, dates, regex)
+import threading                    # callbacks run concurrently in the Dash server
+import time                         # expiration timestamps
+
+try: # Optional: cache shared by the worker processes of a production server
+    import diskcache
+except ImportError:
+    diskcache = None
+
+def make_key(*parts):
+    """ Builds a normalized cache key from a query and its options """
+    """ Input: parts - query, projection, sort, ... (any BSON-serializable values) """
+    """ Returns: string key, identical for queries differing only in key order """
+    return json_util.dumps(parts, sort_keys=True)
+
+class QueryCache:
+    """ Size-bounded LRU cache of query results with a time-to-live """
+    """ Cached values are shared between callers and must not be modified """
+
+    def __init__(self, maxsize=128, ttl=300):
+        """ Input: maxsize - maximum number of cached results (0 disables the cache) """
+        """        ttl     - seconds before a cached result expires """
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self.entries = OrderedDict()    # key -> (expiration time, value), oldest first
+        self.lock    = threading.Lock() # Protects entries across server threads
+        self.generation = 0             # Incremented on every clear()
+        self.hits    = 0                # Statistics for diagnostics
+        self.misses  = 0
+
+    def get(self, key):
+        """ Returns: (True, value) on a fresh hit, (False, None) otherwise """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic(): # Missing or expired
+                self.entries.pop(key, None)
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key) # Mark as most recently used
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key, value, generation=None):
+        """ Stores a result, evicting the least recently used entries if full """
+        """ generation -> value of self.generation when the query started; the result """
+        """               is dropped if the cache was cleared while it was running """
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False) # Evict least recently used
+
+    def clear(self):
+        """ Drops every cached result (called when the collection is modified) """
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+class DiskQueryCache:
+    """ QueryCache stored on disk and shared by every process of a multi-worker server """
+    """ Same interface as QueryCache; clear() in one worker invalidates the results of all workers """
+
+    def __init__(self, directory='cache/queries', ttl=300, size_limit=2 ** 30):
+        """ Input: directory  - folder of the shared SQLite cache (created if missing) """
+        """        ttl        - seconds before a cached result expires """
+        """        size_limit - maximum size in bytes before least recently used results are evicted """
+        if diskcache is None:
+            raise Exception("DiskQueryCache requires diskcache (pip install diskcache)")
+        self.ttl   = ttl
+        self.store = diskcache.Cache(directory, size_limit=size_limit,
+                                     eviction_policy='least-recently-used')
+        self.hits   = 0                 # Statistics of this process
+        self.misses = 0
+
+    @property
+    def generation(self):
+        """ Shared counter incremented on every clear(), by any process """
+        return self.store.get('__generation__', 0)
+
+    def get(self, key):
+        """ Returns: (True, value) on a fresh hit, (False, None) otherwise """
+        found, value = self.store.get((self.generation, key), default=(False, None))
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found, value
+
+    def set(self, key, value, generation=None):
+        """ Stores a result under the generation the query started in """
+        """ (results of a cleared generation can no longer be read) """
+        if generation is None:
+            generation = self.generation
+        self.store.set((generation, key), (True, value), expire=self.ttl)
+
+    def clear(self):
+        """ Invalidates every cached result in all processes (entries of old generations expire) """
+        self.store.incr('__generation__')
+
+class InFlightCall:
+    """ A query execution other callers can wait on """
+
+    def __init__(self):
+        self.done   = threading.Event() # Set once the result (or error) is available
+        self.result = None
+        self.error  = None
+
+class SingleFlight:
+    """ Coalesces concurrent executions of the same query into a single one """
+    """ The first caller runs the query, identical concurrent callers wait and share its result """
+
+    def __init__(self):
+        self.calls = {}                 # key -> InFlightCall currently running
+        self.lock  = threading.Lock()   # Protects calls across server threads
+        self.shared = 0                 # Statistics: callers served by another caller's query
+
+    def do(self, key, loader):
+        """ Runs loader() once for all concurrent callers using the same key """
+        """ Returns: loader() result (errors are raised to every waiting caller) """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None       # No identical query running: this caller executes it
+            if leader:
+                call = self.calls[key] = InFlightCall()
+            else:
+                self.shared += 1
+
+        if not leader:                  # Wait for the running query and share its outcome
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:             # Later callers start a fresh execution
+                del self.calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,187 @@
+# CS340 Project Two | Shelter Admin CLI
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Command-line maintenance tasks for the "aac" database through the CRUD Python Module.
+#              Usage: python Shelter_CLI.py [--username USER --password PASS] <command>
+
+import argparse                              # command-line parsing
+import csv                                   # stream CSV exports row by row
+import math                                  # detect NaN values in Parquet files
+import re                                    # numeric values of the CSV exports
+import time                                  # keep the watch and refresh-views commands running
+
+from CRUD_Python_Module import AnimalShelter # Import class from CRUD Python module
+from CRUD_Python_Module import RESCUE_PROFILES, geo_within_bounds, with_geo_filter # Dashboard queries
+from Change_Stream_Module import ChangeWatcher # Change stream consumer shared with the dashboard
+
+# --- File readers (one record at a time, constant memory) --- #
+INTEGER = re.compile(r'[+-]?\d+')                              # e.g. 42, -3
+DECIMAL = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?') # e.g. 30.75, -97.5, 1e3
+
+def convert_value(value):
+    # Numbers are stored as numbers, like mongoimport does for the AAC export
+    # (only plain numerals: names such as "Nan" or "Infinity" stay strings)
+    if INTEGER.fullmatch(value):
+        return int(value)
+    if DECIMAL.fullmatch(value):
+        number = float(value)
+        if math.isfinite(number):   # e.g. 1e999 overflows to inf: keep the text
+            return number
+    return value
+
+def read_csv_records(path):
+    # Stream an AAC outcomes CSV export as dictionaries
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        for row in csv.DictReader(csv_file):
+            # Skip the unnamed row-number column of the export
+            yield {key: convert_value(value) for key, value in row.items()
+                   if key and not key.startswith('Unnamed') and value is not None}
+
+def read_parquet_records(path, batch_size):
+    # Stream a Parquet file one record batch at a time (requires pyarrow)
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Loading Parquet files requires pyarrow (pip install pyarrow)")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            yield {key: value for key, value in row.items()
+                   if key and not key.startswith('Unnamed') and value is not None
+                   and not (isinstance(value, float) and math.isnan(value))}
+
+# --- Commands --- #
+def run_backfill(shelter, args):
+    # Recompute the rescue tags and GeoJSON locations of every existing document
+    shelter.backfill_derived_fields()
+
+def run_ensure_indexes(shelter, args):
+    # Create the indexes used by the rescue and map queries
+    for name in shelter.ensure_indexes():
+        print(f"Index ready: {name}")
+
+def run_load(shelter, args):
+    # Stream a CSV or Parquet export into the collection in batches
+    file_format = args.format or ('parquet' if args.path.lower().endswith('.parquet') else 'csv')
+    if file_format == 'parquet':
+        records = read_parquet_records(args.path, args.batch_size)
+    else:
+        records = read_csv_records(args.path)
+    summary = shelter.create_many(records, batch_size=args.batch_size)
+    print(f"Load complete: {summary['inserted']} inserted, {summary['failed']} failed "
+          f"in {len(summary['errors'])} batches with errors")
+
+# Map area around Austin (the default view of the dashboard map)
+AUSTIN_BOUNDS = [[30.35, -98.05], [31.15, -96.9]]
+
+def run_explain_report(shelter, args):
+    # Plans of the query shapes used by the dashboard: table pages, sorted pages and map
+    # queries of every rescue profile (and of the unfiltered table)
+    shapes = []
+    for name, profile in [('all', {})] + list(RESCUE_PROFILES.items()):
+        shapes.append((f"{name} table page", profile, [('_id', 1)], args.page_size))
+        for field in args.sort or []:
+            shapes.append((f"{name} sorted by {field}", profile, [(field, 1), ('_id', 1)], args.page_size))
+        shapes.append((f"{name} map", with_geo_filter(profile, geo_within_bounds(AUSTIN_BOUNDS)), None, 0))
+
+    print(f"{'query shape':<34}{'plan':<38}{'index':<22}{'examined':>10}{'returned':>10}{'ms':>7}")
+    warnings = 0
+    for name, query, sort, limit in shapes:
+        summary = shelter.explain(query, sort=sort, limit=limit)
+        if not summary:
+            continue
+        flags = [flag for flag, found in (('COLLSCAN', summary['collscan']),
+                                          ('IN-MEMORY SORT', summary['in_memory_sort'])) if found]
+        warnings += bool(flags)
+        print(f"{name:<34}{' > '.join(summary['stages'])[:37]:<38}{', '.join(summary['indexes'])[:21] or '-':<22}"
+              f"{summary['docs_examined']:>10}{summary['returned']:>10}{summary['millis']:>7}"
+              f"{'  ' + ', '.join(flags) if flags else ''}")
+    print(f"{warnings} of {len(shapes)} query shapes scan the collection or sort in memory")
+
+def run_top_candidates(shelter, args):
+    # Best scored candidates of a rescue profile (optionally by distance to the team)
+    center = tuple(args.near) if args.near else None
+    candidates = shelter.top_candidates(RESCUE_PROFILES[args.profile], top_k=args.top,
+                                        center=center, projection=['animal_id', 'name', 'breed', 'age_upon_outcome'])
+    print(f"{'rank':>4}  {'score':>6}  {'animal_id':<10}{'name':<16}{'breed':<34}{'age':<10}{'km':>7}")
+    for rank, candidate in enumerate(candidates, start=1):
+        distance = f"{candidate['distance_km']:.1f}" if 'distance_km' in candidate else '-'
+        print(f"{rank:>4}  {candidate['score']:>6}  {str(candidate.get('animal_id', '')):<10}"
+              f"{str(candidate.get('name', ''))[:15]:<16}{str(candidate.get('breed', ''))[:33]:<34}"
+              f"{str(candidate.get('age_upon_outcome', '')):<10}{distance:>7}")
+
+def run_refresh_views(shelter, args):
+    # Bring the materialized rescue views up to date (schedule it, e.g. every minute, or
+    # keep it running with --every: the refresher process started by gunicorn.conf.py)
+    full = args.full
+    while True:
+        for profile, result in shelter.refresh_views(full=full).items():
+            if result['documents'] is None:
+                print(f"{profile:<10} unchanged")
+            else:
+                print(f"{profile:<10} {'rebuilt' if result['full'] else 'refreshed'}: "
+                      f"{result['documents']} candidates, {result['removed']} removed")
+        if not args.every:
+            break
+        full = False # Only the first refresh is a rebuild
+        time.sleep(args.every)
+
+def run_rebuild_rollups(shelter, args):
+    # Recompute the outcome trend rollups (first use, or after writes made by other tools)
+    shelter.rebuild_rollups()
+
+def run_watch(shelter, args):
+    # Print the changes of the collection as the dashboard watcher receives them (Ctrl+C to stop)
+    def show(batch):
+        for change in batch:
+            key = change.get('documentKey', {}).get('_id', '')
+            animal = (change.get('fullDocument') or {}).get('animal_id', '')
+            print(f"{change['operationType']:<10}{str(key):<26}{animal}")
+    watcher = ChangeWatcher(shelter, on_change=show).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+        print(f"{watcher.received} changes received")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintenance tasks for the AAC animals collection")
+    parser.add_argument('--username', default='aacuser', help="MongoDB username")
+    parser.add_argument('--password', default='NoSQLNoParty', help="MongoDB password")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # One sub-command per maintenance task
+    backfill = commands.add_parser('backfill', help="Recompute derived fields (rescue tags, location) of existing data")
+    backfill.set_defaults(handler=run_backfill)
+    indexes = commands.add_parser('ensure-indexes', help="Create the indexes used by the rescue and map queries")
+    indexes.set_defaults(handler=run_ensure_indexes)
+    load = commands.add_parser('load', help="Bulk load an AAC outcomes export (CSV or Parquet)")
+    load.add_argument('path', help="CSV or Parquet file to load")
+    load.add_argument('--format', choices=['csv', 'parquet'], help="File format (default: from extension)")
+    load.add_argument('--batch-size', type=int, default=1000, help="Documents per insert batch")
+    load.set_defaults(handler=run_load)
+
+    report = commands.add_parser('explain-report', help="Show the query plans of the dashboard queries")
+    report.add_argument('--sort', nargs='*', help="Also explain table pages sorted by these fields")
+    report.add_argument('--page-size', type=int, default=10, help="Rows per table page")
+    report.set_defaults(handler=run_explain_report)
+    top = commands.add_parser('top-candidates', help="Rank the candidates of a rescue profile by suitability")
+    top.add_argument('profile', choices=sorted(RESCUE_PROFILES), help="Rescue profile")
+    top.add_argument('--top', type=int, default=10, help="Number of candidates")
+    top.add_argument('--near', type=float, nargs=2, metavar=('LAT', 'LNG'), help="Location of the rescue team")
+    top.set_defaults(handler=run_top_candidates)
+    views = commands.add_parser('refresh-views', help="Refresh the materialized rescue views incrementally")
+    views.add_argument('--full', action='store_true', help="Rebuild the views from the whole collection")
+    views.add_argument('--every', type=int, metavar='SECONDS', help="Keep refreshing at this interval")
+    views.set_defaults(handler=run_refresh_views)
+    rollups = commands.add_parser('rebuild-rollups', help="Recompute the daily/monthly outcome rollups")
+    rollups.set_defaults(handler=run_rebuild_rollups)
+    watch = commands.add_parser('watch', help="Print inserts, updates and deletes as they happen (replica set)")
+    watch.set_defaults(handler=run_watch)
+
+    args = parser.parse_args(argv)
+    shelter = AnimalShelter(args.username, args.password) # credentials and connection setup
+    args.handler(shelter, args)
+
+if __name__ == '__main__':
+    main()
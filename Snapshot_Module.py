@@ -0,0 +1,250 @@
+# CS340 Project Two | Snapshot Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: In-process snapshot of the AAC collection answering the rescue profile queries
+#              with precomputed NumPy boolean masks instead of MongoDB round trips.
+
+import threading # snapshot refreshed in a background thread
+import time      # snapshot age
+
+import numpy as np  # boolean row masks
+import pandas as pd # typed snapshot columns
+
+from CRUD_Python_Module import RESCUE_TAGS_FIELD, LOCATION_FIELD, MODIFIED_FIELD, classify_breed
+from Frame_Schema_Module import AAC_SCHEMA, frame_from_chunks, typed_frame, concat_frames
+from Query_Cache_Module import make_key
+
+# Dates stay strings so snapshot rows are identical to the documents read from MongoDB
+SNAPSHOT_SCHEMA = {field: ("string" if kind == "datetime" else kind) for field, kind in AAC_SCHEMA.items()}
+SNAPSHOT_SCHEMA["age_upon_outcome_in_weeks"] = "float64" # Exact values for the table
+RANGE_OPERATORS = {"$gte": np.greater_equal, "$gt": np.greater,
+                   "$lte": np.less_equal, "$lt": np.less}
+
+class ShelterSnapshot:
+    """ Refreshable copy of the collection evaluating simple queries in memory """
+    """ Supported: equality, $eq/$ne/$in/$nin, $gte/$gt/$lte/$lt, $and and rescue tags """
+    """ Every other query (and any query while the snapshot is stale) returns None, """
+    """ telling the caller to ask MongoDB instead """
+
+    def __init__(self, shelter, max_age=300, chunk_size=5000):
+        """ Input: shelter    - AnimalShelter the snapshot is read from """
+        """        max_age    - seconds before the snapshot is reloaded (writes by other applications) """
+        """        chunk_size - documents converted to a DataFrame at a time while loading """
+        self.shelter    = shelter
+        self.max_age    = max_age
+        self.chunk_size = chunk_size
+        self.frame      = None  # Typed DataFrame of the collection in _id order
+        self.ids        = None  # _id of every row of frame
+        self.generation = None  # Query cache generation the snapshot was loaded in
+        self.loaded_at  = 0     # time.monotonic() of the last load
+        self.tag_masks  = {}    # rescue tag -> rows whose breed carries the tag
+        self.masks      = {}    # query key -> positions of the matching rows (profiles are evaluated once)
+        self.pages      = {}    # (query key, page, page size) -> rows already served
+        self.lock       = threading.Lock() # Only one load at a time
+        self.loading    = False
+        self.swap_lock  = threading.Lock() # Masks are never mixed with the rows of another snapshot
+        self.update_lock = threading.Lock() # Incremental changes never overwrite a newer load
+        self.replay     = None  # Changes received during a load, applied to the new rows
+        self.live       = False # True while a change stream keeps the snapshot up to date
+
+    def is_fresh(self):
+        """ True if no write was seen and max_age has not elapsed since the load """
+        """ (always true once loaded while a change stream applies every write) """
+        if self.live:
+            return self.frame is not None
+        return (self.frame is not None and self.generation == self.shelter.cache.generation
+                and time.monotonic() - self.loaded_at < self.max_age)
+
+    def refresh(self):
+        """ Loads the collection into a new snapshot (the previous one serves until then) """
+        generation = self.shelter.cache.generation # Writes during the load make it stale
+        with self.update_lock:
+            self.replay = []                       # Changes received while loading (live mode)
+        chunks = self.shelter.read_iter({}, projection=dict.fromkeys([RESCUE_TAGS_FIELD, LOCATION_FIELD, MODIFIED_FIELD], 0),
+                                        sort=[("_id", 1)], chunk_size=self.chunk_size,
+                                        batch_size=self.chunk_size)
+        frame = frame_from_chunks(chunks, SNAPSHOT_SCHEMA)
+        ids = frame.pop("_id").to_numpy(dtype=object) if "_id" in frame.columns else np.empty(0, dtype=object)
+        with self.update_lock:
+            replay, self.replay = self.replay, None
+            # The cursor may or may not have seen those changes, applying them again is harmless
+            for upserts, deleted_ids in replay:
+                frame, ids = self.merge(frame, ids, upserts, deleted_ids)
+            self.install(frame, ids, generation)
+        print(f"Snapshot loaded: {len(frame)} documents")
+
+    def install(self, frame, ids, generation):
+        """ Swaps in new snapshot rows (ids: _id of every row, same order) """
+        # Breed patterns are matched once per distinct breed, not once per row
+        tag_masks = {}
+        if "breed" in frame.columns:
+            breeds = frame["breed"].astype("category")
+            codes = breeds.cat.codes.to_numpy()
+            for code, breed in enumerate(breeds.cat.categories):
+                for tag in classify_breed(breed):
+                    tag_masks.setdefault(tag, []).append(code)
+            tag_masks = {tag: np.isin(codes, tag_codes) for tag, tag_codes in tag_masks.items()}
+
+        # Swap in the new snapshot at once
+        with self.swap_lock:
+            self.frame, self.ids, self.tag_masks, self.masks, self.pages = frame, ids, tag_masks, {}, {}
+            self.generation, self.loaded_at = generation, time.monotonic()
+
+    @staticmethod
+    def merge(frame, ids, upserts, deleted_ids):
+        """ Returns: (frame, ids) with the changed documents replaced and the deleted ones removed """
+        upserts = [{k: v for k, v in document.items() if k not in (RESCUE_TAGS_FIELD, LOCATION_FIELD, MODIFIED_FIELD)}
+                   for document in upserts]
+        changed = set(deleted_ids) | {document["_id"] for document in upserts}
+        keep = np.fromiter((i not in changed for i in ids), dtype=bool, count=len(ids))
+        added = typed_frame(upserts, SNAPSHOT_SCHEMA) if upserts else pd.DataFrame()
+        added_ids = added.pop("_id").to_numpy(dtype=object) if "_id" in added.columns else np.empty(0, dtype=object)
+
+        # Remaining rows + new versions, back in _id order (the order of unsorted MongoDB pages)
+        frame = concat_frames([frame[keep].reset_index(drop=True), added])
+        ids = np.concatenate([ids[keep], added_ids])
+        order = np.argsort(ids, kind="stable")
+        return frame.iloc[order].reset_index(drop=True), ids[order]
+
+    def apply_changes(self, upserts, deleted_ids, generation):
+        """ Applies changed documents without reloading the collection (change streams) """
+        """ Input: upserts     - current version of inserted/updated documents (with _id) """
+        """        deleted_ids - _id of deleted documents """
+        """        generation  - query cache generation the snapshot is up to date with """
+        with self.update_lock:
+            if self.replay is not None:   # A load is running, it applies the changes again when done
+                self.replay.append((upserts, deleted_ids))
+            if self.frame is None:        # Nothing loaded yet, the first load reads the current data
+                return
+            frame, ids = self.merge(self.frame, self.ids, upserts, deleted_ids)
+            self.install(frame, ids, generation)
+
+    def refresh_async(self):
+        """ Starts a background reload unless one is already running """
+        with self.lock:
+            if self.loading:
+                return
+            self.loading = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error occurred while loading the snapshot: {e}")
+            finally:
+                self.loading = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def column(self, field):
+        """ Values of a field as an array (missing fields are all-missing) """
+        if field in self.frame.columns:
+            return self.frame[field]
+        return pd.Series(np.nan, index=self.frame.index)
+
+    def condition_mask(self, field, condition):
+        """ Boolean mask of a single field condition, None if the condition is not supported """
+        if field == RESCUE_TAGS_FIELD: # Array of tags: equality means membership
+            if isinstance(condition, str):
+                return self.tag_masks.get(condition, np.zeros(len(self.frame), dtype=bool))
+            return None
+
+        values = self.column(field)
+        if not isinstance(condition, dict):                  # Plain equality
+            condition = {"$eq": condition}
+        mask = np.ones(len(self.frame), dtype=bool)
+        for operator, operand in condition.items():
+            if operator == "$eq" and not isinstance(operand, (dict, list)):
+                mask &= (values == operand).to_numpy(dtype=bool, na_value=False)
+            elif operator == "$ne" and not isinstance(operand, (dict, list)):
+                mask &= ~(values == operand).to_numpy(dtype=bool, na_value=False)
+            elif operator in ("$in", "$nin") and isinstance(operand, list):
+                found = values.isin(operand).to_numpy(dtype=bool, na_value=False)
+                mask &= found if operator == "$in" else ~found
+            elif operator in RANGE_OPERATORS and isinstance(operand, (int, float)) \
+                    and pd.api.types.is_numeric_dtype(values.dtype):
+                # Missing values never match a range, as in MongoDB
+                numbers = values.to_numpy(dtype=float, na_value=np.nan)
+                with np.errstate(invalid="ignore"):
+                    mask &= RANGE_OPERATORS[operator](numbers, operand)
+            else:
+                return None
+        return mask
+
+    def query_mask(self, query):
+        """ Boolean mask of the rows matching a query, None if the query is not supported """
+        mask = np.ones(len(self.frame), dtype=bool)
+        for field, condition in query.items():
+            if field == "$and" and isinstance(condition, list):
+                parts = [self.query_mask(part) for part in condition]
+                if any(part is None for part in parts):
+                    return None
+                for part in parts:
+                    mask &= part
+            elif field.startswith("$"):
+                return None
+            else:
+                part = self.condition_mask(field, condition)
+                if part is None:
+                    return None
+                mask &= part
+        return mask
+
+    def match(self, query):
+        """ Returns: (snapshot frame, positions of the matching rows, query key, row ids), """
+        """          None if MongoDB must answer """
+        if not self.is_fresh():
+            self.refresh_async() # Serve from MongoDB until the new snapshot is loaded
+            return None
+        key = make_key(query)
+        with self.swap_lock:
+            positions = self.masks.get(key)
+            if positions is None:
+                mask = self.query_mask(query)
+                if mask is None:
+                    return None
+                if len(self.masks) > 100: # Keep the mask store bounded
+                    self.masks.clear()
+                positions = self.masks[key] = np.flatnonzero(mask)
+            return self.frame, positions, key, self.ids
+
+    def read_page(self, query, page=0, page_size=10, projection=None):
+        """ Same result as AnimalShelter.read_page() without sorting (_id order) """
+        """ projection - list of field names to return (None returns every field) """
+        """ Returns: (list of documents, total matching documents), None if MongoDB must answer """
+        """ Rows are shared between callers and must not be modified """
+        matched = self.match(query)
+        if matched is None:
+            return None
+        frame, positions, key, ids = matched
+        fields = tuple(projection) if projection is not None else None
+        rows = self.pages.get((key, page, page_size, fields))
+        if rows is None:
+            selected = positions[page * page_size:(page + 1) * page_size]
+            rows = frame.iloc[selected]
+            if fields is not None: # Only the projected columns are converted
+                rows = rows[[field for field in dict.fromkeys(fields) if field in rows.columns]]
+            # Column by column (much faster than DataFrame.to_dict for a few rows)
+            columns = {"_id": ids[selected].tolist()}
+            columns.update((field, rows[field].tolist()) for field in rows.columns)
+            rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+            # Fields missing from a document are left out, like in MongoDB results
+            rows = [{k: v for k, v in row.items() if not (v is None or v is pd.NA or v != v)} for row in rows]
+            with self.swap_lock:
+                if frame is self.frame:   # Not replaced by a reload meanwhile
+                    if len(self.pages) > 1000: # Keep the page store bounded
+                        self.pages.clear()
+                    self.pages[(key, page, page_size, fields)] = rows
+        return rows, len(positions)
+
+    def value_counts(self, query, field):
+        """ Returns: number of matching rows per value of field (most common first), None if MongoDB must answer """
+        matched = self.match(query)
+        if matched is None or field not in matched[0].columns:
+            return None
+        frame, positions, key, ids = matched
+        counts = frame[field].iloc[positions].value_counts(sort=False)
+        counts = counts[counts > 0].reset_index()
+        counts.columns = ["_id", "count"]
+        # Same order as the MongoDB pipeline: most common first, then by value
+        counts["_id"] = counts["_id"].astype(object)
+        return counts.sort_values(["count", "_id"], ascending=[False, True], kind="stable")
@@ -0,0 +1,27 @@
+// CS340 Project Two | Map Cluster Markers
+// Author: GCZ79
+// Date: 10/16/2026
+// Description: pointToLayer of the map GeoJSON layer (served from assets/ by Dash).
+//              Clusters computed by MongoDB (properties.cluster) are drawn as circles sized by
+//              their point_count, single animals stay regular pins with their tooltip and popup.
+
+window.shelterMap = Object.assign({}, window.shelterMap, {
+    clusterMarker: function (feature, latlng) {
+        if (!feature.properties.cluster) {
+            return L.marker(latlng); // Single animal
+        }
+        var count = feature.properties.point_count;
+        // 30px for a few animals, up to 60px for the whole collection
+        var size = Math.round(Math.min(60, 30 + 8 * Math.log10(count)));
+        var color = count < 100 ? '#6ecc39' : (count < 1000 ? '#f0c20c' : '#f18017');
+        var label = count < 1000 ? String(count) : Math.round(count / 1000) + 'k';
+        var icon = L.divIcon({
+            html: '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size + 'px;' +
+                  'border-radius:50%;background:' + color + ';opacity:0.85;text-align:center;' +
+                  'font-weight:bold;color:#222;">' + label + '</div>',
+            className: 'shelter-cluster', // No default white square of divIcon
+            iconSize: L.point(size, size)
+        });
+        return L.marker(latlng, {icon: icon});
+    }
+});
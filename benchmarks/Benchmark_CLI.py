@@ -0,0 +1,207 @@
+# CS340 Project Two | Benchmark CLI
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Times the CRUD module and the dashboard callbacks on a synthetic AAC dataset and
+#              stores the results per git commit for regression comparison.
+#              Usage: python benchmarks/Benchmark_CLI.py run --rows 100000 [--uri mongodb://localhost:27017]
+#                     python benchmarks/Benchmark_CLI.py compare BASE.json NEW.json
+
+import argparse          # command-line parsing
+import importlib.util    # the dashboard file name is not a valid module name
+import json              # result files
+import pathlib           # locate the repository and the result folder
+import platform          # machine description stored with the results
+import statistics        # median of the timings
+import subprocess        # current git commit
+import sys               # import the modules of the repository
+import time              # perf_counter timings
+from datetime import datetime, timezone # run timestamp
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent # Repository root
+sys.path.insert(0, str(ROOT))
+
+from Synthetic_Data_Module import generate_animals  # Seeded AAC-shaped documents
+from Instrumentation_Module import metrics, CommandMetrics # Reply sizes of the MongoDB commands
+
+RESULTS_DIR = pathlib.Path(__file__).resolve().parent / 'results'
+BENCHMARK_DB = 'aac_benchmark' # Never the production 'aac' database
+
+# Benchmarks failing on mongomock: without --uri they would only time the error handling of the
+# CRUD module, so they are skipped (as is the load time). Checked with mongomock 4.3 / pymongo 4.18:
+#   crud.create, load  -> rollup upserts: mongomock's bulk_write rejects the UpdateOne of this pymongo
+#   crud.update/delete -> rollup counts of the stored documents use $substrCP
+#   update_map         -> $sin of the map grid cells
+#   calculate_summary  -> $toHashedIndexKey of the HyperLogLog sketches
+SERVER_ONLY = {'crud.create', 'crud.update', 'crud.delete', 'update_map', 'calculate_summary'}
+
+# --- Setup --- #
+def connect(uri):
+    # Local mongod when a URI is given, in-process stand-in (mongomock) otherwise
+    if uri:
+        from pymongo import MongoClient
+        client = MongoClient(uri, event_listeners=[CommandMetrics(measure_bytes=True)]) # Reply sizes too
+        return client, 'mongod ' + client.server_info().get('version', '?')
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("Without --uri the benchmarks need mongomock (pip install mongomock)")
+    return mongomock.MongoClient(), 'mongomock ' + mongomock.__version__
+
+def load_dashboard():
+    # Load "ProjectTwo(PythonCodeOnly).py" as a module, like wsgi.py
+    spec = importlib.util.spec_from_file_location('dashboard', ROOT / 'ProjectTwo(PythonCodeOnly).py')
+    dashboard = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dashboard)
+    return dashboard
+
+def git_commit():
+    # Short commit hash of the working tree ('-dirty' when it has uncommitted changes)
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except Exception:
+        return 'unknown'
+
+# --- Timing --- #
+def reply_bytes():
+    # BSON bytes received from MongoDB so far (only counted with --uri: mongomock sends no events)
+    with metrics.lock:
+        return sum(value for (name, _), value in metrics.counters.items()
+                   if name == 'aac_mongodb_reply_bytes_total')
+
+def measure(function, repeat, before=None):
+    # Runs function() repeat times, before() untimed ahead of each run
+    timings, received = [], 0
+    for run in range(repeat):
+        if before:
+            before()
+        start_bytes = reply_bytes()
+        start = time.perf_counter()
+        function(run)
+        timings.append((time.perf_counter() - start) * 1000)
+        received += reply_bytes() - start_bytes
+    timings.sort()
+    return {'median_ms': round(statistics.median(timings), 3),
+            'min_ms': round(timings[0], 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'reply_bytes': round(received / repeat), # Average BSON size of the replies per run
+            'runs': repeat}
+
+def run_benchmarks(args):
+    client, backend = connect(args.uri)
+    dashboard = load_dashboard()
+    dashboard.create_app(client=client, database=BENCHMARK_DB)
+    shelter = dashboard.get_shelter() # Same AnimalShelter as the callbacks
+    cold = shelter.invalidate         # Drop cached results: every run reaches the database
+
+    # Fresh synthetic dataset
+    shelter.collection.drop()
+    try:
+        shelter.ensure_indexes()
+    except Exception as e:            # The stand-in does not support every index type
+        print(f"Indexes not created: {e}")
+    start = time.perf_counter()
+    summary = shelter.create_many(generate_animals(args.rows, args.seed), batch_size=args.batch_size)
+    load_seconds = time.perf_counter() - start
+
+    results = {'load': {'seconds': round(load_seconds, 3),
+                        'documents_per_second': round(summary['inserted'] / load_seconds, 1)}}
+    if not args.uri:                  # Includes the failing rollup upserts (see SERVER_ONLY)
+        results['load'] = {'skipped': "requires --uri"}
+    extra = list(generate_animals(args.repeat, args.seed + 1)) # Documents for create/delete
+    for number, document in enumerate(extra):
+        document['animal_id'] = f"BENCH{number}"
+    visible = [c for c in dashboard.DEFAULT_COLUMNS if c not in dashboard.HIDDEN_COLS_DEFAULT] # Default checklist
+    water = dashboard.get_rescue_query('btn1')
+    mountain = dashboard.get_rescue_query('btn2')
+
+    benchmarks = {
+        # CRUD module
+        'crud.create':        (lambda run: shelter.create(dict(extra[run])), None),
+        'crud.read':          (lambda run: shelter.read(water), cold),
+        'crud.read_page':     (lambda run: shelter.read_page(mountain, page=5, page_size=10), cold),
+        'crud.update':        (lambda run: shelter.update({'animal_id': f"BENCH{run}"},
+                                                          {'$set': {'breed': 'Newfoundland Mix'}}), None),
+        'crud.delete':        (lambda run: shelter.delete({'animal_id': f"BENCH{run}"}), None),
+        # Dashboard callbacks (cold: database, warm: query cache)
+        'filter_data.cold':   (lambda run: dashboard.filter_data('btn1', 0, 10, [], '', visible), cold),
+        'filter_data.warm':   (lambda run: dashboard.filter_data('btn1', 0, 10, [], '', visible), None),
+        'filter_data.all':    (lambda run: dashboard.filter_data(None, 3, 10, [], '', visible), cold),
+        'update_pie_chart':   (lambda run: dashboard.update_pie_chart(None), cold),
+        'update_pie_chart.rescue': (lambda run: dashboard.update_pie_chart('btn2'), cold),
+        'update_map':         (lambda run: dashboard.update_map(None, '', dashboard.MAP_ZOOM, None, None), cold),
+        'calculate_summary':  (lambda run: dashboard.calculate_summary(), cold),
+    }
+    for name, (function, before) in benchmarks.items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        if name in SERVER_ONLY and not args.uri:
+            results[name] = {'skipped': "requires --uri"}
+            print(f"{name:<26} skipped (requires --uri)")
+            continue
+        try:
+            results[name] = measure(function, args.repeat, before)
+        except Exception as e:        # Failing operation: no timing rather than a wrong one
+            results[name] = {'skipped': str(e)}
+            print(f"{name:<26} skipped ({e})")
+            continue
+        print(f"{name:<26} median {results[name]['median_ms']:>10.2f} ms   "
+              f"p95 {results[name]['p95_ms']:>10.2f} ms")
+
+    commit = git_commit()
+    report = {'commit': commit, 'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'backend': backend, 'rows': args.rows, 'seed': args.seed, 'repeat': args.repeat,
+              'python': platform.python_version(), 'machine': platform.platform(),
+              'results': results}
+    output = pathlib.Path(args.output or RESULTS_DIR / f"{commit}-{backend.split()[0]}-{args.rows}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to {output}")
+    shelter.collection.drop()
+
+def compare_results(args):
+    # Median of every benchmark in both files, flagging slowdowns above the threshold
+    base, new = (json.loads(pathlib.Path(path).read_text()) for path in (args.base, args.new))
+    print(f"{'benchmark':<26} {base['commit']:>12} {new['commit']:>12}   ratio")
+    regressions = 0
+    for name, result in new['results'].items():
+        if name not in base['results'] or 'median_ms' not in result:
+            continue
+        before, after = base['results'][name]['median_ms'], result['median_ms']
+        ratio = after / before if before else float('inf')
+        flag = ''
+        if ratio > args.threshold:
+            flag, regressions = '  REGRESSION', regressions + 1
+        print(f"{name:<26} {before:>10.2f}ms {after:>10.2f}ms   {ratio:.2f}x{flag}")
+    if base['rows'] != new['rows'] or base['backend'] != new['backend']:
+        print("Warning: results were measured on different datasets or backends")
+    return 1 if regressions else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the CRUD module and dashboard callbacks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Load a synthetic dataset and time every benchmark")
+    run.add_argument('--rows', type=int, default=10_000, help="Synthetic documents (e.g. 10000, 100000, 1000000)")
+    run.add_argument('--uri', help="Local mongod connection string (default: in-process mongomock)")
+    run.add_argument('--repeat', type=int, default=5, help="Timed runs per benchmark")
+    run.add_argument('--seed', type=int, default=340, help="Seed of the synthetic dataset")
+    run.add_argument('--batch-size', type=int, default=1000, help="Documents per insert batch")
+    run.add_argument('--only', nargs='*', help="Run only benchmarks starting with these names")
+    run.add_argument('--output', help="Result file (default: results/<commit>-<backend>-<rows>.json)")
+    run.set_defaults(handler=run_benchmarks)
+
+    compare = commands.add_parser('compare', help="Compare two result files")
+    compare.add_argument('base', help="Result file of the reference commit")
+    compare.add_argument('new', help="Result file of the commit to check")
+    compare.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio reported as regression")
+    compare.set_defaults(handler=compare_results)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
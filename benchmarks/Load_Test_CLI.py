@@ -0,0 +1,274 @@
+# CS340 Project Two | Load Test CLI
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Simulates concurrent dispatchers using a running dashboard by replaying sessions
+#              against the Dash callback endpoint, and reports throughput, latency and payload
+#              sizes per callback.
+#              Usage: python benchmarks/Load_Test_CLI.py --url http://localhost:8055 --users 30 --duration 60
+
+import argparse        # command-line parsing
+import http.client     # one keep-alive connection per simulated user
+import json            # Dash request/response bodies
+import pathlib         # result file
+import random          # session choices and think times
+import re              # read the page config of the Dash index
+import threading       # one thread per simulated user
+import time            # latencies and test duration
+from collections import defaultdict # samples per callback
+from urllib.parse import urlsplit, quote
+
+RESCUE_BUTTONS = ['btn1', 'btn2', 'btn3', 'btn4'] # Water, Mountain, Disaster, Reset
+
+# --- Dash protocol --- #
+def output_label(output):
+    # Readable name of a callback: "..a.b...c.d.." -> "a.b+c.d"
+    return output.strip('.').replace('...', '+') if output.startswith('..') else output
+
+def parse_outputs(output):
+    # Output string of /_dash-dependencies -> outputs field of the request
+    def split(part):
+        component, prop = part.rsplit('.', 1)
+        return {'id': component, 'property': prop}
+    if output.startswith('..'):
+        return [split(part) for part in output[2:-2].split('...')]
+    return split(output)
+
+class DashClient:
+    """ Minimal Dash renderer: page load, callback requests and background callback polling """
+
+    def __init__(self, url, timeout=120):
+        parts = urlsplit(url)
+        self.prefix  = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = (http.client.HTTPSConnection if parts.scheme == 'https'
+                           else http.client.HTTPConnection)(parts.netloc, timeout=timeout)
+        self.end_id = None          # Signed page-load token echoed on callback requests
+        self.dependencies = {}      # callback label -> dependency of /_dash-dependencies
+        self.values = {}            # "id.property" -> current value in this simulated browser
+
+    def request(self, method, path, body=None):
+        # Returns (status, response bytes); reconnects if the server closed the connection
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        for attempt in (1, 2):
+            try:
+                self.connection.request(method, self.prefix + path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.connection.close()
+                if attempt == 2:
+                    raise
+
+    def load_page(self):
+        # Index page (page config), layout and callback graph, like a browser page load
+        status, index = self.request('GET', '/')
+        config = re.search(rb'<script id="_dash-config" type="application/json">(.*?)</script>', index, re.S)
+        self.end_id = json.loads(config.group(1)).get('end_id') if config else None
+        status, layout = self.request('GET', '/_dash-layout')
+        self.values = {}
+        self.collect_props(json.loads(layout))
+        status, dependencies = self.request('GET', '/_dash-dependencies')
+        self.dependencies = {output_label(d['output']): d for d in json.loads(dependencies)
+                             if not d.get('clientside_function')}
+        return len(index) + len(layout) + len(dependencies)
+
+    def collect_props(self, node):
+        # Initial property values of every component with an id
+        if isinstance(node, list):
+            for child in node:
+                self.collect_props(child)
+        elif isinstance(node, dict) and 'props' in node:
+            props = node['props']
+            if isinstance(props.get('id'), str):
+                for prop, value in props.items():
+                    self.values[f"{props['id']}.{prop}"] = value
+            self.collect_props(props.get('children'))
+
+    def find(self, output):
+        # Label of the callback writing a given "id.property"
+        for label in self.dependencies:
+            if output in label.split('+'):
+                return label
+        return None
+
+    def call(self, label, changed, stats):
+        # Fires one callback with the current values; records latency and payload sizes
+        dependency = self.dependencies[label]
+        def fields(items):
+            return [{'id': i['id'], 'property': i['property'],
+                     'value': self.values.get(f"{i['id']}.{i['property']}")} for i in items]
+        payload = {'output': dependency['output'], 'outputs': parse_outputs(dependency['output']),
+                   'inputs': fields(dependency['inputs']), 'state': fields(dependency.get('state', [])),
+                   'changedPropIds': changed}
+        body = json.dumps(payload)
+        path = '/_dash-update-component' + (f"?endId={quote(self.end_id)}" if self.end_id else '')
+
+        start = time.perf_counter()
+        status, response = self.request('POST', path, body)
+        received, polls = len(response), 0
+        background = dependency.get('background') or dependency.get('long')
+        if status == 200 and background:
+            data = json.loads(response)
+            if 'response' not in data and 'cacheKey' in data: # Poll until the job is done
+                poll = f"{path}{'&' if '?' in path else '?'}cacheKey={quote(data['cacheKey'])}&job={quote(str(data['job']))}"
+                interval = background.get('interval', 500) / 1000
+                while 'response' not in data and status == 200 and time.perf_counter() - start < self.timeout:
+                    time.sleep(interval)
+                    status, response = self.request('POST', poll, body)
+                    received, polls = received + len(response), polls + 1
+                    data = json.loads(response) if status == 200 else {}
+        elapsed = (time.perf_counter() - start) * 1000
+        stats.record(label, elapsed, len(body), received, status, polls)
+
+        if status == 200: # Apply the new property values to this browser
+            data = json.loads(response)
+            for component, props in (data.get('response') or {}).items():
+                for prop, value in props.items():
+                    self.values[f"{component}.{prop}"] = value
+        return status
+
+# --- Statistics --- #
+class LoadStats:
+    """ Latency, payload and status samples per callback, shared by all users """
+
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.samples = defaultdict(list) # label -> [(ms, sent bytes, received bytes, status, polls)]
+
+    def record(self, label, elapsed, sent, received, status, polls=0):
+        with self.lock:
+            self.samples[label].append((elapsed, sent, received, status, polls))
+
+    def report(self, duration):
+        # Per-callback throughput, latency percentiles and payload sizes
+        def percentile(values, share):
+            return values[min(len(values) - 1, int(len(values) * share))]
+        report = {}
+        for label, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] for s in samples)
+            report[label] = {
+                'requests': len(samples),
+                'errors': sum(1 for s in samples if s[3] not in (200, 204)),
+                'per_second': round(len(samples) / duration, 2),
+                'p50_ms': round(percentile(latencies, 0.50), 1),
+                'p95_ms': round(percentile(latencies, 0.95), 1),
+                'p99_ms': round(percentile(latencies, 0.99), 1),
+                'max_ms': round(latencies[-1], 1),
+                'avg_request_bytes': round(sum(s[1] for s in samples) / len(samples)),
+                'avg_response_bytes': round(sum(s[2] for s in samples) / len(samples)),
+                'background_polls': sum(s[4] for s in samples),
+            }
+        return report
+
+# --- Sessions --- #
+def run_session(client, stats, rng, think, summary_share):
+    # One dispatcher visit: page load, rescue buttons, paging, row selection, columns, summary
+    def pause():
+        time.sleep(rng.uniform(0, think))
+
+    def fire(output, changed):
+        label = client.find(output)
+        if label is not None:
+            client.call(label, changed, stats)
+
+    start = time.perf_counter()
+    size = client.load_page()
+    stats.record('page_load', (time.perf_counter() - start) * 1000, 0, size, 200)
+
+    # Initial callbacks fired by the renderer on page load
+    for label, dependency in list(client.dependencies.items()):
+        if not dependency.get('prevent_initial_call'):
+            client.call(label, [], stats)
+    pause()
+
+    for button in rng.sample(RESCUE_BUTTONS, rng.randint(1, len(RESCUE_BUTTONS))):
+        # Rescue button: store update, then everything listening to the store
+        clicks = (client.values.get(f"{button}.n_clicks") or 0) + 1
+        client.values[f"{button}.n_clicks"] = clicks
+        fire('rescue-filter-store.data', [f"{button}.n_clicks"])
+        fire('datatable-container.style', [f"{button}.n_clicks"])
+        for output in ('datatable-id.data', 'cluster-layer-id.data', 'pie-chart-id.figure'):
+            fire(output, ['rescue-filter-store.data'])
+        pause()
+
+        # Next page of the table
+        client.values['datatable-id.page_current'] = (client.values.get('datatable-id.page_current') or 0) + 1
+        fire('datatable-id.data', ['datatable-id.page_current'])
+        pause()
+
+        # Row selection: marker of one animal of the visible page
+        rows = client.values.get('datatable-id.data') or []
+        if rows:
+            client.values['datatable-id.derived_viewport_data'] = rows
+            client.values['datatable-id.derived_virtual_selected_rows'] = [rng.randrange(len(rows))]
+            fire('selected-marker-id.children', ['datatable-id.derived_virtual_selected_rows'])
+            pause()
+
+    # Column toggle: show a random subset of the optional columns
+    options = client.values.get('column-visibility-checklist.options') or []
+    if options:
+        values = [option['value'] for option in options]
+        client.values['column-visibility-checklist.value'] = rng.sample(values, rng.randint(0, len(values)))
+        fire('datatable-id.hidden_columns', ['column-visibility-checklist.value'])
+        fire('datatable-id.data', ['column-visibility-checklist.value']) # Page read with the new projection
+        pause()
+
+    # Summary refresh (heavy, only some of the sessions)
+    if rng.random() < summary_share:
+        client.values['update-summary-btn.n_clicks'] = (client.values.get('update-summary-btn.n_clicks') or 0) + 1
+        fire('summary-table-container.children', ['update-summary-btn.n_clicks'])
+
+def simulated_user(number, args, stats, deadline):
+    # Replays sessions until the deadline (or the requested number of sessions)
+    rng = random.Random(args.seed + number)
+    client = DashClient(args.url, timeout=args.timeout)
+    sessions = 0
+    while time.monotonic() < deadline and (not args.sessions or sessions < args.sessions):
+        try:
+            run_session(client, stats, rng, args.think, args.summary_share)
+        except Exception as e:
+            stats.record('session_error', 0, 0, 0, 0)
+            print(f"User {number}: session failed: {e}")
+        sessions += 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-user load test of the dashboard callbacks")
+    parser.add_argument('--url', default='http://localhost:8055', help="Base URL of the running dashboard")
+    parser.add_argument('--users', type=int, default=30, help="Simulated concurrent users")
+    parser.add_argument('--duration', type=float, default=60, help="Test duration in seconds")
+    parser.add_argument('--sessions', type=int, default=0, help="Sessions per user (0: until the duration ends)")
+    parser.add_argument('--think', type=float, default=1.0, help="Maximum think time between actions in seconds")
+    parser.add_argument('--summary-share', type=float, default=0.1, help="Share of sessions refreshing the summary")
+    parser.add_argument('--timeout', type=float, default=120, help="Request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=340, help="Seed of the simulated sessions")
+    parser.add_argument('--output', help="Save the report as JSON")
+    args = parser.parse_args(argv)
+
+    stats = LoadStats()
+    start = time.monotonic()
+    deadline = start + args.duration
+    users = [threading.Thread(target=simulated_user, args=(number, args, stats, deadline), daemon=True)
+             for number in range(args.users)]
+    for user in users:
+        user.start()
+        time.sleep(min(0.1, args.think / max(args.users, 1))) # Ramp up instead of a single burst
+    for user in users:
+        user.join()
+    duration = time.monotonic() - start
+
+    report = stats.report(duration)
+    total = sum(entry['requests'] for entry in report.values())
+    print(f"{args.users} users, {duration:.1f} s, {total} requests ({total / duration:.1f}/s)")
+    print(f"{'callback':<58}{'req':>6}{'err':>5}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'resp KB':>9}")
+    for label, entry in report.items():
+        print(f"{label[:57]:<58}{entry['requests']:>6}{entry['errors']:>5}{entry['per_second']:>8.2f}"
+              f"{entry['p50_ms']:>9.1f}{entry['p95_ms']:>9.1f}{entry['p99_ms']:>9.1f}"
+              f"{entry['avg_response_bytes'] / 1024:>9.1f}")
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(
+            {'url': args.url, 'users': args.users, 'duration_s': round(duration, 1),
+             'requests': total, 'callbacks': report}, indent=2))
+        print(f"Report saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# CS340 Project Two | Synthetic Data Module
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Seeded generator of AAC-shaped (Austin Animal Center outcomes) documents
+#              for benchmarks. The same seed and size always produce the same documents.
+
+from datetime import datetime, timedelta # outcome dates and dates of birth
+import random                            # seeded distributions
+
+# --- Distributions (approximate shares of the AAC outcomes export) --- #
+ANIMAL_TYPES = [("Dog", 55), ("Cat", 38), ("Other", 5), ("Bird", 2)]
+BREEDS = {
+    "Dog": [("Pit Bull Mix", 12), ("Chihuahua Shorthair Mix", 11), ("Labrador Retriever Mix", 10),
+            ("German Shepherd Mix", 5), ("Australian Cattle Dog Mix", 3), ("Dachshund Mix", 3),
+            ("Boxer Mix", 2), ("Border Collie Mix", 2), ("Siberian Husky Mix", 2),
+            ("Miniature Poodle Mix", 2), ("Rottweiler Mix", 2), ("German Shepherd", 1),
+            ("Labrador Retriever", 1), ("Chesapeake Bay Retriever", 0.3), ("Newfoundland Mix", 0.3),
+            ("Alaskan Malamute Mix", 0.3), ("Old English Sheepdog", 0.1), ("Doberman Pinsch", 0.5),
+            ("Golden Retriever Mix", 0.5), ("Bloodhound Mix", 0.2), ("Rottweiler", 0.5),
+            ("Siberian Husky", 0.5), ("Beagle Mix", 1.5), ("Catahoula Mix", 1)],
+    "Cat":   [("Domestic Shorthair Mix", 70), ("Domestic Medium Hair Mix", 8),
+              ("Domestic Longhair Mix", 4), ("Siamese Mix", 4), ("Domestic Shorthair", 3)],
+    "Other": [("Bat Mix", 30), ("Raccoon Mix", 20), ("Rabbit Sh Mix", 20), ("Opossum Mix", 10),
+              ("Guinea Pig Mix", 5), ("Skunk Mix", 5)],
+    "Bird":  [("Chicken Mix", 40), ("Parakeet Mix", 30), ("Pigeon Mix", 20), ("Duck Mix", 10)],
+}
+SEXES = [("Neutered Male", 36), ("Spayed Female", 33), ("Intact Male", 12),
+         ("Intact Female", 11), ("Unknown", 8)]
+OUTCOMES = [("Adoption", 42), ("Transfer", 30), ("Return to Owner", 18), ("Euthanasia", 7),
+            ("Died", 1), ("Rto-Adopt", 1), ("Disposal", 0.5), ("Missing", 0.5)]
+OUTCOME_SUBTYPES = {"Transfer": ["Partner", "SCRP", "Snr"], "Adoption": ["", "Foster", "Offsite"],
+                    "Euthanasia": ["Suffering", "Rabies Risk", "Aggressive"]}
+COLORS = [("Black/White", 12), ("Black", 10), ("Brown Tabby", 8), ("Brown/White", 6),
+          ("White", 5), ("Tan/White", 5), ("Orange Tabby", 5), ("Blue/White", 4),
+          ("Tricolor", 4), ("Black/Tan", 3), ("Brown", 3), ("Tan", 3), ("Calico", 2)]
+NAMES = ["Max", "Bella", "Luna", "Charlie", "Lucy", "Cooper", "Daisy", "Buddy", "Rocky",
+         "Molly", "Bear", "Sadie", "Duke", "Lola", "Zeus", "Coco", "Oreo", "Milo", "Pepper", "Nala"]
+AUSTIN_CENTER = (30.75, -97.48) # Same center as the dashboard map
+FIRST_OUTCOME = datetime(2013, 10, 1)
+OUTCOME_DAYS  = 5 * 365         # Outcomes spread over five years
+
+def weighted(rng, choices):
+    """ Draws one value of a list of (value, weight) pairs """
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+def age_text(weeks):
+    """ Age in the AAC export format ('2 years', '3 months', '5 weeks', ...) """
+    if weeks >= 52:
+        count, unit = int(weeks // 52), "year"
+    elif weeks >= 4:
+        count, unit = int(weeks // 4), "month"
+    else:
+        count, unit = int(weeks), "week"
+    return f"{count} {unit}{'' if count == 1 else 's'}"
+
+def generate_animal(rng, number):
+    """ Builds one synthetic outcome document """
+    """ Input: rng    - random.Random instance (seeded by the caller) """
+    """        number - sequence number, used for animal_id and rec_num """
+    animal_type = weighted(rng, ANIMAL_TYPES)
+    outcome_type = weighted(rng, OUTCOMES)
+    weeks = min(rng.lognormvariate(4.0, 1.1), 52 * 20)    # Mostly young animals, long tail
+    outcome = FIRST_OUTCOME + timedelta(minutes=rng.randrange(OUTCOME_DAYS * 24 * 60))
+    birth = outcome - timedelta(weeks=weeks)
+    return {
+        "rec_num": number + 1,
+        "age_upon_outcome": age_text(weeks),
+        "animal_id": f"A{600000 + number}",
+        "animal_type": animal_type,
+        "breed": weighted(rng, BREEDS[animal_type]),
+        "color": weighted(rng, COLORS),
+        "date_of_birth": birth.strftime("%Y-%m-%d"),
+        "datetime": outcome.strftime("%Y-%m-%d %H:%M:%S"),
+        "monthyear": outcome.strftime("%Y-%m-%dT%H:%M:%S"),
+        "name": rng.choice(NAMES) if rng.random() < 0.7 else "",
+        "outcome_subtype": rng.choice(OUTCOME_SUBTYPES.get(outcome_type, [""])),
+        "outcome_type": outcome_type,
+        "sex_upon_outcome": weighted(rng, SEXES),
+        "location_lat": round(rng.gauss(AUSTIN_CENTER[0], 0.12), 6),  # Austin area
+        "location_long": round(rng.gauss(AUSTIN_CENTER[1], 0.15), 6),
+        "age_upon_outcome_in_weeks": round(weeks, 6),
+    }
+
+def generate_animals(count, seed=340):
+    """ Yields count synthetic outcome documents (lazily, constant memory) """
+    """ Input: count - number of documents (e.g. 10_000, 100_000, 1_000_000) """
+    """        seed  - random seed, the same seed gives the same dataset """
+    rng = random.Random(seed)
+    for number in range(count):
+        yield generate_animal(rng, number)
@@ -0,0 +1,44 @@
+# CS340 Project Two | Gunicorn Settings
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Multi-worker production settings of the dashboard.
+#              Usage: gunicorn wsgi:server
+
+import multiprocessing # size the worker pool from the CPU count
+import os              # overrides from environment variables
+import pathlib         # locate the CLI next to this file
+import subprocess      # refresher process of the materialized views
+import sys             # same Python interpreter as the server
+
+bind    = os.environ.get('BIND', '0.0.0.0:8055')                               # Same port as the Jupyter app
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)) # Worker processes
+threads = int(os.environ.get('WEB_THREADS', 4))  # Threads per worker (callbacks mostly wait on MongoDB)
+timeout = int(os.environ.get('WEB_TIMEOUT', 120)) # Seconds before a stuck worker is restarted
+
+# Import the app once in the master; workers fork from it and connect to MongoDB on first use
+preload_app = True
+
+# Restart workers periodically to bound memory growth of long-running processes
+max_requests        = 1000
+max_requests_jitter = 100
+
+# Materialized rescue views (SHELTER_VIEWS=1): one refresher process next to the workers.
+# It is a new interpreter (no fork of the master) started once the server is ready, so neither the
+# master nor the workers run a scheduler or open a MongoDB connection for it.
+# SHELTER_VIEW_REFRESH=0 leaves the refresh to cron: "python Shelter_CLI.py refresh-views"
+VIEW_REFRESH_INTERVAL = int(os.environ.get('SHELTER_VIEW_REFRESH', 60)) # Seconds between refreshes
+view_refresher = None
+
+def when_ready(server):
+    global view_refresher
+    if os.environ.get('SHELTER_VIEWS', '0') != '1' or VIEW_REFRESH_INTERVAL <= 0:
+        return
+    cli = pathlib.Path(__file__).with_name('Shelter_CLI.py')
+    view_refresher = subprocess.Popen([sys.executable, str(cli), 'refresh-views',
+                                       '--every', str(VIEW_REFRESH_INTERVAL)])
+    server.log.info("View refresher started (pid %s)", view_refresher.pid)
+
+def on_exit(server):
+    if view_refresher is not None: # Stopped together with the server
+        view_refresher.terminate()
+        view_refresher.wait()
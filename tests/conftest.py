@@ -0,0 +1,9 @@
+# CS340 Project Two | Test Configuration
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Makes the project modules (kept at the repository root) importable from the tests.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
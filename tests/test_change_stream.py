@@ -0,0 +1,45 @@
+# CS340 Project Two | Change Stream Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Changes are logged by resume token, so a client asking different server processes
+#              (each with its own watcher) neither skips nor repeats changes.
+
+import pytest
+
+from CRUD_Python_Module import AnimalShelter
+from Change_Stream_Module import ChangeWatcher, token_position
+
+mongomock = pytest.importorskip("mongomock")
+
+def event(number):
+    # Insert event as delivered by the change stream (_data: hex string starting with the cluster time)
+    return {'_id': {'_data': f"82{number:016X}2B0229"}, 'operationType': 'insert',
+            'documentKey': {'_id': number}, 'fullDocument': {'_id': number, 'name': f'Dog {number}'}}
+
+def watcher():
+    return ChangeWatcher(AnimalShelter(client=mongomock.MongoClient()))
+
+def test_positions_follow_the_stream():
+    assert token_position(None) == '' and token_position({'_data': '8201'}) == '8201'
+    live = watcher()
+    live.apply([event(9), event(10)])      # 10 sorts after 9 (fixed-width hex)
+    changes, position, complete = live.changes_since(token_position(event(9)['_id']))
+    assert [change[2] for change in changes] == ['10']
+    assert position == token_position(event(10)['_id']) and complete
+    assert live.changes_since(position)[0] == [] and live.received == 2
+
+def test_processes_started_at_different_times_agree():
+    first, second = watcher(), watcher()   # second started after changes 1 and 2
+    first.apply([event(number) for number in range(1, 6)])
+    second.apply([event(number) for number in range(3, 6)])
+    seen = token_position(event(2)['_id']) # Last change the page got from the first process
+    assert [change[2] for change in second.changes_since(seen)[0]] == ['3', '4', '5'] # Nothing skipped
+    seen = second.changes_since(seen)[1]
+    assert first.changes_since(seen)[0] == [] # Nothing repeated
+
+def test_incomplete_log():
+    live = ChangeWatcher(AnimalShelter(client=mongomock.MongoClient()), max_log=2)
+    live.apply([event(number) for number in range(1, 5)])
+    changes, _, complete = live.changes_since(token_position(event(1)['_id']))
+    assert [change[2] for change in changes] == ['3', '4'] and not complete
+    assert live.changes_since(token_position(event(2)['_id']))[2]
@@ -0,0 +1,65 @@
+# CS340 Project Two | Export Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Streamed CSV/Parquet files and the download route (empty column lists, failed reads).
+
+import csv
+import io
+
+import pytest
+
+from Export_Module import add_export_route, csv_stream, parquet_stream, PARQUET_AVAILABLE
+
+def read_csv(pieces):
+    return list(csv.reader(io.StringIO(b''.join(pieces).decode('utf-8'))))
+
+def test_csv_one_piece_per_chunk():
+    chunks = [[{'name': 'Max', 'breed': 'Beagle'}], [{'name': 'Rex', 'breed': 'Husky, Mix'}]]
+    pieces = list(csv_stream(chunks, ['name', 'breed']))
+    assert len(pieces) == 2                         # Header sent with the first chunk
+    assert read_csv(pieces) == [['name', 'breed'], ['Max', 'Beagle'], ['Rex', 'Husky, Mix']]
+
+def test_csv_missing_and_extra_fields():
+    pieces = csv_stream([[{'name': 'Max', 'color': 'Black'}, {'breed': 'Beagle'}]], ['name', 'breed'])
+    assert read_csv(pieces) == [['name', 'breed'], ['Max', ''], ['', 'Beagle']]
+
+def test_csv_without_documents_has_a_header():
+    assert read_csv(csv_stream([], ['name', 'breed'])) == [['name', 'breed']]
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="requires pyarrow")
+def test_parquet_round_trip():
+    import pyarrow.parquet as pq
+    chunks = [[{'name': 'Max', 'location_lat': 30.27}], [{'name': 7, 'location_lat': 'unknown'}]]
+    table = pq.read_table(io.BytesIO(b''.join(parquet_stream(chunks, ['name', 'location_lat']))))
+    assert table.to_pydict() == {'name': ['Max', '7'], 'location_lat': [30.27, None]}
+
+# --- Download route --- #
+def failing_chunks(after):
+    # Chunks of a cursor failing after a number of chunks
+    for number in range(after):
+        yield [{'name': f'Dog {number}'}]
+    raise RuntimeError("cursor lost")
+
+@pytest.fixture
+def client():
+    flask = pytest.importorskip("flask")
+    sources = {'ok': lambda: (iter([[{'name': 'Max'}]]), ['name']),
+               'none': lambda: (iter(()), []),
+               'start': lambda: (failing_chunks(0), ['name']),
+               'middle': lambda: (failing_chunks(2), ['name'])}
+    app = flask.Flask(__name__)
+    add_export_route(app, lambda args: sources[args['source']]())
+    return app.test_client()
+
+def test_download(client):
+    response = client.get('/export/csv?source=ok')
+    assert response.status_code == 200 and response.data.decode() == 'name\r\nMax\r\n'
+    assert client.get('/export/xlsx?source=ok').status_code == 404
+
+def test_no_columns_is_a_bad_request(client):
+    assert client.get('/export/csv?source=none').status_code == 400
+
+def test_failed_reads_never_look_complete(client):
+    assert client.get('/export/csv?source=start').status_code == 500
+    with pytest.raises(RuntimeError):               # Transfer aborted, not a truncated file
+        client.get('/export/csv?source=middle').get_data()
@@ -0,0 +1,86 @@
+# CS340 Project Two | DataTable Filter Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: translate_filter_query() turns the DataTable filter row into the MongoDB filter
+#              applied by the table, map, charts and exports.
+
+import importlib.util
+import pathlib
+import time
+
+import pytest
+
+pytest.importorskip("dash")
+pytest.importorskip("dash_leaflet")
+pytest.importorskip("jupyter_dash")
+
+@pytest.fixture(scope='module')
+def dashboard():
+    # Load "ProjectTwo(PythonCodeOnly).py" as a module, like wsgi.py (nothing connects to MongoDB)
+    path = pathlib.Path(__file__).resolve().parent.parent / 'ProjectTwo(PythonCodeOnly).py'
+    spec = importlib.util.spec_from_file_location('dashboard', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # Table columns known in advance instead of sampled from the collection
+    module.schema_cache.update(columns=list(module.DEFAULT_COLUMNS), sampled_at=time.monotonic())
+    return module
+
+def test_empty_filter(dashboard):
+    assert dashboard.translate_filter_query(None) == {}
+    assert dashboard.translate_filter_query('') == {}
+
+def test_comparisons_are_numeric(dashboard):
+    query = dashboard.translate_filter_query('{age_upon_outcome_in_weeks} >= 26 && {age_upon_outcome_in_weeks} lt 156')
+    assert query == {'$and': [{'age_upon_outcome_in_weeks': {'$gte': 26.0}},
+                              {'age_upon_outcome_in_weeks': {'$lt': 156.0}}]}
+
+def test_equality_of_quoted_strings(dashboard):
+    assert dashboard.translate_filter_query('{name} = "Max"') == {'$and': [{'name': 'Max'}]}
+    assert dashboard.translate_filter_query('{name} ne "Rex"') == {'$and': [{'name': {'$ne': 'Rex'}}]}
+
+def test_contains_escapes_regex_characters(dashboard):
+    query = dashboard.translate_filter_query('{breed} contains Pit Bull (Mix)')
+    assert query == {'$and': [{'breed': {'$regex': r'Pit\ Bull\ \(Mix\)'}}]}
+
+def test_contains_keeps_numbers_as_text(dashboard):
+    assert dashboard.translate_filter_query('{animal_id} contains 123') == {'$and': [{'animal_id': {'$regex': '123'}}]}
+
+def test_datestartswith_is_an_anchored_prefix(dashboard):
+    query = dashboard.translate_filter_query('{datetime} datestartswith 2016-05')
+    assert query == {'$and': [{'datetime': {'$regex': '^2016\\-05'}}]}
+
+def test_unrecognized_parts_are_ignored(dashboard):
+    query = dashboard.translate_filter_query('{breed} contains Lab && nonsense')
+    assert query == {'$and': [{'breed': {'$regex': 'Lab'}}]}
+
+def test_quoted_values_with_several_words(dashboard):
+    query = dashboard.translate_filter_query('{color} contains "Orange Tabby"')
+    assert query == {'$and': [{'color': {'$regex': r'Orange\ Tabby'}}]}
+    assert dashboard.translate_filter_query("{name} eq 'Lady Bug'") == {'$and': [{'name': 'Lady Bug'}]}
+
+def test_values_containing_operators(dashboard):
+    query = dashboard.translate_filter_query('{breed} contains "Pit Bull <3"')
+    assert query == {'$and': [{'breed': {'$regex': r'Pit\ Bull\ <3'}}]}
+    query = dashboard.translate_filter_query('{outcome_subtype} = "ge le >= ne"')
+    assert query == {'$and': [{'outcome_subtype': 'ge le >= ne'}]}
+    query = dashboard.translate_filter_query('{name} contains a=b')
+    assert query == {'$and': [{'name': {'$regex': 'a=b'}}]}
+
+def test_unknown_columns_and_operators_are_rejected(dashboard):
+    assert dashboard.translate_filter_query('{$where} = "sleep(100)"') == {}
+    assert dashboard.translate_filter_query('{password} = secret') == {}
+    query = dashboard.translate_filter_query('{$where} = "sleep(100)" && {name} = Max')
+    assert query == {'$and': [{'name': 'Max'}]}
+
+def test_sorting_only_by_known_columns(dashboard):
+    sort_by = [{'column_id': '$where', 'direction': 'asc'}, {'column_id': 'name', 'direction': 'desc'},
+               {'column_id': 'secret', 'direction': 'asc'}, 'breed']
+    query, sort = dashboard.table_query(None, '', sort_by)
+    assert query == {}
+    assert sort == [('name', dashboard.DESCENDING)]
+
+def test_combine_queries(dashboard):
+    rescue = dashboard.get_rescue_query('btn1')
+    assert dashboard.combine_queries(rescue, {}) == rescue
+    assert dashboard.combine_queries({}, {}) == {}
+    assert dashboard.combine_queries(rescue, {'name': 'Max'}) == {'$and': [rescue, {'name': 'Max'}]}
@@ -0,0 +1,74 @@
+# CS340 Project Two | Keyset Pagination Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: keyset_filter() and read_page() must reach every document exactly once, in sort
+#              order, including null/missing sort values and fields holding several BSON types.
+
+import pytest
+
+from pymongo import ASCENDING, DESCENDING
+from bson.objectid import ObjectId
+
+from CRUD_Python_Module import AnimalShelter, SORT_TYPE_ORDER, sort_type
+
+mongomock = pytest.importorskip("mongomock")
+
+keyset_filter = AnimalShelter.keyset_filter
+
+# --- keyset_filter() --- #
+def test_ascending_number_also_matches_later_types():
+    query = keyset_filter([('age', ASCENDING)], [5])
+    conditions = [clause['age'] for clause in query['$or']]
+    assert conditions[0] == {'$gt': 5}
+    assert conditions[1:] == [{'$type': kind} for kind in SORT_TYPE_ORDER[2:]]
+
+def test_descending_string_also_matches_numbers_and_nulls():
+    query = keyset_filter([('name', DESCENDING)], ['Max'])
+    conditions = [clause['name'] for clause in query['$or']]
+    assert conditions == [{'$lt': 'Max'}, {'$type': 'number'}, None]
+
+def test_null_boundary():
+    # Ascending: every non-null value comes next; descending: only the tie-breaker can advance
+    ascending = keyset_filter([('name', ASCENDING)], [None])
+    assert [clause['name'] for clause in ascending['$or']] == [{'$type': kind} for kind in SORT_TYPE_ORDER[1:]]
+    assert keyset_filter([('name', DESCENDING)], [None]) == {'_id': {'$in': []}}
+
+def test_previous_fields_are_equal_in_later_clauses():
+    last_id = ObjectId()
+    query = keyset_filter([('name', DESCENDING), ('_id', ASCENDING)], [None, last_id])
+    assert query['$or'][0] == {'name': None, '_id': {'$gt': last_id}}
+
+def test_sort_type():
+    assert [sort_type(value) for value in (None, True, 3, 2.5, 'a', ObjectId())] == \
+        ['null', 'bool', 'number', 'number', 'string', 'objectId']
+    assert sort_type([1, 2]) is None and sort_type({'a': 1}) is None
+
+# --- read_page() over mongomock --- #
+def page_through(shelter, sort, page_size):
+    # Every page in turn, each one resuming after the boundary of the previous page
+    rows, page = [], 0
+    while True:
+        result, total = shelter.read_page({}, sort=sort, page=page, page_size=page_size)
+        rows += result
+        if len(result) < page_size:
+            return rows, total
+        page += 1
+
+def make_shelter(documents):
+    client = mongomock.MongoClient()
+    client['aac']['animals'].insert_many([dict(document) for document in documents])
+    return AnimalShelter(client=client), client['aac']['animals']
+
+@pytest.mark.parametrize('direction', [ASCENDING, DESCENDING])
+@pytest.mark.parametrize('documents', [
+    [{'name': f'Dog {i:02d}'} for i in range(25)] + [{'name': None} for _ in range(2)] + [{} for _ in range(3)],
+    [{'value': i} for i in range(15)] + [{'value': f's{i}'} for i in range(10)],
+    [{'name': ['Max', 'Rex', None][i % 3]} for i in range(20)], # Ties resolved by _id
+], ids=['nulls', 'mixed-types', 'ties'])
+def test_pages_reach_every_document_in_order(documents, direction):
+    field = next(iter(documents[0]))
+    shelter, collection = make_shelter(documents)
+    rows, total = page_through(shelter, [(field, direction)], page_size=4)
+    expected = list(collection.find().sort([(field, direction), ('_id', ASCENDING)]))
+    assert total == len(documents)
+    assert [row['_id'] for row in rows] == [document['_id'] for document in expected]
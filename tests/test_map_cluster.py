@@ -0,0 +1,158 @@
+# CS340 Project Two | Map Cluster Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Grid clustering of the map markers in MongoDB ($group), checked against a pandas
+#              reference implementation, and the regions used to skip re-clustering on small pans.
+
+import math
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Map_Cluster_Module import (CLUSTER_RADIUS, MAX_CLUSTER_ZOOM, REGION_CELLS, cluster_pipeline, cluster_region,
+                                clusters_from_groups, point_popup, project, region_contains, unproject)
+
+mongomock = pytest.importorskip("mongomock")
+
+# --- Reference clustering (pandas) --- #
+def reference_clusters(points, zoom, radius=CLUSTER_RADIUS):
+    # Same grid cells computed in memory with project(): the features cluster_pipeline() must give
+    points = points.dropna(subset=["location_lat", "location_long"])
+    if points.empty:
+        return {"type": "FeatureCollection", "features": []}
+    lat = points["location_lat"].to_numpy(dtype=float)
+    lng = points["location_long"].to_numpy(dtype=float)
+    if zoom is None or zoom >= MAX_CLUSTER_ZOOM: # Every animal in its own cell
+        cell_x, cell_y = np.arange(len(points)), np.zeros(len(points))
+    else:
+        x, y = project(lat, lng, zoom)
+        cell_x, cell_y = np.floor(x / radius), np.floor(y / radius)
+    grid = pd.DataFrame({"cell_x": cell_x, "cell_y": cell_y, "lat": lat, "lng": lng})
+    cells = grid.groupby(["cell_x", "cell_y"])
+    groups = cells.agg(lat=("lat", "mean"), lng=("lng", "mean"), count=("lat", "size"))
+    alone = cells["lat"].transform("size").to_numpy() == 1
+
+    features = []
+    clusters = groups[groups["count"] > 1]
+    for lat_c, lng_c, count in zip(clusters["lat"], clusters["lng"], clusters["count"]):
+        features.append({"type": "Feature", "geometry": {"type": "Point", "coordinates": [float(lng_c), float(lat_c)]},
+                         "properties": {"cluster": True, "point_count": int(count),
+                                        "tooltip": f"{count} animals (zoom in to see them)"}})
+    singles = points[alone]
+    for lat_p, lng_p, name, breed, age, sex in zip(singles["location_lat"], singles["location_long"], singles["name"],
+                                                   singles["breed"], singles["age_upon_outcome"],
+                                                   singles["sex_upon_outcome"]):
+        features.append({"type": "Feature", "geometry": {"type": "Point", "coordinates": [float(lng_p), float(lat_p)]},
+                         "properties": {"cluster": False, "tooltip": str(name),
+                                        "popup": point_popup(name, breed, age, sex)}})
+    return {"type": "FeatureCollection", "features": features}
+
+# --- Running cluster_pipeline() --- #
+# mongomock has no $sin/$degreesToRadians: it runs the $match stage, the expressions of the
+# $project and $group stages are evaluated here
+OPERATORS = {'$add': sum, '$subtract': lambda v: v[0] - v[1], '$multiply': math.prod,
+             '$divide': lambda v: v[0] / v[1], '$max': max, '$min': min, '$floor': math.floor,
+             '$ln': math.log, '$sin': math.sin, '$degreesToRadians': math.radians}
+ACCUMULATORS = {'$sum': sum, '$avg': lambda values: sum(values) / len(values), '$first': lambda values: values[0]}
+
+def evaluate(expression, document):
+    if isinstance(expression, str) and expression.startswith('$'):
+        return document.get(expression[1:])
+    if isinstance(expression, dict) and len(expression) == 1 and next(iter(expression)).startswith('$'):
+        (operator, argument), = expression.items()
+        if isinstance(argument, list):
+            return OPERATORS[operator]([evaluate(item, document) for item in argument])
+        return OPERATORS[operator](evaluate(argument, document))
+    if isinstance(expression, dict):
+        return {key: evaluate(value, document) for key, value in expression.items()}
+    return expression
+
+def run_pipeline(points, zoom):
+    collection = mongomock.MongoClient()['aac']['animals']
+    collection.insert_many(points.astype(object).where(points.notna(), None).to_dict('records'))
+    match, *stages = cluster_pipeline({}, zoom)
+    documents = list(collection.aggregate([match]))
+    for stage in stages:
+        (operator, fields), = stage.items()
+        if operator == '$project':
+            documents = [{name: document.get(name) if value == 1 else evaluate(value, document)
+                          for name, value in fields.items() if value != 0} for document in documents]
+        else:                                    # $group
+            groups = {}
+            for document in documents:
+                key = evaluate(fields['_id'], document)
+                group = groups.setdefault(tuple(sorted(key.items())), {'_id': key, 'rows': []})
+                group['rows'].append(document)
+            documents = []
+            for group in groups.values():
+                rows = group.pop('rows')
+                for name, accumulator in fields.items():
+                    if name != '_id':
+                        (operator, value), = accumulator.items()
+                        values = [evaluate(value, row) for row in rows]
+                        group[name] = ACCUMULATORS[operator](values)
+                documents.append(group)
+    return clusters_from_groups(documents)
+
+def animals(coordinates):
+    return pd.DataFrame([{'location_lat': lat, 'location_long': lng, 'name': f'Dog {i}', 'breed': 'Beagle',
+                          'age_upon_outcome': '1 year', 'sex_upon_outcome': 'Intact Male'}
+                         for i, (lat, lng) in enumerate(coordinates)])
+
+def features_by_kind(collection):
+    clusters = [f for f in collection['features'] if f['properties']['cluster']]
+    singles = [f for f in collection['features'] if not f['properties']['cluster']]
+    return clusters, singles
+
+def normalized(collection):
+    # Features in a comparable order, coordinates rounded (averages are summed in another order)
+    return sorted((round(f['geometry']['coordinates'][0], 9), round(f['geometry']['coordinates'][1], 9),
+                   sorted(f['properties'].items())) for f in collection['features'])
+
+def test_nearby_animals_form_one_cluster():
+    points = animals([(30.27, -97.74), (30.2701, -97.7401), (30.2702, -97.7399), (30.75, -97.48)])
+    clusters, singles = features_by_kind(run_pipeline(points, 10))
+    assert [c['properties']['point_count'] for c in clusters] == [3]
+    assert clusters[0]['geometry']['coordinates'] == pytest.approx([-97.74, (30.27 + 30.2701 + 30.2702) / 3], abs=1e-4)
+    assert [s['properties']['tooltip'] for s in singles] == ['Dog 3']
+
+def test_every_animal_alone_from_the_max_zoom():
+    points = animals([(30.27, -97.74), (30.27, -97.74)])
+    clusters, singles = features_by_kind(run_pipeline(points, MAX_CLUSTER_ZOOM))
+    assert clusters == [] and len(singles) == 2
+
+def test_missing_coordinates_and_empty_input():
+    points = animals([(30.27, -97.74), (None, -97.7), (30.3, None)])
+    assert len(run_pipeline(points, 12)['features']) == 1
+    assert clusters_from_groups([]) == {"type": "FeatureCollection", "features": []}
+
+def test_popup_is_escaped():
+    points = animals([(30.27, -97.74)])
+    points.loc[0, 'name'] = '<b>Rex</b>'
+    popup = run_pipeline(points, 12)['features'][0]['properties']['popup']
+    assert '<b>Rex</b>' not in popup and '&lt;b&gt;Rex&lt;/b&gt;' in popup
+
+@pytest.mark.parametrize('zoom', [8, 10, 12, 14, MAX_CLUSTER_ZOOM])
+def test_pipeline_matches_the_reference(zoom):
+    generator = random.Random(zoom)
+    points = animals([(30.3 + generator.random() * 0.5, -97.7 + generator.random() * 0.5) for _ in range(200)])
+    assert normalized(run_pipeline(points, zoom)) == normalized(reference_clusters(points, zoom))
+
+def test_unproject_inverts_project():
+    x, y = project(30.75, -97.48, 10)
+    lat, lng = unproject(x, y, 10)
+    assert math.isclose(lat, 30.75, abs_tol=1e-9) and math.isclose(lng, -97.48, abs_tol=1e-9)
+
+def test_region_covers_the_view_and_small_pans():
+    bounds = [[30.5, -97.6], [30.6, -97.4]]
+    region = cluster_region(bounds, 12)
+    assert region_contains(region, bounds)
+    assert region_contains(region, [[30.52, -97.55], [30.62, -97.35]])   # Small pan
+    assert not region_contains(region, [[29.0, -97.6], [30.6, -97.4]])   # Far away
+    assert not region_contains(None, bounds) and not region_contains(region, None)
+    (south, west), (north, east) = region     # Edges on the blocks of grid cells
+    for lat, lng in ((north, west), (south, east)):
+        for pixels in project(lat, lng, 12):
+            assert pixels / (CLUSTER_RADIUS * REGION_CELLS) == pytest.approx(round(pixels / (CLUSTER_RADIUS * REGION_CELLS)))
@@ -0,0 +1,53 @@
+# CS340 Project Two | Query Cache Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Cached read results are copies: modifying them never changes what later callers get,
+#              and only updates that change a document invalidate them.
+
+import pytest
+
+from CRUD_Python_Module import MODIFIED_FIELD, AnimalShelter, detached
+
+mongomock = pytest.importorskip("mongomock")
+
+def make_shelter():
+    client = mongomock.MongoClient()
+    client['aac']['animals'].insert_many([{'name': 'Max', 'breed': 'Bloodhound'},
+                                          {'name': 'Rex', 'breed': 'Rottweiler'}])
+    return AnimalShelter(client=client)
+
+def test_read_results_can_be_modified():
+    shelter = make_shelter()
+    first = shelter.read({})
+    first[0]['name'] = 'Changed'
+    first.append({'name': 'Extra'})
+    again = shelter.read({})
+    assert [document['name'] for document in again] == ['Max', 'Rex']
+    assert shelter.cache.hits == 1
+
+def test_read_page_results_can_be_modified():
+    shelter = make_shelter()
+    rows, total = shelter.read_page({}, page_size=1)
+    rows[0]['name'] = 'Changed'
+    assert shelter.read_page({}, page_size=1)[0][0]['name'] == 'Max'
+
+def test_detached_copies_lists_and_documents():
+    rows = [{'a': 1}, 2]
+    copy = detached((rows, 1))
+    assert copy == (rows, 1)
+    assert copy[0] is not rows and copy[0][0] is not rows[0]
+
+def test_updates_changing_nothing_keep_the_cache():
+    shelter = make_shelter()
+    shelter.read({})
+    assert shelter.update({'name': 'Max'}, {'$set': {'breed': 'Bloodhound'}}) == 0
+    assert shelter.update({'name': 'Rex'}, {'$unset': {'color': ''}}) == 0
+    shelter.read({})
+    assert shelter.cache.hits == 1
+    assert all(MODIFIED_FIELD not in document for document in shelter.read({}))
+
+def test_only_changed_documents_get_a_write_time():
+    shelter = make_shelter()
+    assert shelter.update({}, {'$set': {'breed': 'Bloodhound'}}) == 1
+    stamped = {document['name']: MODIFIED_FIELD in document for document in shelter.read({})}
+    assert stamped == {'Max': False, 'Rex': True}
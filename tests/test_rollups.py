@@ -0,0 +1,84 @@
+# CS340 Project Two | Outcome Rollup Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: rollup_updates() turns grouped counts into day and month rollup upserts, deletes keep
+#              the rollups consistent when they fail, and the in-memory counting of inserted
+#              documents agrees with the rescue profile queries.
+
+import pytest
+
+from CRUD_Python_Module import (RESCUE_PROFILES, AnimalShelter, derived_fields, matches_criteria, rollup_groups,
+                                rollup_updates)
+
+mongomock = pytest.importorskip("mongomock")
+
+def as_dict(operations):
+    # _id -> (fields set on insert, increments) of every upsert
+    return {operation._filter['_id']: (operation._doc['$setOnInsert'], operation._doc['$inc'])
+            for operation in operations}
+
+def test_every_day_also_counts_in_its_month():
+    groups = {'count': [{'_id': {'day': '2016-05-01', 'outcome_type': 'Adoption', 'animal_type': 'Dog'}, 'n': 2},
+                        {'_id': {'day': '2016-05-20', 'outcome_type': 'Adoption', 'animal_type': 'Dog'}, 'n': 3}],
+              'water': [{'_id': {'day': '2016-05-20', 'outcome_type': 'Adoption', 'animal_type': 'Dog'}, 'n': 1}]}
+    updates = as_dict(rollup_updates(groups))
+    assert updates['day|2016-05-01|Adoption|Dog'] == (
+        {'period': 'day', 'bucket': '2016-05-01', 'outcome_type': 'Adoption', 'animal_type': 'Dog'}, {'count': 2})
+    assert updates['day|2016-05-20|Adoption|Dog'][1] == {'count': 3, 'water': 1}
+    assert updates['month|2016-05|Adoption|Dog'][1] == {'count': 5, 'water': 1}
+    assert len(updates) == 3
+
+def test_removal_and_undated_groups():
+    groups = {'count': [{'_id': {'day': '2016-05-01', 'animal_type': 'Cat'}, 'n': 4},
+                        {'_id': {'day': None, 'animal_type': 'Cat'}, 'n': 9},
+                        {'_id': {'day': 'unknown', 'animal_type': 'Cat'}, 'n': 9}]}
+    updates = as_dict(rollup_updates(groups, sign=-1))
+    assert set(updates) == {'day|2016-05-01|None|Cat', 'month|2016-05|None|Cat'}
+    assert all(increments == {'count': -4} for _, increments in updates.values())
+
+def test_rollup_groups_of_inserted_documents():
+    documents = [
+        {'datetime': '2016-05-01 10:00:00', 'outcome_type': 'Adoption', 'animal_type': 'Dog',
+         'breed': 'Labrador Retriever Mix', 'sex_upon_outcome': 'Intact Female', 'age_upon_outcome_in_weeks': 52},
+        {'datetime': '2016-05-01 18:30:00', 'outcome_type': 'Adoption', 'animal_type': 'Dog', 'breed': 'Beagle'},
+        {'outcome_type': 'Adoption', 'animal_type': 'Dog'}, # No date: not counted
+    ]
+    for document in documents:
+        document.update(derived_fields(document))
+    groups = rollup_groups(documents)
+    key = {'day': '2016-05-01', 'outcome_type': 'Adoption', 'animal_type': 'Dog'}
+    assert groups['count'] == [{'_id': key, 'n': 2}]
+    assert groups['water'] == [{'_id': key, 'n': 1}]
+    assert groups['mountain'] == groups['disaster'] == []
+
+def test_matches_criteria_agrees_with_mongodb():
+    collection = mongomock.MongoClient()['aac']['animals']
+    documents = [{'animal_type': 'Dog', 'sex_upon_outcome': sex, 'breed': breed, 'outcome_type': outcome,
+                  'age_upon_outcome_in_weeks': age}
+                 for sex in ('Intact Male', 'Intact Female')
+                 for breed in ('German Shepherd', 'Labrador Retriever Mix', 'Bloodhound')
+                 for outcome in ('Adoption', 'Died', None)
+                 for age in (25, 26, 100.5, 156, 300, '52', True, None)]
+    for document in documents:
+        document.update(derived_fields(document))
+    collection.insert_many(documents)
+    for document in collection.find():
+        for criteria in RESCUE_PROFILES.values():
+            expected = collection.count_documents({'$and': [{'_id': document['_id']}, criteria]}) == 1
+            assert matches_criteria(document, criteria) is expected
+
+def test_unsupported_criteria_are_not_evaluated():
+    assert matches_criteria({'breed': 'Beagle'}, {'breed': {'$regex': 'Bea'}}) is None
+    assert matches_criteria({'breed': 'Beagle'}, {'$or': [{'breed': 'Beagle'}]}) is None
+
+def test_failed_delete_counts_the_documents_back_in(monkeypatch):
+    client = mongomock.MongoClient()
+    client['aac']['animals'].insert_many([{'name': 'Max'}, {'name': 'Rex'}])
+    shelter = AnimalShelter(client=client)
+    calls = []
+    monkeypatch.setattr(shelter, 'update_rollups', lambda ids, sign, documents=None: calls.append((len(ids), sign)))
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("primary stepped down")
+    monkeypatch.setattr(shelter.collection, 'delete_many', unavailable)
+    assert shelter.delete({}) == 0
+    assert calls == [(2, -1), (2, 1)]
@@ -0,0 +1,19 @@
+# CS340 Project Two | Shelter CLI Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: convert_value() stores plain numerals of the CSV exports as numbers, nothing else.
+
+import pytest
+
+from Shelter_CLI import convert_value
+
+@pytest.mark.parametrize('value, expected', [
+    ('42', 42), ('-3', -3), ('30.75', 30.75), ('-97.5', -97.5), ('.5', 0.5), ('1e3', 1000.0),
+])
+def test_numerals_become_numbers(value, expected):
+    result = convert_value(value)
+    assert result == expected and type(result) is type(expected)
+
+@pytest.mark.parametrize('value', ['Nan', 'Inf', 'Infinity', '-inf', '1e999', '1_000', ' 5', '', 'Max'])
+def test_other_strings_are_kept(value):
+    assert convert_value(value) == value
@@ -0,0 +1,88 @@
+# CS340 Project Two | Snapshot Tests
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: The boolean masks of ShelterSnapshot select the same documents as MongoDB
+#              (missing values, mixed types, rescue tags) or defer unsupported queries to it.
+
+import pytest
+
+from CRUD_Python_Module import AnimalShelter, RESCUE_PROFILES, derived_fields
+from Snapshot_Module import ShelterSnapshot
+
+mongomock = pytest.importorskip("mongomock")
+
+BREEDS = ['Labrador Retriever Mix', 'German Shepherd', 'Bloodhound/Beagle', 'Rottweiler Mix', 'Siamese']
+
+def make_documents():
+    documents = []
+    for i in range(60):
+        document = {'animal_id': f'A{i}', 'animal_type': 'Dog' if i % 4 else 'Cat',
+                    'breed': BREEDS[i % len(BREEDS)],
+                    'sex_upon_outcome': ['Intact Female', 'Intact Male', 'Neutered Male'][i % 3],
+                    'outcome_type': ['Adoption', 'Transfer', 'Died', 'Return to Owner'][i % 4],
+                    'age_upon_outcome_in_weeks': 10 + i * 5}
+        if i % 7 == 0:                 # Missing values
+            del document['age_upon_outcome_in_weeks']
+        if i % 11 == 0:
+            del document['outcome_type']
+        documents.append(document)
+    documents += [ # One candidate of every rescue profile
+        {'animal_id': 'W', 'animal_type': 'Dog', 'breed': 'Labrador Retriever Mix',
+         'sex_upon_outcome': 'Intact Female', 'outcome_type': 'Adoption', 'age_upon_outcome_in_weeks': 52},
+        {'animal_id': 'M', 'animal_type': 'Dog', 'breed': 'Siberian Husky',
+         'sex_upon_outcome': 'Intact Male', 'age_upon_outcome_in_weeks': 100.5},
+        {'animal_id': 'D', 'animal_type': 'Dog', 'breed': 'Bloodhound',
+         'sex_upon_outcome': 'Intact Male', 'outcome_type': 'Transfer', 'age_upon_outcome_in_weeks': 250},
+    ]
+    for document in documents:
+        document.update(derived_fields(document))
+    return documents
+
+@pytest.fixture(scope='module')
+def loaded():
+    client = mongomock.MongoClient()
+    collection = client['aac']['animals']
+    collection.insert_many(make_documents())
+    shelter = AnimalShelter(client=client)
+    snapshot = ShelterSnapshot(shelter)
+    snapshot.refresh()
+    return snapshot, collection
+
+def selected_ids(snapshot, query):
+    mask = snapshot.query_mask(query)
+    return None if mask is None else sorted(snapshot.ids[mask].tolist())
+
+@pytest.mark.parametrize('query', list(RESCUE_PROFILES.values()) + [
+    {'animal_type': 'Cat'},
+    {'outcome_type': {'$nin': ['Died', 'Euthanasia']}},   # Missing values match $nin
+    {'outcome_type': {'$in': ['Adoption', 'Transfer']}},
+    {'outcome_type': {'$ne': 'Adoption'}},
+    {'age_upon_outcome_in_weeks': {'$gt': 100, '$lte': 200}}, # Missing values never match a range
+    {'$and': [{'animal_type': 'Dog'}, {'breed': 'German Shepherd'}]},
+    {'name': 'Max'},                                       # Field missing from every document
+], ids=list(RESCUE_PROFILES) + ['equality', 'nin', 'in', 'ne', 'range', 'and', 'missing-field'])
+def test_masks_match_mongodb(loaded, query):
+    snapshot, collection = loaded
+    expected = sorted(document['_id'] for document in collection.find(query, {'_id': 1}))
+    assert selected_ids(snapshot, query) == expected
+
+@pytest.mark.parametrize('query', [
+    {'breed': {'$regex': 'Mix'}},
+    {'$or': [{'animal_type': 'Cat'}, {'breed': 'Siamese'}]},
+    {'rescue_tags': {'$in': ['water']}},
+])
+def test_unsupported_queries_are_left_to_mongodb(loaded, query):
+    snapshot, _ = loaded
+    assert snapshot.query_mask(query) is None
+
+def test_read_page_and_value_counts(loaded):
+    snapshot, collection = loaded
+    query = {'animal_type': 'Dog'}
+    rows, total = snapshot.read_page(query, page=1, page_size=5, projection=['breed'])
+    expected = list(collection.find(query, {'breed': 1}).sort('_id', 1).skip(5).limit(5))
+    assert total == collection.count_documents(query)
+    assert rows == expected
+    counts = snapshot.value_counts(query, 'breed')
+    assert dict(zip(counts['_id'], counts['count'])) == {
+        breed: collection.count_documents({**query, 'breed': breed})
+        for breed in collection.distinct('breed', query)}
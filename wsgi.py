@@ -0,0 +1,29 @@
+# CS340 Project Two | WSGI Entry Point
+# Author: GCZ79
+# Date: 10/16/2026
+# Description: Production entry point of the dashboard for multi-worker WSGI servers.
+#              Usage: gunicorn wsgi:server  (settings in gunicorn.conf.py)
+
+import importlib.util # the dashboard file name is not a valid module name
+import os             # deployment settings from environment variables
+import pathlib        # locate the dashboard next to this file
+
+from Query_Cache_Module import DiskQueryCache # Query cache shared by all worker processes
+
+# --- Deployment settings --- #
+MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50)) # Connections per worker process
+MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))  # Connections kept open per worker
+CACHE_DIR     = os.environ.get('QUERY_CACHE_DIR', 'cache/queries') # Shared query cache folder
+CACHE_TTL     = int(os.environ.get('QUERY_CACHE_TTL', 300))   # Seconds a cached result is served
+
+# Load "ProjectTwo(PythonCodeOnly).py" as the dashboard module
+dashboard_path = pathlib.Path(__file__).with_name('ProjectTwo(PythonCodeOnly).py')
+spec = importlib.util.spec_from_file_location('dashboard', dashboard_path)
+dashboard = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dashboard)
+
+# The app can be created before the workers fork: every worker opens its own MongoDB
+# connection pool on first use, and the query cache is invalidated in all of them on writes
+app = dashboard.create_app(max_pool_size=MAX_POOL_SIZE, min_pool_size=MIN_POOL_SIZE,
+                           cache=DiskQueryCache(CACHE_DIR, ttl=CACHE_TTL))
+server = app.server # Flask application served by the WSGI server